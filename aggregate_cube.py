@@ -0,0 +1,336 @@
+import os
+import json
+import zipfile
+import numpy as np
+import pandas as pd
+from sketches import QuantileSketch
+from compressed_input import open_binary
+
+dimensions = ("year", "month", "area_name", "profession", "salary_currency")
+
+# все вакансии, без отбора по профессии
+all_professions = "*"
+
+default_professions = ("Аналитик", "Программист", "Разработчик", "Инженер", "Тестировщик", "Менеджер",
+                       "Бухгалтер", "Системный администратор")
+
+
+class AggregateCube:
+    """
+    Предпосчитанные суммы по ячейкам (год, месяц, город, профессия, валюта)
+
+    Вакансия попадает в ячейку профессии *, а также в ячейку каждой профессии, название которой входит
+    в название вакансии, поэтому суммы по одной профессии не содержат повторов. Запрос складывает
+    подходящие ячейки вместо повторного чтения вакансий
+
+    Attributes
+    ----------
+    professions: tuple
+        профессии, для которых считаются отдельные ячейки
+    with_sketches: bool
+        хранить ли в ячейках скетчи квантилей зарплат
+    version: list
+        отпечаток исходного файла и параметров, для которых построен куб
+    codes: dict
+        измерение -> коды ячеек (numpy массив)
+    values: dict
+        area_name, profession, salary_currency -> значения кодов
+    salary_sum: numpy.ndarray
+        сумма зарплат ячейки
+    salary_count: numpy.ndarray
+        количество вакансий с зарплатой
+    count: numpy.ndarray
+        количество вакансий
+    sketches: list
+        скетчи квантилей зарплат ячеек или None
+    """
+    def __init__(self, professions: tuple = default_professions, with_sketches: bool = False):
+        """
+        Инициализация объекта
+        :param professions: tuple
+            профессии, для которых считаются отдельные ячейки
+        :param with_sketches: bool
+            хранить ли в ячейках скетчи квантилей зарплат
+        """
+        self.professions = tuple(professions)
+        self.with_sketches = with_sketches
+        self.version = None
+        self.codes = {}
+        self.values = {}
+        self.salary_sum = None
+        self.salary_count = None
+        self.count = None
+        self.sketches = None
+
+    def build(self, df: pd.DataFrame):
+        """
+        Построение куба одним группированием вакансий
+        :param df: pandas.DataFrame
+            вакансии со столбцами name, salary_from, salary_to, salary_currency, area_name, published_at
+        """
+        df = pd.DataFrame({
+            "name": df["name"].fillna(""),
+            "salary": df[["salary_from", "salary_to"]].mean(axis=1),
+            "salary_currency": df["salary_currency"].fillna(""),
+            "area_name": df["area_name"].fillna(""),
+            "year": df["published_at"].str[:4].astype(int),
+            "month": df["published_at"].str[5:7].astype(int),
+        })
+        parts = [df.assign(profession=all_professions)]
+        for profession in self.professions:
+            parts.append(df[df["name"].str.contains(profession, regex=False)].assign(profession=profession))
+        df = pd.concat(parts, ignore_index=True)
+        groups = df.groupby(list(dimensions), sort=True)
+        cells = groups["salary"].agg(["sum", "count", "size"]).reset_index()
+
+        for dimension in dimensions:
+            if dimension in ("year", "month"):
+                self.codes[dimension] = cells[dimension].to_numpy(np.int32)
+            else:
+                codes, values = pd.factorize(cells[dimension])
+                self.codes[dimension] = codes.astype(np.int32)
+                self.values[dimension] = list(values)
+        self.salary_sum = cells["sum"].to_numpy(np.float64)
+        self.salary_count = cells["count"].to_numpy(np.int64)
+        self.count = cells["size"].to_numpy(np.int64)
+        if self.with_sketches:
+            self.sketches = []
+            for _, salaries in groups["salary"]:
+                sketch = QuantileSketch()
+                for salary in salaries.dropna():
+                    sketch.update(salary)
+                self.sketches.append(sketch)
+
+    def get_mask(self, first_year: int = None, last_year: int = None, area_name: str = None,
+                 profession: str = None, currency: str = None):
+        """
+        Ячейки, подходящие под условия
+        :param first_year: int
+            первый год или None
+        :param last_year: int
+            последний год или None
+        :param area_name: str
+            город или None
+        :param profession: str
+            профессия из professions или None для всех вакансий
+        :param currency: str
+            валюта или None для всех валют
+        :return: numpy.ndarray
+            маска ячеек
+        """
+        mask = self.codes["profession"] == self.get_code("profession", profession or all_professions)
+        if first_year is not None:
+            mask &= self.codes["year"] >= first_year
+        if last_year is not None:
+            mask &= self.codes["year"] <= last_year
+        if area_name is not None:
+            mask &= self.codes["area_name"] == self.get_code("area_name", area_name)
+        if currency is not None:
+            mask &= self.codes["salary_currency"] == self.get_code("salary_currency", currency)
+        return mask
+
+    def get_code(self, dimension: str, value: str):
+        """
+        Код значения измерения
+        :param dimension: str
+            измерение
+        :param value: str
+            значение
+        :return: int
+            код или -1, если значения нет в кубе
+        """
+        if dimension == "profession" and value != all_professions and value not in self.professions:
+            raise KeyError(f"Профессии {value} нет в кубе")
+        values = self.values[dimension]
+        return values.index(value) if value in values else -1
+
+    def query(self, group_by: str = "year", rates: dict = None, **conditions):
+        """
+        Суммы по значениям измерения для подходящих ячеек
+        :param group_by: str
+            измерение группировки
+        :param rates: dict
+            курсы валют для перевода сумм зарплат, валюты без курса не учитываются в зарплате
+        :param conditions: dict
+            условия get_mask
+        :return: dict
+            значение измерения -> [сумма зарплат, количество вакансий с зарплатой, количество вакансий]
+        """
+        mask = self.get_mask(**conditions)
+        codes = self.codes[group_by][mask]
+        salary_sum, salary_count = self.salary_sum[mask], self.salary_count[mask]
+        if rates is not None:
+            currencies = self.values["salary_currency"]
+            cell_rates = np.array([rates.get(currency, np.nan) for currency in currencies])[
+                self.codes["salary_currency"][mask]]
+            salary_count = np.where(np.isnan(cell_rates), 0, salary_count)
+            salary_sum = np.where(np.isnan(cell_rates), 0, salary_sum * cell_rates)
+        keys, inverse = np.unique(codes, return_inverse=True)
+        sums = np.bincount(inverse, weights=salary_sum, minlength=len(keys))
+        salary_counts = np.bincount(inverse, weights=salary_count, minlength=len(keys))
+        counts = np.bincount(inverse, weights=self.count[mask], minlength=len(keys))
+        names = self.values.get(group_by)
+        return {(names[key] if names is not None else int(key)): [float(total), int(salary_total), int(count)]
+                for key, total, salary_total, count in zip(keys.tolist(), sums, salary_counts, counts)}
+
+    def get_quantiles(self, **conditions):
+        """
+        Квантили зарплат подходящих ячеек по объединенным скетчам
+        :param conditions: dict
+            условия get_mask
+        :return: list
+            значения квантилей (p10, p50, p90)
+        """
+        if self.sketches is None:
+            raise ValueError("Куб построен без скетчей")
+        result = QuantileSketch()
+        for i in np.flatnonzero(self.get_mask(**conditions)):
+            result.merge(self.sketches[i])
+        return result.get_quantiles()
+
+
+def pack_sketches(sketches: list):
+    """
+    Скетчи квантилей в массивы для записи в npz
+    :param sketches: list
+        скетчи QuantileSketch
+    :return: dict
+        имя -> массив: k и количество значений скетчей, количество уровней, размеры уровней, значения
+    """
+    levels = [len(items) for sketch in sketches for items in sketch.compactors]
+    return {
+        "sketch_k": np.array([sketch.k for sketch in sketches], dtype=np.int64),
+        "sketch_count": np.array([sketch.count for sketch in sketches], dtype=np.int64),
+        "sketch_levels": np.array([len(sketch.compactors) for sketch in sketches], dtype=np.int64),
+        "sketch_level_sizes": np.array(levels, dtype=np.int64),
+        "sketch_values": np.array([value for sketch in sketches for items in sketch.compactors for value in items],
+                                  dtype=np.float64),
+    }
+
+
+def unpack_sketches(data):
+    """
+    Скетчи квантилей из массивов pack_sketches
+    :param data: numpy.lib.npyio.NpzFile
+        файл куба
+    :return: list
+        скетчи QuantileSketch
+    """
+    level_sizes = data["sketch_level_sizes"].tolist()
+    values = data["sketch_values"].tolist()
+    sketches, level, position = [], 0, 0
+    for k, count, levels in zip(data["sketch_k"].tolist(), data["sketch_count"].tolist(),
+                                data["sketch_levels"].tolist()):
+        sketch = QuantileSketch(k)
+        sketch.compactors = []
+        for size in level_sizes[level:level + levels]:
+            sketch.grow()
+            sketch.compactors[-1] = values[position:position + size]
+            position += size
+        level += levels
+        sketch.count = count
+        sketch.size = sum(len(items) for items in sketch.compactors)
+        sketches.append(sketch)
+    return sketches
+
+
+def get_cube_name(file_name: str):
+    """
+    Имя файла куба
+    :param file_name: str
+        исходный csv файл
+    :return: str
+        <файл>.cube.npz
+    """
+    return file_name + ".cube.npz"
+
+
+def get_fingerprint(file_name: str, professions: tuple, with_sketches: bool):
+    """
+    Отпечаток версии исходного файла и параметров куба
+    :param file_name: str
+        исходный csv файл
+    :param professions: tuple
+        профессии куба
+    :param with_sketches: bool
+        хранятся ли в ячейках скетчи
+    :return: list
+        размер, время изменения в наносекундах, профессии, наличие скетчей
+    """
+    stat = os.stat(file_name)
+    return [stat.st_size, stat.st_mtime_ns, list(professions), with_sketches]
+
+
+def save(cube: AggregateCube, cube_name: str):
+    """
+    Запись куба в npz без pickle: числовые массивы ячеек и скетчей, отпечаток и значения кодов - json строкой
+    :param cube: AggregateCube
+        куб
+    :param cube_name: str
+        имя файла куба
+    """
+    meta = {"version": cube.version, "professions": list(cube.professions), "with_sketches": cube.with_sketches,
+            "values": cube.values}
+    arrays = {f"codes_{dimension}": codes for dimension, codes in cube.codes.items()}
+    arrays.update(salary_sum=cube.salary_sum, salary_count=cube.salary_count, count=cube.count)
+    if cube.sketches is not None:
+        arrays.update(pack_sketches(cube.sketches))
+    with open(cube_name + ".tmp", "wb") as file:
+        np.savez(file, meta=np.array(json.dumps(meta, ensure_ascii=False)), **arrays)
+    os.replace(cube_name + ".tmp", cube_name)
+
+
+def load(cube_name: str, version: list):
+    """
+    Чтение куба, записанного save; массивы ячеек читаются, только если отпечаток совпадает
+    :param cube_name: str
+        имя файла куба
+    :param version: list
+        ожидаемый отпечаток get_fingerprint
+    :return: AggregateCube
+        куб или None, если файл построен для другой версии
+    """
+    with np.load(cube_name, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta["version"] != version:
+            return None
+        cube = AggregateCube(tuple(meta["professions"]), meta["with_sketches"])
+        cube.version = meta["version"]
+        cube.values = meta["values"]
+        cube.codes = {dimension: data[f"codes_{dimension}"] for dimension in dimensions}
+        cube.salary_sum, cube.salary_count, cube.count = data["salary_sum"], data["salary_count"], data["count"]
+        if cube.with_sketches:
+            cube.sketches = unpack_sketches(data)
+    return cube
+
+
+def load_or_build(file_name: str, professions: tuple = default_professions, with_sketches: bool = False):
+    """
+    Загружает куб, если он построен для текущей версии файла (размер и время изменения) и тех же профессий,
+    иначе строит и сохраняет новый. Куб хранится в npz без pickle, отпечаток проверяется до чтения массивов;
+    поврежденный файл куба строится заново
+    :param file_name: str
+        исходный csv файл сокращенного формата, сжатый или нет
+    :param professions: tuple
+        профессии куба
+    :param with_sketches: bool
+        хранить ли в ячейках скетчи квантилей зарплат
+    :return: AggregateCube
+        куб
+    """
+    version = get_fingerprint(file_name, professions, with_sketches)
+    cube_name = get_cube_name(file_name)
+    if os.path.exists(cube_name):
+        try:
+            cube = load(cube_name, version)
+            if cube is not None:
+                return cube
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass
+    cube = AggregateCube(professions, with_sketches)
+    with open_binary(file_name) as data:
+        cube.build(pd.read_csv(data, usecols=["name", "salary_from", "salary_to", "salary_currency", "area_name",
+                                              "published_at"]))
+    cube.version = version
+    save(cube, cube_name)
+    return cube
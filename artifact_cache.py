@@ -0,0 +1,113 @@
+import os
+import json
+import shutil
+import inspect
+import hashlib
+import importlib
+import tempfile
+
+# увеличивается при изменении формата кэша; изменения шаблона и кода генерации учитываются хэшем их текста
+template_version = 2
+
+# модули, участвующие в генерации файлов отчета, кроме класса отчета
+generator_modules = ("excel_export", "report_renderer")
+
+report_fields = ("years_salary", "years_count", "years_salary_vac", "years_count_vac", "area_salary", "area_count",
+                 "prof", "skills", "skills_vac", "skills_years", "area_employers",
+                 "salary_bands", "periods", "estimate", "sample_note")
+
+
+class ArtifactCache:
+    """
+    Кэш файлов отчета (graph.png, report.xlsx, report.pdf) по хэшу подготовленных данных отчета
+
+    Attributes
+    ----------
+    cache_dir: str
+        папка кэша
+    template_file: str
+        шаблон pdf, содержимое которого входит в хэш
+    sources: dict
+        класс отчета -> хэш исходного кода генерации (класса и generator_modules)
+    """
+    def __init__(self, cache_dir: str = '.report_cache', template_file: str = None):
+        """
+        Инициализация объекта
+        :param cache_dir: str
+            папка кэша
+        :param template_file: str
+            шаблон pdf
+        """
+        self.cache_dir = cache_dir
+        self.template_file = template_file or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "pdf_template.html")
+        self.sources = {}
+
+    def get_sources_digest(self, reporter_class: type):
+        """
+        Хэш исходного кода, по которому строятся файлы отчета, считается один раз для класса
+        :param reporter_class: type
+            класс отчета (statistic.Report)
+        :return: str
+            хэш в шестнадцатеричном виде
+        """
+        if reporter_class not in self.sources:
+            digest = hashlib.sha256(inspect.getsource(reporter_class).encode("utf-8"))
+            for name in generator_modules:
+                digest.update(inspect.getsource(importlib.import_module(name)).encode("utf-8"))
+            self.sources[reporter_class] = digest.hexdigest()
+        return self.sources[reporter_class]
+
+    def get_key(self, reporter):
+        """
+        Хэш данных отчета, версии формата, шаблона и кода генерации
+        :param reporter: statistic.Report
+            подготовленный отчет
+        :return: str
+            хэш в шестнадцатеричном виде
+        """
+        data = {name: getattr(reporter, name) for name in report_fields}
+        data = {name: list(value.items()) if type(value) == dict else value for name, value in data.items()}
+        digest = hashlib.sha256()
+        digest.update(json.dumps([template_version, self.get_sources_digest(type(reporter)), data],
+                                 ensure_ascii=False, default=str).encode("utf-8"))
+        with open(self.template_file, "rb") as file:
+            digest.update(file.read())
+        return digest.hexdigest()
+
+    def restore(self, key: str, files: dict):
+        """
+        Копирует файлы отчета из кэша
+        :param key: str
+            хэш отчета
+        :param files: dict
+            имена файлов назначения (excel, image, pdf)
+        :return: bool
+            True, если отчет найден в кэше
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry):
+            return False
+        for kind, file_name in files.items():
+            shutil.copyfile(os.path.join(entry, kind), file_name)
+        return True
+
+    def store(self, key: str, files: dict):
+        """
+        Сохраняет файлы отчета в кэш
+        :param key: str
+            хэш отчета
+        :param files: dict
+            имена созданных файлов (excel, image, pdf)
+        """
+        entry = os.path.join(self.cache_dir, key)
+        if os.path.isdir(entry):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        for kind, file_name in files.items():
+            shutil.copyfile(file_name, os.path.join(temp_dir, kind))
+        try:
+            os.rename(temp_dir, entry)
+        except OSError:
+            shutil.rmtree(temp_dir)
@@ -0,0 +1,45 @@
+import sys
+import json
+import time
+import statistics
+import subprocess
+
+cases = {
+    "interpreter": "pass",
+    "table_mode": "import table",
+    "statistic_mode": "import statistic",
+    "report_rendering": "import statistic, openpyxl, matplotlib.pyplot, numpy, jinja2, pdfkit",
+}
+
+
+def measure(code: str, repeat: int = 10):
+    """
+    Измеряет время запуска интерпретатора с выполнением кода
+    :param code: str
+        выполняемый код
+    :param repeat: int
+        количество запусков
+    :return: float
+        медианное время запуска в миллисекундах
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(times), 1)
+
+
+def main():
+    """
+    Измеряет время запуска для каждого режима из cases и печатает результаты в формате json
+    :return: dict
+        режим -> медианное время запуска в миллисекундах
+    """
+    results = {name: measure(code) for name, code in cases.items()}
+    print(json.dumps(results, indent=4))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import datetime
+import importlib
+import table
+import statistic
+import vacancies_generator
+
+multipro = importlib.import_module("multiproс")
+
+
+def measure(name: str, rows: int, function, repeat: int):
+    """
+    Замеряет время выполнения функции
+    :param name: str
+        название замера
+    :param rows: int
+        количество вакансий во входных данных
+    :param function: callable
+        замеряемая функция без аргументов
+    :param repeat: int
+        количество повторов, берется лучшее время
+    :return: dict
+        результат замера
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    seconds = min(times)
+    result = {"name": name, "rows": rows, "seconds": round(seconds, 6), "rows_per_second": round(rows / seconds)}
+    print(f"{name:<50} {rows:>10} {seconds:>10.3f} s")
+    return result
+
+
+def run_size(rows: int, repeat: int):
+    """
+    Генерирует входные данные заданного размера и выполняет все замеры над ними
+    :param rows: int
+        количество вакансий
+    :param repeat: int
+        количество повторов каждого замера
+    :return: list
+        результаты замеров
+    """
+    results = []
+    vacancies_generator.generate_csv("vacancies.csv", rows)
+    vacancies_generator.generate_csv("vacancies_short.csv", rows, short=True)
+    vacancies_generator.generate_currencies("currencies.csv")
+
+    table_dataset = table.DataSet("vacancies.csv", list())
+    results.append(measure("table.DataSet.fill_vacancies", rows, table_dataset.fill_vacancies, repeat))
+    inputer = table.InputConect()
+    inputer.filter_by, inputer.sort_by, inputer.is_reversed_sort = "Навыки: Python", "Оклад", "Да"
+    results.append(measure("table.InputConect.filter_vacancies", rows,
+                           lambda: inputer.filter_vacancies(table_dataset.vacancies_objects), repeat))
+    results.append(measure("table.InputConect.sort_vacancies", rows,
+                           lambda: inputer.sort_vacancies(table_dataset.vacancies_objects), repeat))
+
+    statistic_dataset = statistic.DataSet("vacancies.csv", list())
+    results.append(measure("statistic.DataSet.fill_vacancies", rows, statistic_dataset.fill_vacancies, repeat))
+
+    def count():
+        statistic_inputer = statistic.InputConect()
+        statistic_inputer.profession = "Аналитик"
+        statistic_inputer.count_vacancies(statistic_dataset.vacancies_objects)
+        return statistic_inputer
+
+    results.append(measure("statistic.InputConect.count_vacancies", rows, count, repeat))
+
+    import vacancies_parsing
+    results.append(measure("vacancies_parsing.parse_csv_by_year", rows,
+                           lambda: vacancies_parsing.parse_csv_by_year("vacancies_short.csv"), repeat))
+    results.append(measure("vacancies_parsing.parse_csv_to_columns", rows,
+                           lambda: vacancies_parsing.parse_csv_to_columns("vacancies_short.csv"), repeat))
+    stat = multipro.Statistic("vacancies_short.csv", "Аналитик", source="columns")
+    for method in ("get_stat_by_year_multi_off", "get_stat_by_year_multi_on", "get_stat_by_year_concurrent"):
+        results.append(measure(f"multiproс.Statistic.{method}", rows, getattr(stat, method), repeat))
+    results.append(measure("multiproс.Statistic.get_stat_by_city", rows, stat.get_stat_by_city, repeat))
+    csv_stat = multipro.Statistic("vacancies_short.csv", "Аналитик", source="csv")
+    results.append(measure("multiproс.Statistic.get_stat_by_year_concurrent (csv offsets)", rows,
+                           csv_stat.get_stat_by_year_concurrent, repeat))
+
+    import currency_convertation
+    results.append(measure("currency_convertation.concat_salary", rows,
+                           lambda: currency_convertation.concat_salary(rows, "vacancies_short.csv"), repeat))
+
+    statistic_inputer = count()
+    statistic_inputer.normalize_statistic()
+    reporter = statistic.Report()
+    reporter.prepare_data(statistic_inputer.years, statistic_inputer.vacancies, statistic_inputer.cities, "Аналитик")
+    results.append(measure("statistic.Report.generate_excel", rows, reporter.generate_excel, repeat))
+    results.append(measure("statistic.Report.generate_image", rows, reporter.generate_image, repeat))
+    return results
+
+
+def run_suite(sizes: list, repeat: int = 3, output: str = "bench_results.json"):
+    """
+    Выполняет замеры для всех размеров входных данных во временной папке и записывает результаты в json
+    :param sizes: list
+        количества вакансий (от 10 тысяч до 10 миллионов)
+    :param repeat: int
+        количество повторов каждого замера
+    :param output: str
+        имя файла с результатами
+    """
+    output = os.path.abspath(output)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            for rows in sizes:
+                results += run_size(rows, repeat)
+        finally:
+            os.chdir(cwd)
+    report = {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "cpu_count": os.cpu_count(),
+              "results": results}
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    run_suite([int(size) for size in sys.argv[1:]] or [10_000])
@@ -0,0 +1,137 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# столбцы со словарным кодированием: в файле хранятся коды int32 (<столбец>_codes) и словарь (<столбец>_values)
+dictionary_columns = ("name", "area_name", "salary_currency")
+
+# типизированные столбцы
+typed_columns = {
+    "salary_from": np.float64,
+    "salary_to": np.float64,
+    "salary": np.float64,
+    "published_day": np.int32,
+    "published_ts": np.int64,
+}
+
+columns = dictionary_columns + tuple(typed_columns)
+
+
+def encode_frame(df: pd.DataFrame):
+    """
+    Приводит вакансии сокращенного формата к массивам столбцов
+    :param df: pandas.DataFrame
+        вакансии со столбцами name, salary_from, salary_to, salary_currency, area_name, published_at
+    :return: dict
+        имя массива -> numpy массив
+    """
+    arrays = {}
+    for column in dictionary_columns:
+        codes, values = pd.factorize(df[column].fillna(""))
+        arrays[f"{column}_codes"] = codes.astype(np.int32)
+        arrays[f"{column}_values"] = np.asarray(values, dtype=str)
+    published = pd.to_datetime(df["published_at"], utc=True, format="ISO8601")
+    local_day = pd.to_datetime(df["published_at"].str[:10])
+    arrays["salary_from"] = df["salary_from"]
+    arrays["salary_to"] = df["salary_to"]
+    arrays["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+    arrays["published_day"] = (local_day - pd.Timestamp(1970, 1, 1)).dt.days
+    arrays["published_ts"] = (published - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    for column, dtype in typed_columns.items():
+        arrays[column] = arrays[column].to_numpy(dtype)
+    return arrays
+
+
+def write_dataset(df: pd.DataFrame, root: str = "Columns", by_month: bool = False):
+    """
+    Записывает вакансии в колоночный формат, разбитый на части по годам (или по месяцам) публикации
+    :param df: pandas.DataFrame
+        вакансии сокращенного формата
+    :param root: str
+        папка набора
+    :param by_month: bool
+        разбивать ли части по месяцам
+    :return: list
+        описания записанных частей
+    """
+    os.makedirs(root, exist_ok=True)
+    keys = df["published_at"].str[:7] if by_month else df["published_at"].str[:4]
+    partitions = []
+    for key, data in df.groupby(keys, sort=True):
+        file_name = f"{key}.npz"
+        np.savez(os.path.join(root, file_name), **encode_frame(data))
+        partitions.append({"file": file_name, "year": int(key[:4]), "month": int(key[5:7]) if by_month else None,
+                           "rows": len(data)})
+    with open(os.path.join(root, "meta.json"), "w", encoding="utf-8") as file:
+        json.dump({"columns": columns, "by_month": by_month, "partitions": partitions}, file, indent=4)
+    return partitions
+
+
+class ColumnarDataset:
+    """
+    Чтение набора вакансий в колоночном формате: читаются только нужные столбцы и только части из нужного диапазона лет
+
+    Attributes
+    ----------
+    root: str
+        папка набора
+    partitions: list
+        описания частей: файл, год, месяц (None при разбиении по годам), количество строк
+    """
+    def __init__(self, root: str = "Columns"):
+        """
+        Инициализация объекта
+        :param root: str
+            папка набора, записанного write_dataset
+        """
+        self.root = root
+        with open(os.path.join(root, "meta.json"), encoding="utf-8") as file:
+            self.partitions = json.load(file)["partitions"]
+
+    def get_files_by_year(self, first_year: int = None, last_year: int = None):
+        """
+        Файлы частей по годам, части вне диапазона пропускаются
+        :param first_year: int
+            первый год или None
+        :param last_year: int
+            последний год или None
+        :return: dict
+            год -> список путей к частям
+        """
+        result = {}
+        for partition in self.partitions:
+            year = partition["year"]
+            if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+                result.setdefault(year, []).append(os.path.join(self.root, partition["file"]))
+        return result
+
+    @staticmethod
+    def read_frame(files: list, names: list):
+        """
+        Чтение выбранных столбцов из частей; столбцы со словарным кодированием возвращаются как category
+        :param files: list
+            пути к частям
+        :param names: list
+            имена столбцов
+        :return: pandas.DataFrame
+            столбцы всех частей подряд
+        """
+        frames = []
+        for file_name in files:
+            with np.load(file_name) as data:
+                frame = {}
+                for name in names:
+                    if name in dictionary_columns:
+                        frame[name] = pd.Categorical.from_codes(data[f"{name}_codes"], data[f"{name}_values"])
+                    else:
+                        frame[name] = data[name]
+                frames.append(pd.DataFrame(frame))
+        if len(frames) == 0:
+            return pd.DataFrame({name: [] for name in names})
+        for name in names:
+            if name in dictionary_columns and len(frames) > 1:
+                union = pd.api.types.union_categoricals([frame[name] for frame in frames])
+                for frame in frames:
+                    frame[name] = frame[name].cat.set_categories(union.categories)
+        return pd.concat(frames, ignore_index=True)
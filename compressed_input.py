@@ -0,0 +1,186 @@
+import io
+import os
+import shutil
+import tempfile
+import subprocess
+
+# сигнатуры сжатых форматов в начале файла
+magic_numbers = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+# внешние программы распаковки в stdout, в порядке предпочтения; pigz, lbzip2, pbzip2 и xz -T0
+# распаковывают в несколько потоков
+decompress_commands = {
+    "gzip": (["pigz", "-dc"], ["gzip", "-dc"]),
+    "bz2": (["lbzip2", "-dc"], ["pbzip2", "-dc"], ["bzip2", "-dc"]),
+    "xz": (["xz", "-dc", "-T0"],),
+    "zstd": (["zstd", "-dcq"],),
+}
+
+# расширения сжатых csv файлов
+compressed_extensions = (".csv.gz", ".csv.bz2", ".csv.xz", ".csv.zst")
+
+
+def detect_compression(file_name: str):
+    """
+    Формат сжатия файла по первым байтам
+    :param file_name: str
+        имя файла
+    :return: str
+        gzip, bz2, xz, zstd или None для несжатого файла
+    """
+    with open(file_name, "rb") as file:
+        head = file.read(6)
+    for compression, magic in magic_numbers.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class ProcessReader(io.RawIOBase):
+    """
+    Поток stdout внешней программы распаковки; при закрытии дожидается программы и проверяет код возврата.
+    stderr пишется во временный файл, а не в канал: канал, который читается только после конца stdout,
+    заполнился бы предупреждениями программы и остановил бы ее
+
+    Attributes
+    ----------
+    process: subprocess.Popen
+        программа распаковки
+    errors: tempfile.TemporaryFile
+        вывод stderr программы
+    finished: bool
+        прочитан ли поток до конца
+    """
+    def __init__(self, command: list, file_name: str):
+        """
+        Инициализация объекта, запускает программу
+        :param command: list
+            команда распаковки в stdout
+        :param file_name: str
+            сжатый файл
+        """
+        super().__init__()
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command + [file_name], stdout=subprocess.PIPE, stderr=self.errors)
+        self.finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = self.process.stdout.readinto(buffer)
+        if size == 0:
+            self.finished = True
+        return size
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        if not self.finished:
+            # чтение прервано раньше конца файла, программа больше не нужна
+            self.process.kill()
+        self.process.stdout.close()
+        code = self.process.wait()
+        self.errors.seek(0)
+        error = self.errors.read()
+        self.errors.close()
+        if code != 0 and self.finished:
+            raise OSError(f"Ошибка распаковки: {error.decode(errors='replace').strip()}")
+
+
+def get_command(compression: str):
+    """
+    Первая установленная программа распаковки формата
+    :param compression: str
+        формат сжатия
+    :return: list
+        команда или None, если ни одной программы нет
+    """
+    for command in decompress_commands[compression]:
+        if shutil.which(command[0]) is not None:
+            return command
+    return None
+
+
+def open_module(file_name: str, compression: str):
+    """
+    Распаковка средствами стандартной библиотеки в одном потоке
+    :param file_name: str
+        сжатый файл
+    :param compression: str
+        формат сжатия
+    :return: io.BufferedIOBase
+        поток распакованных байт
+    """
+    if compression == "gzip":
+        import gzip
+        return gzip.open(file_name, "rb")
+    if compression == "bz2":
+        import bz2
+        return bz2.open(file_name, "rb")
+    if compression == "xz":
+        import lzma
+        return lzma.open(file_name, "rb")
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard
+        except ImportError:
+            raise OSError("Для чтения zstd нужна программа zstd или пакет zstandard")
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(file_name, "rb"), closefd=True))
+    return zstd.open(file_name, "rb")
+
+
+def open_binary(file_name: str, use_tools: bool = True):
+    """
+    Открывает файл для чтения байт, сжатый файл распаковывается на лету без временной копии на диске
+    :param file_name: str
+        имя файла, сжатого или нет
+    :param use_tools: bool
+        распаковывать ли внешней программой (в отдельном процессе, для pigz, lbzip2 и xz - в несколько потоков),
+        если она установлена
+    :return: io.BufferedIOBase
+        поток байт
+    """
+    compression = detect_compression(file_name)
+    if compression is None:
+        return open(file_name, "rb")
+    command = get_command(compression) if use_tools else None
+    if command is not None:
+        return io.BufferedReader(ProcessReader(command, file_name), buffer_size=1 << 20)
+    return open_module(file_name, compression)
+
+
+def open_input(file_name: str, encoding: str = "utf-8-sig", newline: str = None, use_tools: bool = True):
+    """
+    Открывает файл, сжатый или нет, для чтения текста
+    :param file_name: str
+        имя файла
+    :param encoding: str
+        кодировка
+    :param newline: str
+        обработка переводов строк, как у open
+    :param use_tools: bool
+        распаковывать ли внешней программой, если она установлена
+    :return: io.TextIOWrapper
+        текстовый поток
+    """
+    return io.TextIOWrapper(open_binary(file_name, use_tools), encoding=encoding, newline=newline)
+
+
+def is_compressed(file_name: str):
+    """
+    Проверяет, сжат ли файл
+    :param file_name: str
+        имя файла
+    :return: bool
+        True для файлов gzip, bz2, xz и zstd
+    """
+    return os.path.isfile(file_name) and detect_compression(file_name) is not None
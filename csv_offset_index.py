@@ -0,0 +1,236 @@
+import io
+import os
+import csv
+import json
+import mmap
+import pandas as pd
+from compressed_input import is_compressed
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Поток, читающий по порядку байтовые диапазоны отображенного в память файла без копирования их на диск
+
+    Attributes
+    ----------
+    data: mmap.mmap
+        отображенный файл
+    ranges: list
+        диапазоны [начало, конец)
+    index: int
+        номер текущего диапазона
+    offset: int
+        количество прочитанных байт текущего диапазона
+    """
+    def __init__(self, data, ranges: list):
+        """
+        Инициализация объекта
+        :param data: mmap.mmap
+            отображенный файл
+        :param ranges: list
+            диапазоны [начало, конец)
+        """
+        super().__init__()
+        self.data = data
+        self.ranges = ranges
+        self.index = 0
+        self.offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self.index < len(self.ranges):
+            start, end = self.ranges[self.index]
+            position = start + self.offset
+            if position < end:
+                size = min(len(buffer), end - position)
+                buffer[:size] = self.data[position:position + size]
+                self.offset += size
+                return size
+            self.index += 1
+            self.offset = 0
+        return 0
+
+
+class OffsetIndex:
+    """
+    Индекс байтовых диапазонов записей исходного csv по году (или месяцу) публикации, хранится рядом с файлом
+
+    Записи с одинаковым ключом, идущие подряд, объединяются в один диапазон; переводы строк внутри кавычек
+    не считаются концом записи
+
+    Attributes
+    ----------
+    file_name: str
+        исходный csv файл
+    by_month: bool
+        ключ - месяц (yyyy-mm), иначе год (yyyy)
+    fingerprint: list
+        размер и время изменения файла, для которых построен индекс
+    header: list
+        байтовый диапазон строки заголовка
+    ranges: dict
+        ключ -> список диапазонов [начало, конец)
+    """
+    def __init__(self, file_name: str, by_month: bool = False):
+        """
+        Инициализация объекта
+        :param file_name: str
+            исходный csv файл
+        :param by_month: bool
+            строить ли индекс по месяцам
+        """
+        self.file_name = file_name
+        self.by_month = by_month
+        self.fingerprint = None
+        self.header = [0, 0]
+        self.ranges = {}
+
+    @staticmethod
+    def get_index_name(file_name: str):
+        """
+        Имя файла индекса
+        :param file_name: str
+            исходный csv файл
+        :return: str
+            <файл>.offsets.json
+        """
+        return file_name + ".offsets.json"
+
+    def get_fingerprint(self):
+        """
+        Отпечаток текущей версии исходного файла
+        :return: list
+            размер и время изменения в наносекундах
+        """
+        stat = os.stat(self.file_name)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def get_key(self, record: bytes, column: int, is_last: bool):
+        """
+        Ключ записи по дате публикации
+        :param record: bytes
+            запись csv
+        :param column: int
+            номер столбца published_at
+        :param is_last: bool
+            последний ли это столбец (тогда запись не разбирается целиком)
+        :return: str
+            год или месяц публикации
+        """
+        text = record.decode("utf-8").rstrip("\r\n")
+        value = text.rsplit(",", 1)[-1] if is_last else next(csv.reader([text]))[column]
+        value = value.strip('"')
+        return value[:7] if self.by_month else value[:4]
+
+    def build(self):
+        """
+        Построение индекса одним последовательным проходом по файлу
+        """
+        self.fingerprint = self.get_fingerprint()
+        self.ranges = {}
+        with open(self.file_name, "rb") as file:
+            header = file.readline()
+            self.header = [0, len(header)]
+            columns = next(csv.reader([header.decode("utf-8-sig")]))
+            column = columns.index("published_at")
+            is_last = column == len(columns) - 1
+            position = start = run_start = len(header)
+            record, quotes, current_key = [], 0, None
+            for line in file:
+                record.append(line)
+                quotes += line.count(b'"')
+                position += len(line)
+                if quotes % 2 != 0:
+                    continue
+                data = b"".join(record)
+                if data.strip() != b"":
+                    key = self.get_key(data, column, is_last)
+                    if key != current_key:
+                        if current_key is not None:
+                            self.ranges.setdefault(current_key, []).append([run_start, start])
+                        current_key, run_start = key, start
+                record, quotes, start = [], 0, position
+            if current_key is not None:
+                self.ranges.setdefault(current_key, []).append([run_start, position])
+
+    def save(self):
+        """
+        Запись индекса рядом с исходным файлом
+        """
+        with open(self.get_index_name(self.file_name), "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": self.fingerprint, "by_month": self.by_month, "header": self.header,
+                       "ranges": self.ranges}, file)
+
+    @staticmethod
+    def load_or_build(file_name: str, by_month: bool = False):
+        """
+        Загружает индекс, если он построен для текущей версии файла, иначе строит и сохраняет новый
+        :param file_name: str
+            исходный csv файл
+        :param by_month: bool
+            индекс по месяцам
+        :return: OffsetIndex
+            индекс
+        """
+        if is_compressed(file_name):
+            raise ValueError(f"{file_name}: индекс смещений строится только по несжатому файлу")
+        index = OffsetIndex(file_name, by_month)
+        index_name = OffsetIndex.get_index_name(file_name)
+        if os.path.exists(index_name):
+            with open(index_name, encoding="utf-8") as file:
+                data = json.load(file)
+            if data["fingerprint"] == index.get_fingerprint() and data["by_month"] == by_month:
+                index.fingerprint, index.header, index.ranges = data["fingerprint"], data["header"], data["ranges"]
+                return index
+        index.build()
+        index.save()
+        return index
+
+    def get_ranges_by_year(self, first_year: int = None, last_year: int = None):
+        """
+        Диапазоны записей по годам, годы вне диапазона пропускаются
+        :param first_year: int
+            первый год или None
+        :param last_year: int
+            последний год или None
+        :return: dict
+            год -> список диапазонов [начало, конец) в порядке файла
+        """
+        result = {}
+        for key in sorted(self.ranges):
+            year = int(key[:4])
+            if (first_year is None or year >= first_year) and (last_year is None or year <= last_year):
+                result.setdefault(year, []).extend(self.ranges[key])
+        for ranges in result.values():
+            ranges.sort()
+        return result
+
+    def read_frame(self, ranges: list, names: list):
+        """
+        Чтение выбранных столбцов из диапазонов записей через mmap; salary и published_day вычисляются
+        так же, как в columnar_dataset
+        :param ranges: list
+            диапазоны [начало, конец)
+        :param names: list
+            имена столбцов
+        :return: pandas.DataFrame
+            столбцы записей из диапазонов
+        """
+        usecols = set()
+        for name in names:
+            if name == "salary":
+                usecols.update(("salary_from", "salary_to"))
+            elif name == "published_day":
+                usecols.add("published_at")
+            else:
+                usecols.add(name)
+        with open(self.file_name, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            reader = io.BufferedReader(RangeReader(data, [self.header] + ranges))
+            df = pd.read_csv(reader, usecols=list(usecols), encoding="utf-8-sig")
+        if "salary" in names:
+            df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+        if "published_day" in names:
+            df["published_day"] = (pd.to_datetime(df["published_at"].str[:10]) - pd.Timestamp(1970, 1, 1)).dt.days
+        return df[names]
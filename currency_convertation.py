@@ -1,15 +1,24 @@
 import csv
 import pandas as pd
+from compressed_input import open_input
 
 
-def concat_salary(vacancies_count, file="Data\\vacancies_dif_currencies.csv"):
+def concat_salary(vacancies_count, file="Data\\vacancies_dif_currencies.csv", store_file=None):
     """
     Создает csv файл с объединенными полями salary_from, salary_to
     :param vacancies_count: str
     :param file: str
+        csv файл, сжатый или нет
+    :param store_file: str
+        если задан, вакансии также записываются в хранилище vacancy_store пачками в транзакциях
     """
     currency_rates = pd.read_csv("currencies.csv")
-    with open(file, "r", encoding="utf_8_sig") as file_read:
+    store = None
+    batch = []
+    if store_file is not None:
+        from vacancy_store import VacancyStore
+        store = VacancyStore(store_file)
+    with open_input(file, encoding="utf_8_sig") as file_read:
         with open("processed_vacancies.csv", "w", encoding="utf_8", newline='') as file_write:
             reader = csv.reader(file_read)
             writer = csv.writer(file_write)
@@ -18,8 +27,16 @@ def concat_salary(vacancies_count, file="Data\\vacancies_dif_currencies.csv"):
             for i, x in enumerate(reader):
                 salary = get_salary(x[1], x[2], x[3], x[5], currency_rates)
                 writer.writerow([x[0], salary, x[4], x[5]])
+                if store is not None:
+                    batch.append({"name": x[0], "salary": salary, "area_name": x[4], "published_at": x[5]})
+                    if len(batch) >= store.batch_size:
+                        store.insert_rows(batch, "concat_salary")
+                        batch = []
                 if i == vacancies_count - 1:
                     break
+    if store is not None:
+        store.insert_rows(batch, "concat_salary")
+        store.close()
 
             
 def get_salary(salary_from, salary_to, currency, date, currency_rates):
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+epoch_ordinal = date(1970, 1, 1).toordinal()
+
+
+def parse_day(value: str):
+    """
+    Номер дня публикации по срезам фиксированной ширины строки ISO (2022-06-21T10:30:57+0300)
+    :param value: str
+        дата публикации
+    :return: int
+        количество дней с 01.01.1970 по местной дате публикации
+    """
+    return date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal() - epoch_ordinal
+
+
+def parse_timestamp(value: str):
+    """
+    Время публикации в секундах unix по срезам фиксированной ширины строки ISO (2022-06-21T10:30:57+0300)
+    :param value: str
+        дата публикации
+    :return: int
+        количество секунд с 01.01.1970 UTC
+    """
+    seconds = parse_day(value) * 86400 + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+    if len(value) >= 24:
+        offset = int(value[20:22]) * 3600 + int(value[22:24]) * 60
+        seconds -= -offset if value[19] == '-' else offset
+    return seconds
+
+
+def parse_days(values: list):
+    """
+    Номера дней публикации для столбца строк ISO одним разбором numpy
+    :param values: list
+        даты публикации
+    :return: list
+        количество дней с 01.01.1970 по местной дате публикации для каждой строки
+    """
+    import numpy as np
+
+    # преобразование к U10 оставляет дату yyyy-mm-dd
+    return np.array(values, dtype="U10").astype("datetime64[D]").astype(np.int64).tolist()
+
+
+def parse_timestamps(values: list):
+    """
+    Время публикации в секундах unix для столбца строк ISO одним разбором numpy, как parse_timestamp
+    :param values: list
+        даты публикации
+    :return: list
+        количество секунд с 01.01.1970 UTC для каждой строки
+    """
+    import numpy as np
+
+    stamps = np.array(values, dtype="U24")
+    seconds = stamps.astype("U19").astype("datetime64[s]").astype(np.int64)
+    # коды символов: знак смещения на позиции 19, часы и минуты смещения на 20-23
+    codes = stamps.view(np.uint32).reshape(len(stamps), 24).astype(np.int64)
+    digits = codes[:, 20:24] - ord("0")
+    offset = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 2] * 10 + digits[:, 3]) * 60
+    offset = np.where(codes[:, 19] == ord("-"), -offset, offset)
+    return (seconds - np.where(codes[:, 23] != 0, offset, 0)).tolist()
+
+
+def parse_input_day(value: str):
+    """
+    Номер дня для даты, введенной пользователем в формате dd.mm.yyyy
+    :param value: str
+        дата
+    :return: int
+        количество дней с 01.01.1970
+    """
+    day, month, year = value.strip().split('.')
+    return date(int(year), int(month), int(day)).toordinal() - epoch_ordinal
+
+
+class DateIndex:
+    """
+    Отсортированный индекс номеров строк по дню публикации для поиска диапазона дат двоичным поиском
+
+    Attributes
+    ----------
+    days: array
+        дни публикации в порядке возрастания
+    ids: array
+        номера строк в том же порядке
+    """
+    def __init__(self, days):
+        """
+        Инициализация объекта
+        :param days: list
+            день публикации для каждой строки набора
+        """
+        order = sorted(range(len(days)), key=days.__getitem__)
+        self.days = array('l', (days[i] for i in order))
+        self.ids = array('l', order)
+
+    def find(self, first_day: int, last_day: int):
+        """
+        Номера строк, опубликованных в диапазоне дней включительно
+        :param first_day: int
+            первый день
+        :param last_day: int
+            последний день
+        :return: list
+            номера строк в порядке возрастания
+        """
+        start = bisect_left(self.days, first_day)
+        end = bisect_right(self.days, last_day)
+        return sorted(self.ids[start:end])
@@ -0,0 +1,319 @@
+import os
+import sys
+import time
+import queue
+import socket
+import secrets
+import threading
+import traceback
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+
+# адреса, на которых координатор без заданного ключа создает случайный
+loopback_hosts = ("localhost", "127.0.0.1", "::1")
+
+
+def get_authkey(authkey: bytes = None):
+    """
+    Ключ проверки подключений; задачи и результаты передаются через pickle, поэтому ключа по умолчанию нет
+    :param authkey: bytes
+        ключ или None
+    :return: bytes
+        authkey, иначе значение HH_AUTHKEY, иначе None
+    """
+    if authkey is not None:
+        return authkey
+    return os.environ["HH_AUTHKEY"].encode("utf-8") if os.environ.get("HH_AUTHKEY") else None
+
+
+class Coordinator:
+    """
+    Координатор распределенного map-reduce: принимает подключения обработчиков по TCP и раздает им задачи
+    (функция, аргументы); функция с аргументами и результат передаются через pickle, поэтому данные
+    (колоночный набор или исходный csv) должны быть доступны обработчикам по тем же путям
+
+    Задача, обработчик которой отключился, не ответил за task_timeout или завершился с ошибкой, снова ставится
+    в очередь и достается другому (или тому же) обработчику, но не больше max_retries раз. Если задачи ждут,
+    а подключенных обработчиков нет дольше worker_timeout секунд, run завершается с ошибкой
+
+    Без ключа (аргумента или HH_AUTHKEY) координатор принимает подключения только на локальном адресе
+    со случайным ключом, который выводится для запуска обработчиков
+
+    Attributes
+    ----------
+    listener: multiprocessing.connection.Listener
+        сокет приема подключений
+    address: tuple
+        фактический адрес (хост, порт) координатора
+    authkey: bytes
+        ключ проверки подключений
+    task_timeout: float
+        время ожидания результата одной задачи в секундах, None - без ограничения
+    max_retries: int
+        количество повторов одной задачи
+    worker_timeout: float
+        сколько секунд задачи могут ждать без подключенных обработчиков
+    local_workers: list
+        процессы обработчиков, запущенные на этой машине
+    """
+    def __init__(self, address: tuple = ("localhost", 0), authkey: bytes = None, task_timeout: float = None,
+                 max_retries: int = 3, worker_timeout: float = 30):
+        """
+        Инициализация объекта, открывает сокет
+        :param address: tuple
+            (хост, порт), порт 0 - любой свободный
+        :param authkey: bytes
+            ключ проверки подключений, по умолчанию get_authkey(); без него адрес должен быть локальным
+        :param task_timeout: float
+            время ожидания результата одной задачи в секундах
+        :param max_retries: int
+            количество повторов одной задачи
+        :param worker_timeout: float
+            сколько секунд задачи могут ждать без подключенных обработчиков
+        """
+        self.authkey = get_authkey(authkey)
+        if self.authkey is None:
+            if address[0] not in loopback_hosts:
+                raise ValueError(f"Для адреса {address[0]} нужен ключ HH_AUTHKEY")
+            self.authkey = secrets.token_hex(16).encode("ascii")
+            print(f"Ключ обработчиков: HH_AUTHKEY={self.authkey.decode('ascii')}")
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.worker_timeout = worker_timeout
+        self.connected = 0
+        self.idle_since = time.monotonic()
+        self.local_workers = []
+        self.tasks = []
+        self.pending = queue.Queue()
+        self.results = []
+        self.attempts = []
+        self.remaining = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def start_local_workers(self, count: int):
+        """
+        Запуск обработчиков в отдельных процессах этой машины
+        :param count: int
+            количество обработчиков
+        """
+        for _ in range(count):
+            process = multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+            process.start()
+            self.local_workers.append(process)
+
+    def run(self, tasks: list, timeout: float = None):
+        """
+        Выполнение задач на подключенных обработчиках; ждет, пока подключится хотя бы один, но не дольше
+        worker_timeout
+        :param tasks: list
+            задачи (функция, аргументы)
+        :param timeout: float
+            общее время выполнения задач в секундах, None - без ограничения
+        :return: list
+            результаты в порядке задач
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.tasks = tasks
+        self.results = [None] * len(tasks)
+        self.attempts = [0] * len(tasks)
+        self.remaining = len(tasks)
+        self.error = None
+        self.done.clear()
+        for index in range(len(tasks)):
+            self.pending.put(index)
+        if len(tasks) == 0:
+            return []
+        with self.lock:
+            self.idle_since = time.monotonic()
+        acceptor = threading.Thread(target=self.accept, daemon=True)
+        acceptor.start()
+        while not self.done.wait(0.1):
+            with self.lock:
+                if deadline is not None and time.monotonic() > deadline:
+                    self.error = f"Задачи не выполнены за {timeout} с"
+                elif self.connected == 0 and time.monotonic() - self.idle_since > self.worker_timeout:
+                    self.error = f"Нет подключенных обработчиков дольше {self.worker_timeout} с"
+                if self.error is not None:
+                    self.done.set()
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.results
+
+    def accept(self):
+        """
+        Прием подключений обработчиков, для каждого запускается поток раздачи задач
+        """
+        while not self.done.is_set():
+            try:
+                connection = self.listener.accept()
+            except Exception:
+                # закрытый сокет или подключение, не прошедшее проверку ключа
+                if self.done.is_set():
+                    return
+                continue
+            if self.done.is_set():
+                # обработчик подключился, когда задачи уже закончились
+                try:
+                    connection.send(("stop",))
+                except (OSError, EOFError):
+                    pass
+                connection.close()
+                return
+            threading.Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection):
+        """
+        Раздача задач одному обработчику, пока они не закончатся или обработчик не пропадет
+        :param connection: multiprocessing.connection.Connection
+            подключение обработчика
+        """
+        with self.lock:
+            self.connected += 1
+        try:
+            while not self.done.is_set():
+                try:
+                    index = self.pending.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                function, args = self.tasks[index]
+                try:
+                    connection.send(("task", index, function, args))
+                    if not connection.poll(self.task_timeout):
+                        raise TimeoutError(f"нет результата за {self.task_timeout} с")
+                    status, value = connection.recv()
+                except (OSError, EOFError, TimeoutError) as error:
+                    self.retry(index, f"обработчик недоступен ({error!r})")
+                    return
+                if status == "error":
+                    self.retry(index, value)
+                else:
+                    self.finish(index, value)
+        finally:
+            with self.lock:
+                self.connected -= 1
+                if self.connected == 0:
+                    self.idle_since = time.monotonic()
+            try:
+                connection.send(("stop",))
+            except (OSError, EOFError):
+                pass
+            connection.close()
+
+    def retry(self, index: int, reason: str):
+        """
+        Возвращает задачу в очередь или завершает работу с ошибкой, если повторы исчерпаны
+        :param index: int
+            номер задачи
+        :param reason: str
+            причина повтора
+        """
+        with self.lock:
+            self.attempts[index] += 1
+            if self.attempts[index] > self.max_retries:
+                self.error = f"Задача {index} не выполнена за {self.max_retries + 1} попыток: {reason}"
+                self.done.set()
+            else:
+                self.pending.put(index)
+
+    def finish(self, index: int, result):
+        """
+        Сохраняет результат задачи
+        :param index: int
+            номер задачи
+        :param result: object
+            результат
+        """
+        with self.lock:
+            self.results[index] = result
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.done.set()
+
+    def close(self):
+        """
+        Закрывает сокет и останавливает локальных обработчиков (не успевшие подключиться ждали бы координатора
+        connect_timeout секунд)
+        """
+        self.done.set()
+        try:
+            # пробуждает поток, ожидающий подключения
+            socket.create_connection(self.address, timeout=1).close()
+        except OSError:
+            pass
+        self.listener.close()
+        for process in self.local_workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+
+def run_worker(address: tuple, authkey: bytes = None, persistent: bool = False, connect_timeout: float = 30):
+    """
+    Обработчик: подключается к координатору, выполняет полученные задачи и отправляет результаты
+    :param address: tuple
+        (хост, порт) координатора
+    :param authkey: bytes
+        ключ проверки подключений, по умолчанию get_authkey(); обязателен
+    :param persistent: bool
+        после завершения работы координатора ждать следующего (для постоянно запущенных обработчиков)
+    :param connect_timeout: float
+        сколько секунд пытаться подключиться, если координатор еще не запущен
+    :return: int
+        количество выполненных задач
+    """
+    authkey = get_authkey(authkey)
+    if authkey is None:
+        raise ValueError("Не задан ключ HH_AUTHKEY")
+    count = 0
+    while True:
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                connection = Client(address, authkey=authkey)
+                break
+            except OSError:
+                if not persistent and time.monotonic() > deadline:
+                    return count
+                time.sleep(0.5)
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (OSError, EOFError):
+                    break
+                except Exception:
+                    connection.send(("error", traceback.format_exc()))
+                    continue
+                if message[0] == "stop":
+                    break
+                _, index, function, args = message
+                try:
+                    result = ("result", function(*args))
+                    count += 1
+                except Exception:
+                    result = ("error", traceback.format_exc())
+                try:
+                    connection.send(result)
+                except (OSError, EOFError):
+                    break
+        if not persistent:
+            return count
+
+
+if __name__ == '__main__':
+    # python distributed.py host:port - постоянно запущенный обработчик
+    host, port = sys.argv[1].rsplit(":", 1)
+    if get_authkey() is None:
+        print("Не задан ключ HH_AUTHKEY")
+        exit()
+    run_worker((host, int(port)), persistent=True)
@@ -0,0 +1,143 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Border, Side
+from openpyxl.utils import get_column_letter
+
+thin = Side(border_style="thin", color="000000")
+thin_border = Border(top=thin, left=thin, right=thin, bottom=thin)
+bold_font = Font(bold=True)
+
+
+def as_text(value):
+    """
+    Приведение значения ячейки к строке для расчета ширины столбца
+    :param value: object
+        значение ячейки
+    :return: str
+        строковое представление
+    """
+    if value is None:
+        return ""
+    return str(value)
+
+
+class SheetWriter:
+    """
+    Потоковая запись строк в лист книги, открытой только для записи
+
+    Ширина столбцов считается по мере поступления первых width_sample строк, которые держатся в буфере;
+    после этого ширина фиксируется, а остальные строки сразу пишутся в файл
+
+    Attributes
+    ----------
+    sheet: WriteOnlyWorksheet
+        лист книги
+    number_formats: dict
+        форматы чисел по номеру столбца
+    width_sample: int
+        количество строк, по которым считается ширина столбцов
+    widths: list
+        текущая ширина столбцов
+    buffer: list
+        строки, еще не записанные в лист
+    """
+    def __init__(self, workbook: Workbook, title: str, header: list, number_formats: dict = None,
+                 width_sample: int = 1000):
+        """
+        Инициализация объекта
+        :param workbook: Workbook
+            книга, открытая только для записи
+        :param title: str
+            название листа
+        :param header: list
+            заголовки столбцов
+        :param number_formats: dict
+            форматы чисел по номеру столбца
+        :param width_sample: int
+            количество строк, по которым считается ширина столбцов
+        """
+        self.sheet = workbook.create_sheet(title)
+        self.number_formats = number_formats or {}
+        self.width_sample = width_sample
+        self.widths = [0] * len(header)
+        self.buffer = []
+        self.append(header, header=True)
+
+    def make_cell(self, value, column: int, header: bool):
+        """
+        Создание ячейки с общими стилями
+        :param value: object
+            значение ячейки
+        :param column: int
+            номер столбца
+        :param header: bool
+            ячейка заголовка
+        :return: WriteOnlyCell | None
+            ячейка или None для пустого значения
+        """
+        cell = WriteOnlyCell(self.sheet, value)
+        if header:
+            cell.font = bold_font
+        if value is None:
+            return cell if header else None
+        cell.border = thin_border
+        if not header and column in self.number_formats:
+            cell.number_format = self.number_formats[column]
+        return cell
+
+    def append(self, row: list, header: bool = False):
+        """
+        Добавление строки
+        :param row: list
+            значения строки
+        :param header: bool
+            строка заголовка
+        """
+        cells = [self.make_cell(value, column, header) for column, value in enumerate(row)]
+        if self.buffer is None:
+            self.sheet.append(cells)
+            return
+        for column, value in enumerate(row):
+            self.widths[column] = max(self.widths[column], len(as_text(value)))
+        self.buffer.append(cells)
+        if len(self.buffer) > self.width_sample:
+            self.flush()
+
+    def flush(self):
+        """
+        Фиксирует ширину столбцов и записывает накопленные строки
+        """
+        for column, width in enumerate(self.widths):
+            self.sheet.column_dimensions[get_column_letter(column + 1)].width = width + 2
+        for cells in self.buffer:
+            self.sheet.append(cells)
+        self.buffer = None
+
+    def close(self):
+        """
+        Завершение записи листа
+        """
+        if self.buffer is not None:
+            self.flush()
+
+
+def export_rows(file_name: str, title: str, header: list, rows, number_formats: dict = None):
+    """
+    Потоковая выгрузка строк в файл excel
+    :param file_name: str
+        имя файла
+    :param title: str
+        название листа
+    :param header: list
+        заголовки столбцов
+    :param rows: iterable
+        строки со значениями
+    :param number_formats: dict
+        форматы чисел по номеру столбца
+    """
+    wb = Workbook(write_only=True)
+    writer = SheetWriter(wb, title, header, number_formats)
+    for row in rows:
+        writer.append(row)
+    writer.close()
+    wb.save(file_name)
@@ -18,15 +18,21 @@ def json_convert(json):
         salary_to = json['salary']['to']
         salary_currency = json['salary']['currency']
 
+    # отсутствующая граница записывается пустой, а не строкой None
+    salary_from = None if salary_from is None else str(salary_from)
+    salary_to = None if salary_to is None else str(salary_to)
+
     if json['area'] is not None:
         area_name = json['area']['name']
 
-    return [json['name'], str(salary_from), str(salary_to), salary_currency, area_name, json['published_at']]
+    return [json['name'], salary_from, salary_to, salary_currency, area_name, json['published_at']]
 
 
-def get_vacancies():
+def get_vacancies(store_file: str = None):
     """
     Загружает выкансии с сайта сохраняет их в CSV
+    :param store_file: str
+        если задан, вакансии также записываются в хранилище vacancy_store одной пачкой
     """
     df = pd.DataFrame(columns=['name', 'salary_from', 'salary_to', 'salary_currency', 'area_name', 'published_at'])
     for hour in range(0, 24, 6):
@@ -53,6 +59,11 @@ def get_vacancies():
                 df.loc[len(df.index)] = json_convert(vacancy)
 
     df.to_csv('hh_vacancies.csv', index=False)
+    if store_file is not None:
+        from vacancy_store import VacancyStore
+        store = VacancyStore(store_file)
+        store.insert_rows(df.to_dict("records"), "hh_parser")
+        store.close()
 
 
 get_vacancies()
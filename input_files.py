@@ -0,0 +1,34 @@
+import os
+import glob
+from compressed_input import compressed_extensions
+
+# разделитель имен файлов при вводе списка одной строкой
+list_separator = ";"
+
+
+def resolve_files(spec, extensions: tuple = (".csv",) + compressed_extensions):
+    """
+    Список входных файлов по имени файла, шаблону, папке или списку
+    :param spec: str | list
+        имя файла; шаблон (data/*.csv); папка (берутся файлы с расширениями extensions);
+        несколько из них через ";" или списком
+    :param extensions: tuple
+        расширения файлов, которые берутся из папки
+    :return: list
+        имена файлов в порядке ввода, внутри шаблона и папки - по алфавиту; имя несуществующего файла
+        возвращается как есть, чтобы ошибку выдал читатель
+    """
+    specs = spec if isinstance(spec, (list, tuple)) else spec.split(list_separator)
+    files = []
+    for item in specs:
+        item = item.strip()
+        if item == "":
+            continue
+        if os.path.isdir(item):
+            files += sorted(os.path.join(item, name) for name in os.listdir(item)
+                            if name.lower().endswith(extensions) and os.path.isfile(os.path.join(item, name)))
+        elif glob.has_magic(item):
+            files += sorted(glob.glob(item))
+        else:
+            files.append(item)
+    return files
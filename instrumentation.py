@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def get_peak_rss():
+    """
+    Пиковый объем памяти процесса
+    :return: int | None
+        пиковый объем резидентной памяти в килобайтах или None, если платформа его не сообщает
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class CProfileHook:
+    """
+    Профилирование этапа через cProfile, результат сохраняется в <profile_dir>/<этап>.prof
+
+    Attributes
+    ----------
+    profile_dir: str
+        папка для файлов профиля
+    """
+    def __init__(self, profile_dir: str = '.'):
+        """
+        Инициализация объекта
+        :param profile_dir: str
+            папка для файлов профиля
+        """
+        self.profile_dir = profile_dir
+
+    @contextmanager
+    def __call__(self, name: str):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+
+class Instrumentation:
+    """
+    Замеры по этапам обработки: время, процессорное время, пиковая память и скорость обработки строк
+
+    Выключенный объект ничего не замеряет, поэтому его можно передавать в функции всегда
+
+    Attributes
+    ----------
+    enabled: bool
+        включены ли замеры
+    output: str
+        имя json файла для отчета или None
+    hook: callable
+        профилировщик этапа: функция от имени этапа, возвращающая контекстный менеджер, или None
+    stages: list
+        замеры этапов
+    """
+    def __init__(self, enabled: bool = True, output: str = None, hook=None):
+        """
+        Инициализация объекта
+        :param enabled: bool
+            включены ли замеры
+        :param output: str
+            имя json файла для отчета
+        :param hook: callable
+            профилировщик этапа
+        """
+        self.enabled = enabled
+        self.output = output
+        self.hook = hook
+        self.stages = []
+
+    @staticmethod
+    def from_env():
+        """
+        Создает объект по переменным окружения: HH_INSTRUMENTATION - имя json файла для отчета,
+        HH_PROFILE_DIR - папка для файлов cProfile по этапам
+        :return: Instrumentation
+            включенный объект, если задан HH_INSTRUMENTATION, иначе выключенный
+        """
+        output = os.environ.get("HH_INSTRUMENTATION")
+        profile_dir = os.environ.get("HH_PROFILE_DIR")
+        return Instrumentation(output is not None, output, CProfileHook(profile_dir) if profile_dir else None)
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        """
+        Замер одного этапа
+        :param name: str
+            название этапа
+        :param rows: int
+            количество обработанных строк, можно изменить через возвращаемый словарь
+        :return: dict
+            замер этапа, заполняется после завершения
+        """
+        record = {"stage": name, "rows": rows}
+        if not self.enabled:
+            yield record
+            return
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            if self.hook is not None:
+                with self.hook(name):
+                    yield record
+            else:
+                yield record
+        finally:
+            record["wall_seconds"] = round(time.perf_counter() - start_wall, 6)
+            record["cpu_seconds"] = round(time.process_time() - start_cpu, 6)
+            record["peak_rss_kb"] = get_peak_rss()
+            record["pid"] = os.getpid()
+            if record["rows"] is not None and record["wall_seconds"] > 0:
+                record["rows_per_second"] = round(record["rows"] / record["wall_seconds"])
+            self.stages.append(record)
+
+    def extend(self, stages: list):
+        """
+        Добавляет замеры, сделанные в другом процессе
+        :param stages: list
+            замеры этапов
+        """
+        if self.enabled:
+            self.stages += stages
+
+    def to_json(self):
+        """
+        Отчет по замерам
+        :return: str
+            json с замерами этапов
+        """
+        return json.dumps({"pid": os.getpid(), "stages": self.stages}, ensure_ascii=False, indent=4)
+
+    def save(self):
+        """
+        Записывает отчет в файл output, если замеры включены
+        """
+        if self.enabled and self.output is not None:
+            with open(self.output, "w", encoding="utf-8") as file:
+                file.write(self.to_json())
@@ -1,7 +1,3 @@
-import table
-import statistic
-
-
 def start():
     """
     Запускает процедуру выбора формата данных (таблица вакансий или статистика)
@@ -10,8 +6,10 @@ def start():
     """
     needed_out = input("Требуемый формат данных: ")
     if needed_out == "Вакансии":
+        import table
         table.get_table()
     elif needed_out == "Статистика":
+        import statistic
         statistic.get_statistic()
     else:
         print("Неккоректный ввод")
@@ -1,13 +1,22 @@
 import multiprocessing
 import cProfile
-import os
+import numpy as np
 import pandas as pd
 import vacancies_parsing
 import concurrent.futures as con_fut
+from instrumentation import Instrumentation
+from sketches import QuantileSketch
+from time_buckets import TimeBuckets
+from columnar_dataset import ColumnarDataset
+from csv_offset_index import OffsetIndex
+from distributed import Coordinator
+from shared_columns import SharedArrays, aggregate_slice, exact_quantiles, year_result_columns
+import aggregate_cube
 
 
 class Statistic:
-    def __init__(self, file: str, profession: str):
+    def __init__(self, file: str, profession: str, first_year: int = None, last_year: int = None,
+                 dataset_dir: str = "Columns", source: str = "csv"):
         """
         Инициализация объекта
 
@@ -15,102 +24,363 @@ class Statistic:
             путь к файлу с данными
         :param profession: str
             профессия, по которой будет составляться аналитика
+        :param first_year: int
+            первый год статистики, части набора до него не читаются
+        :param last_year: int
+            последний год статистики, части набора после него не читаются
+        :param dataset_dir: str
+            папка колоночного набора, записанного vacancies_parsing.parse_csv_to_columns
+        :param source: str
+            csv - читать диапазоны записей исходного файла по индексу смещений (строится при первом чтении),
+            columns - читать колоночный набор, записанный заранее
         """
         self.file = file
         self.profession = profession
+        self.first_year = first_year
+        self.last_year = last_year
+        self.dataset_dir = dataset_dir
+        self.source = source
         self.years_salary = {}
         self.years_count = {}
         self.years_salary_vac = {}
         self.years_count_vac = {}
         self.area_salary = {}
         self.area_count = {}
+        self.years_quantiles = {}
+        self.years_quantiles_vac = {}
+        self.area_quantiles = {}
+        self.salary_quantiles = QuantileSketch()
+        self.time_buckets = TimeBuckets()
+        self.time_buckets_vac = TimeBuckets()
 
-    def get_stat(self):
-        self.get_stat_by_year_multi_on()
-        self.get_stat_by_city()
+    def get_stat(self, instrumentation: Instrumentation = None):
+        """
+        Собирает статистику по годам и городам
+        :param instrumentation: Instrumentation
+            замеры этапов, по умолчанию включаются переменной окружения HH_INSTRUMENTATION
+        """
+        instrumentation = instrumentation or Instrumentation.from_env()
+        with instrumentation.stage("get_stat_by_year") as record:
+            self.get_stat_by_year_multi_on()
+            record["rows"] = sum(self.years_count.values())
+        with instrumentation.stage("get_stat_by_city"):
+            self.get_stat_by_city()
+        instrumentation.save()
+
+    def get_parts_by_year(self):
+        """
+        Части данных из диапазона лет: файлы колоночного набора или байтовые диапазоны исходного csv
+        :return: dict
+            год -> список частей
+        """
+        if self.source == "csv":
+            return OffsetIndex.load_or_build(self.file).get_ranges_by_year(self.first_year, self.last_year)
+        return ColumnarDataset(self.dataset_dir).get_files_by_year(self.first_year, self.last_year)
+
+    def read_parts(self, parts: list, names: list):
+        """
+        Чтение выбранных столбцов из частей данных
+        :param parts: list
+            части, полученные get_parts_by_year
+        :param names: list
+            имена столбцов (name, area_name, salary, published_day и др.)
+        :return: pandas.DataFrame
+            столбцы всех частей
+        """
+        if self.source == "csv":
+            return OffsetIndex.load_or_build(self.file).read_frame(parts, names)
+        return ColumnarDataset.read_frame(parts, names)
 
-    def get_stat_by_year(self, file_csv):
+    def get_stat_by_year(self, year: int, parts: list):
         """
-        Сосавляет статистику по году
-        :param file_csv: str
-            файл с данными за год
-        :return: (str, [int, int, int, int])
-            (год, [средняя зп, всего вакансий, средняя зп для профессии, вакансий по профессии])
+        Сосавляет статистику по году, читая из частей данных только столбцы name, salary и published_day
+        :param year: int
+            год
+        :param parts: list
+            части данных за год
+        :return: (str, [int, int, int, int], [QuantileSketch, QuantileSketch], [TimeBuckets, TimeBuckets])
+            (год, [средняя зп, всего вакансий, средняя зп для профессии, вакансий по профессии],
+            [скетч квантилей зп, скетч квантилей зп для профессии], [периоды, периоды для профессии])
         """
 
-        df = pd.read_csv(file_csv)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
-        df["published_at"] = df["published_at"].apply(lambda s: int(s[:4]))
+        df = self.read_parts(parts, ["name", "salary", "published_day"])
         df_vac = df[df["name"].str.contains(self.profession)]
 
-        return df["published_at"].values[0], [int(df["salary"].mean()), len(df),
-                                              int(df_vac["salary"].mean() if len(df_vac) != 0 else 0), len(df_vac)]
+        time_buckets = [TimeBuckets(), TimeBuckets()]
+        time_buckets[0].add_arrays(df["published_day"].values, df["salary"].values)
+        time_buckets[1].add_arrays(df_vac["published_day"].values, df_vac["salary"].values)
+
+        sketches = [QuantileSketch(), QuantileSketch()]
+        for salary in df["salary"].dropna():
+            sketches[0].update(salary)
+        for salary in df_vac["salary"].dropna():
+            sketches[1].update(salary)
+
+        # годы и профессии без зарплат получают 0, как в get_stat_from_cube
+        salary = df["salary"].mean()
+        salary_vac = df_vac["salary"].mean()
+        return year, [int(salary) if salary == salary else 0, len(df),
+                      int(salary_vac) if salary_vac == salary_vac else 0, len(df_vac)], sketches, time_buckets
+
+    def save_year_stat(self, res: list):
+        """
+        Сохраняет статистику по годам, полученную от процессов-обработчиков, и объединяет их скетчи квантилей
+        и периоды
+        :param res: list
+            результаты get_stat_by_year
+        """
+        for year, data_stat, sketches, time_buckets in res:
+            self.years_salary[year] = data_stat[0]
+            self.years_count[year] = data_stat[1]
+            self.years_salary_vac[year] = data_stat[2]
+            self.years_count_vac[year] = data_stat[3]
+            self.years_quantiles[year] = sketches[0].get_quantiles()
+            self.years_quantiles_vac[year] = sketches[1].get_quantiles()
+            self.salary_quantiles.merge(sketches[0])
+            self.time_buckets.merge(time_buckets[0])
+            self.time_buckets_vac.merge(time_buckets[1])
 
     def get_stat_by_city(self):
         """
-        Статистика по городам
+        Статистика по городам, из частей данных читаются только столбцы area_name и salary
         """
-        df = pd.read_csv(self.file)
+        parts = [part for year_parts in self.get_parts_by_year().values() for part in year_parts]
+        df = self.read_parts(parts, ["area_name", "salary"])
+        df["area_name"] = df["area_name"].astype(str)
         total = len(df)
-        df["salary"] = df[["salary_from", "salary_to"]].mean(axis=1)
+        df_all = df
         df["count"] = df.groupby("area_name")["area_name"].transform("count")
         df = df[df["count"] > total * 0.01]
         df = df.groupby("area_name", as_index=False)
         df = df[["salary", "count"]].mean().sort_values("salary", ascending=False)
-        df["salary"] = df["salary"].apply(lambda s: int(s))
+        # города без зарплат не участвуют в уровне зарплат, как в save_city_sums
+        df_salary = df.dropna(subset=["salary"]).head(10)
 
-        self.area_salary = dict(zip(df.head(10)["area_name"], df.head(10)["salary"]))
+        self.area_salary = dict(zip(df_salary["area_name"], df_salary["salary"].apply(lambda s: int(s))))
 
         df = df.sort_values("count", ascending=False)
         df["count"] = round(df["count"] / total, 4)
 
         self.area_count = dict(zip(df.head(10)["area_name"], df.head(10)["count"]))
 
+        sketches = {}
+        for area_name, salary in zip(df_all["area_name"], df_all["salary"]):
+            if area_name in self.area_count and salary == salary:
+                if area_name not in sketches:
+                    sketches[area_name] = QuantileSketch()
+                sketches[area_name].update(salary)
+        self.area_quantiles = {area_name: sketches[area_name].get_quantiles() for area_name in self.area_count
+                               if area_name in sketches}
+
+    def get_stat_from_cube(self, with_sketches: bool = False):
+        """
+        Собирает статистику по годам и городам сложением ячеек куба, построенного один раз для версии файла
+        :param with_sketches: bool
+            хранить ли в кубе скетчи квантилей и заполнять ли по ним перцентили
+        """
+        professions = aggregate_cube.default_professions
+        if self.profession not in professions:
+            professions += (self.profession,)
+        cube = aggregate_cube.load_or_build(self.file, professions, with_sketches)
+        years = dict(first_year=self.first_year, last_year=self.last_year)
+
+        years_vac = cube.query("year", profession=self.profession, **years)
+        for year, (salary_sum, salary_count, count) in cube.query("year", **years).items():
+            salary_sum_vac, salary_count_vac, count_vac = years_vac.get(year, [0, 0, 0])
+            # годы без переводимых зарплат получают 0, как вакансии профессии без зарплат
+            self.years_salary[year] = int(salary_sum / salary_count) if salary_count != 0 else 0
+            self.years_count[year] = count
+            self.years_salary_vac[year] = int(salary_sum_vac / salary_count_vac) if salary_count_vac != 0 else 0
+            self.years_count_vac[year] = count_vac
+            if with_sketches:
+                self.years_quantiles[year] = cube.get_quantiles(first_year=year, last_year=year)
+                self.years_quantiles_vac[year] = cube.get_quantiles(first_year=year, last_year=year,
+                                                                    profession=self.profession)
+
+        self.save_city_sums(cube.query("area_name", **years))
+        if with_sketches:
+            self.area_quantiles = {city: cube.get_quantiles(area_name=city, **years) for city in self.area_count}
+            for sketch, selected in zip(cube.sketches, cube.get_mask(**years)):
+                if selected:
+                    self.salary_quantiles.merge(sketch)
+
+    def save_city_sums(self, cities: dict):
+        """
+        Статистика по городам из сумм: города с долей больше 1%, по 10 с наибольшей зарплатой и долей;
+        города без зарплат не участвуют в уровне зарплат
+        :param cities: dict
+            город -> [сумма зарплат, количество вакансий с зарплатой, количество вакансий]
+        """
+        total = sum(values[2] for values in cities.values())
+        cities = {city: values for city, values in cities.items() if values[2] > total * 0.01}
+        cities_sorted = sorted((city for city in cities if cities[city][1] != 0),
+                               key=lambda x: cities[x][0] / cities[x][1], reverse=True)[:10]
+        self.area_salary = {city: int(cities[city][0] / cities[city][1]) for city in cities_sorted}
+        cities_sorted = sorted(cities, key=lambda x: cities[x][2], reverse=True)[:10]
+        self.area_count = {city: float(np.round(cities[city][2] / total, 4)) for city in cities_sorted}
+
+    def get_city_sums(self, parts: list):
+        """
+        Частичные суммы по городам для части данных, объединяются сложением
+        :param parts: list
+            части данных
+        :return: dict
+            город -> [сумма зарплат, количество вакансий с зарплатой, количество вакансий, скетч квантилей зп]
+        """
+        df = self.read_parts(parts, ["area_name", "salary"])
+        df["area_name"] = df["area_name"].astype(str)
+        result = {}
+        for area_name, salaries in df.groupby("area_name")["salary"]:
+            sketch = QuantileSketch()
+            for salary in salaries.dropna():
+                sketch.update(salary)
+            result[area_name] = [float(salaries.sum()), int(salaries.count()), len(salaries), sketch]
+        return result
+
+    def get_stat_distributed(self, address: tuple = ("localhost", 0), authkey: bytes = None, local_workers: int = 0,
+                             task_timeout: float = None, max_retries: int = 3):
+        """
+        Собирает статистику по годам и городам на обработчиках distributed.run_worker, подключенных по TCP:
+        каждому обработчику по очереди отдаются годы, результаты по годам сохраняются как у multiprocessing,
+        суммы по городам складываются. Задачи - функции get_year_task и get_city_task этого модуля
+        с путями и профессией, поэтому обработчику в другом интерпретаторе достаточно импортировать модуль
+        :param address: tuple
+            (хост, порт) координатора; для обработчиков на других машинах - внешний адрес
+        :param authkey: bytes
+            ключ проверки подключений, по умолчанию из HH_AUTHKEY; без ключа допустим только локальный адрес
+        :param local_workers: int
+            количество обработчиков, запускаемых на этой машине
+        :param task_timeout: float
+            время ожидания результата одной задачи в секундах, после него задача отдается другому обработчику
+        :param max_retries: int
+            количество повторов одной задачи
+        """
+        parts = self.get_parts_by_year()
+        settings = (self.file, self.profession, self.dataset_dir, self.source)
+        tasks = [(get_year_task, settings + (year, year_parts)) for year, year_parts in parts.items()]
+        tasks += [(get_city_task, settings + (year_parts,)) for year_parts in parts.values()]
+        with Coordinator(address, authkey, task_timeout, max_retries) as coordinator:
+            coordinator.start_local_workers(local_workers)
+            res = coordinator.run(tasks)
+
+        self.save_year_stat(res[:len(parts)])
+        cities, sketches = {}, {}
+        for city_sums in res[len(parts):]:
+            for area_name, (salary_sum, salary_count, count, sketch) in city_sums.items():
+                if area_name not in cities:
+                    cities[area_name], sketches[area_name] = [0.0, 0, 0], QuantileSketch()
+                cities[area_name][0] += salary_sum
+                cities[area_name][1] += salary_count
+                cities[area_name][2] += count
+                sketches[area_name].merge(sketch)
+        self.save_city_sums(cities)
+        self.area_quantiles = {area_name: sketches[area_name].get_quantiles() for area_name in self.area_count}
+
+    def get_stat_shared(self, frame: pd.DataFrame = None, workers: int = 4):
+        """
+        Собирает статистику по годам и городам по столбцам, уже загруженным в память: закодированные столбцы
+        копируются в shared_memory один раз, обработчики считают суммы по срезам строк года без копирования
+        и записывают их в общие массивы результатов вместо возврата через pickle. Перцентили считаются точно,
+        общий скетч salary_quantiles не заполняется
+        :param frame: pandas.DataFrame
+            вакансии со столбцами name, area_name, salary, published_day; по умолчанию читаются из частей данных
+        :param workers: int
+            количество процессов-обработчиков
+        """
+        if frame is None:
+            parts = [part for year_parts in self.get_parts_by_year().values() for part in year_parts]
+            frame = self.read_parts(parts, ["name", "area_name", "salary", "published_day"])
+        days = frame["published_day"].to_numpy(np.int64)
+        years = days.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+        if self.first_year is not None or self.last_year is not None:
+            selected = (years >= (self.first_year or years.min(initial=0))) & \
+                       (years <= (self.last_year or years.max(initial=0)))
+            frame, days, years = frame[selected], days[selected], years[selected]
+        order = np.argsort(years, kind="stable")
+        name_codes, names = pd.factorize(frame["name"].astype(str).to_numpy()[order])
+        area_codes, areas = pd.factorize(frame["area_name"].astype(str).to_numpy()[order])
+        days, years = days[order], years[order]
+        first_day = int(days.min(initial=0))
+        year_values, year_starts = np.unique(years, return_index=True)
+        year_stops = np.append(year_starts[1:], len(years))
+
+        arrays = {
+            "name": name_codes.astype(np.int32),
+            "area_name": area_codes.astype(np.int32),
+            "salary": frame["salary"].to_numpy(np.float64)[order],
+            "published_day": days.astype(np.int32),
+            "profession_match": np.array([self.profession in name for name in names], dtype=bool),
+            "year_results": ((len(year_values), len(year_result_columns)), np.float64),
+            "city_results": ((len(year_values), len(areas), 3), np.float64),
+            "day_results": ((len(year_values), 2, int(days.max(initial=first_day)) - first_day + 1, 3), np.float64),
+        }
+        shared = SharedArrays.create(arrays)
+        try:
+            tasks = [(task, int(start), int(stop), shared.specs, first_day)
+                     for task, (start, stop) in enumerate(zip(year_starts, year_stops))]
+            with multiprocessing.Pool(workers) as pool:
+                pool.starmap(aggregate_slice, tasks)
+                pool.close()
+                pool.join()
+
+            for year, row in zip(year_values.tolist(), shared.arrays["year_results"]):
+                result = dict(zip(year_result_columns, row.tolist()))
+                self.years_salary[year] = int(result["salary_sum"] / result["salary_count"]) \
+                    if result["salary_count"] != 0 else 0
+                self.years_count[year] = int(result["count"])
+                self.years_salary_vac[year] = int(result["salary_sum_vac"] / result["salary_count_vac"]) \
+                    if result["salary_count_vac"] != 0 else 0
+                self.years_count_vac[year] = int(result["count_vac"])
+                self.years_quantiles[year] = [int(result[name]) for name in ("p10", "p50", "p90")]
+                self.years_quantiles_vac[year] = [int(result[name]) for name in ("p10_vac", "p50_vac", "p90_vac")]
+
+            cities = shared.arrays["city_results"].sum(axis=0)
+            self.save_city_sums({area_name: [values[0], int(values[1]), int(values[2])]
+                                 for area_name, values in zip(areas, cities.tolist())})
+            area_codes = {area_name: code for code, area_name in enumerate(areas)}
+            for area_name in self.area_count:
+                self.area_quantiles[area_name] = exact_quantiles(
+                    shared.arrays["salary"][shared.arrays["area_name"] == area_codes[area_name]])
+
+            day_sums = shared.arrays["day_results"].sum(axis=0)
+            day_numbers = np.arange(day_sums.shape[1]) + first_day
+            for time_buckets, sums in zip((self.time_buckets, self.time_buckets_vac), day_sums):
+                time_buckets.add_sums(day_numbers, sums[:, 0], sums[:, 1], sums[:, 2].round().astype(np.int64))
+        finally:
+            # обработчики к этому моменту завершены (join или terminate при выходе из with)
+            shared.close()
+            shared.unlink()
+
     def get_stat_by_year_multi_off(self):
         """
         Собирает статистику по годам, без мультипроцессорности
         """
 
-        res = []
-        for csv_file in os.listdir("Csvs"):
-            with open(os.path.join("Csvs", csv_file), "r") as file_csv:
-                res.append(self.get_stat_by_year(file_csv.name))
+        res = [self.get_stat_by_year(year, parts) for year, parts in self.get_parts_by_year().items()]
 
-        for year, data_stat in res:
-            self.years_salary[year] = data_stat[0]
-            self.years_count[year] = data_stat[1]
-            self.years_salary_vac[year] = data_stat[2]
-            self.years_count_vac[year] = data_stat[3]
+        self.save_year_stat(res)
 
     def get_stat_by_year_multi_on(self):
         """
         Собирает статистику по годам, с использованием мультипроцессорности
         """
-        csv_file = [rf"Csvs\{file_name}" for file_name in os.listdir("Csvs")]
+        parts = self.get_parts_by_year()
         pool = multiprocessing.Pool(4)
-        res = pool.starmap(self.get_stat_by_year, [(file,) for file in csv_file])
+        res = pool.starmap(self.get_stat_by_year, parts.items())
         pool.close()
 
-        for year, data_stat in res:
-            self.years_salary[year] = data_stat[0]
-            self.years_count[year] = data_stat[1]
-            self.years_salary_vac[year] = data_stat[2]
-            self.years_count_vac[year] = data_stat[3]
+        self.save_year_stat(res)
 
     def get_stat_by_year_concurrent(self):
         """
         Собирает статистику по годам, с использованием модуля concurrent
         """
-        csv_file = [rf"Csvs\{file_name}" for file_name in os.listdir("Csvs")]
+        parts = self.get_parts_by_year()
         with con_fut.ProcessPoolExecutor(max_workers=4) as executor:
-            res = executor.map(self.get_stat_by_year, csv_file)
+            res = executor.map(self.get_stat_by_year, parts.keys(), parts.values())
         res = list(res)
 
-        for year, data_stat in res:
-            self.years_salary[year] = data_stat[0]
-            self.years_count[year] = data_stat[1]
-            self.years_salary_vac[year] = data_stat[2]
-            self.years_count_vac[year] = data_stat[3]
+        self.save_year_stat(res)
 
     def print_stat(self):
         print(f"Динамика уровня зарплат по годам: {self.years_salary}")
@@ -119,17 +389,67 @@ class Statistic:
         print(f"Динамика количества вакансий по годам для выбранной профессии: {self.years_count_vac}")
         print(f"Уровень зарплат по городам (в порядке убывания): {self.area_salary}")
         print(f"Доля вакансий по городам (в порядке убывания): {self.area_count}")
+        print(f"Перцентили зарплат (p10, p50, p90): {self.salary_quantiles.get_quantiles()}")
+        print(f"Перцентили зарплат (p10, p50, p90) по годам: {self.years_quantiles}")
+        print(f"Перцентили зарплат (p10, p50, p90) по годам для выбранной профессии: {self.years_quantiles_vac}")
+        print(f"Перцентили зарплат (p10, p50, p90) по городам: {self.area_quantiles}")
+        print(f"Динамика по месяцам (средняя зп, количество, скользящие средние): {self.time_buckets.series('month')}")
+        print(f"Динамика по месяцам для выбранной профессии: {self.time_buckets_vac.series('month')}")
+
+
+def get_year_task(file: str, profession: str, dataset_dir: str, source: str, year: int, parts: list):
+    """
+    Задача обработчика distributed: статистика по году
+    :param file: str
+        путь к файлу с данными
+    :param profession: str
+        профессия
+    :param dataset_dir: str
+        папка колоночного набора
+    :param source: str
+        columns или csv
+    :param year: int
+        год
+    :param parts: list
+        части данных за год
+    :return: tuple
+        результат Statistic.get_stat_by_year
+    """
+    return Statistic(file, profession, dataset_dir=dataset_dir, source=source).get_stat_by_year(year, parts)
+
+
+def get_city_task(file: str, profession: str, dataset_dir: str, source: str, parts: list):
+    """
+    Задача обработчика distributed: частичные суммы по городам
+    :param file: str
+        путь к файлу с данными
+    :param profession: str
+        профессия
+    :param dataset_dir: str
+        папка колоночного набора
+    :param source: str
+        columns или csv
+    :param parts: list
+        части данных
+    :return: dict
+        результат Statistic.get_city_sums
+    """
+    return Statistic(file, profession, dataset_dir=dataset_dir, source=source).get_city_sums(parts)
 
 
 if __name__ == '__main__':
+    # задачи distributed передаются через pickle по имени модуля, обработчики не знают __main__
+    from multiproс import Statistic
     #file = input("Введите название файла: ")
     file_path = "Data/vacancies_by_year.csv"
     #profession = input("Введите название профессии: ")
     prof = "Аналитик"
-    #vacancies_parsing.parse_csv_by_year(file_path)
+    #vacancies_parsing.parse_csv_to_columns(file_path)
     stat = Statistic(file_path, prof)
     stat.get_stat()
     stat.print_stat()
     #cProfile.run("stat.get_stat_by_year_multi_on()", sort="cumtime")
     #cProfile.run("stat.get_stat_by_year_multi_off()", sort="cumtime")
     #cProfile.run("stat.get_stat_by_year_concurrent()", sort="cumtime")
+    #stat.get_stat_distributed(("0.0.0.0", 6000))  # нужен HH_AUTHKEY, обработчики: python distributed.py <хост>:6000
+    #cProfile.run("stat.get_stat_shared()", sort="cumtime")
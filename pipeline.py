@@ -0,0 +1,113 @@
+import os
+import csv
+import queue
+import threading
+from collections import deque
+from compressed_input import open_input
+
+# признак конца потока пачек
+end_of_batches = None
+
+
+def read_batches(file_name: str, batches: queue.Queue, stop: threading.Event, batch_size: int):
+    """
+    Читатель: кладет в ограниченную очередь заглавия, затем пачки строк csv, пропуская те же строки,
+    что DataSet.read_csv; при заполненной очереди ждет, пока обработчики ее разберут
+    :param file_name: str
+        csv файл, сжатый или нет
+    :param batches: queue.Queue
+        очередь: заглавия, пачки строк, end_of_batches или исключение чтения
+    :param stop: threading.Event
+        сигнал прекратить чтение
+    :param batch_size: int
+        количество строк в пачке
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    try:
+        with open_input(file_name) as file:
+            reader = csv.reader(file)
+            list_naming = next(reader, [])
+            if not put(list_naming):
+                return
+            batch = []
+            for row in reader:
+                if "" in row or len(row) != len(list_naming):
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if len(batch) != 0 and not put(batch):
+                return
+        put(end_of_batches)
+    except Exception as error:
+        put(error)
+
+
+def run_pipeline(file_name: str, convert, merge, args: tuple = (), workers: int = None, batch_size: int = 10000,
+                 queue_size: int = 4, max_in_flight: int = None):
+    """
+    Конвейер: поток-читатель заполняет ограниченную очередь пачками строк, процессы-обработчики переводят пачку
+    в частичный результат, а текущий поток объединяет результаты в порядке пачек. Чтение, обработка
+    и объединение идут одновременно; в памяти не больше queue_size прочитанных и max_in_flight
+    обрабатываемых пачек
+    :param file_name: str
+        csv файл, сжатый или нет
+    :param convert: function
+        функция уровня модуля convert(rows, list_naming, *args) -> частичный результат, выполняется в процессе
+    :param merge: function
+        объединение частичного результата merge(result)
+    :param args: tuple
+        дополнительные аргументы convert
+    :param workers: int
+        количество процессов-обработчиков, по умолчанию по числу ядер
+    :param batch_size: int
+        количество строк в пачке
+    :param queue_size: int
+        количество пачек в очереди читателя
+    :param max_in_flight: int
+        количество пачек, отданных обработчикам и еще не объединенных, по умолчанию 2 * workers
+    :return: int
+        количество обработанных строк
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    batches = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    reader = threading.Thread(target=read_batches, args=(file_name, batches, stop, batch_size), daemon=True)
+    reader.start()
+    executor = ProcessPoolExecutor(max_workers=workers)
+    rows = 0
+    in_flight = deque()
+    try:
+        list_naming = batches.get()
+        if isinstance(list_naming, Exception):
+            raise list_naming
+        while True:
+            batch = batches.get()
+            if isinstance(batch, Exception):
+                raise batch
+            if batch is end_of_batches:
+                break
+            if len(in_flight) >= max_in_flight:
+                merge(in_flight.popleft().result())
+            in_flight.append(executor.submit(convert, batch, list_naming, *args))
+            rows += len(batch)
+        while len(in_flight) != 0:
+            merge(in_flight.popleft().result())
+    finally:
+        stop.set()
+        executor.shutdown(cancel_futures=True)
+        reader.join()
+    return rows
@@ -0,0 +1,170 @@
+import os
+import sys
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import table
+import table_batch
+import statistic
+from result_cache import ResultCache
+
+
+class VacancyService:
+    """
+    Держит набор вакансий в памяти и отвечает на запросы таблицы и статистики
+
+    Attributes
+    ----------
+    file_name: str
+        имя файла с вакансиями
+    version: tuple
+        (время изменения, размер) загруженной версии файла
+    table_dataset: table.DataSet
+        вакансии в формате таблицы
+    statistic_dataset: statistic.DataSet
+        вакансии в формате статистики
+    lock: threading.Lock
+        блокировка перезагрузки данных
+    cache: ResultCache
+        кэш результатов фильтрации и сортировки и статистики по (версии файла, профессии)
+    """
+    def __init__(self, file_name: str):
+        """
+        Инициализация объекта
+        :param file_name: str
+            имя файла с вакансиями
+        """
+        self.file_name = file_name
+        self.version = None
+        self.table_dataset = None
+        self.statistic_dataset = None
+        self.lock = threading.Lock()
+        self.cache = ResultCache()
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        """
+        Перечитывает файл, если он изменился с момента последней загрузки
+        """
+        stat = os.stat(self.file_name)
+        version = (stat.st_mtime_ns, stat.st_size)
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            table_dataset = table.DataSet(self.file_name, list())
+            table_dataset.fill_vacancies()
+            statistic_dataset = statistic.DataSet(self.file_name, list())
+            statistic_dataset.fill_vacancies()
+            self.table_dataset, self.statistic_dataset = table_dataset, statistic_dataset
+            self.version = version
+
+    def table_query(self, params: dict):
+        """
+        Запрос таблицы вакансий
+        :param params: dict
+            параметры запроса, как в table_batch.read_queries
+        :return: str
+            таблица вакансий
+        """
+        self.reload_if_changed()
+        query = {key: params.get(key, '') for key in ("filter_by", "sort_by", "is_reversed_sort", "rows_count",
+                                                     "columns")}
+        inputer = table_batch.make_inputer(query)
+        sorted_vacs = self.cache.get_vacancies(self.table_dataset, inputer)
+        inputer.add_page_to_table(sorted_vacs)
+        return inputer.get_table_string()
+
+    def statistic_query(self, params: dict):
+        """
+        Запрос статистики по профессии
+        :param params: dict
+            параметры запроса (profession)
+        :return: dict
+            словари статистики, как в statistic.Report
+        """
+        self.reload_if_changed()
+        with self.lock:
+            version, dataset = self.version, self.statistic_dataset
+        key = ("statistic", version, params.get("profession", ''))
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        inputer = statistic.InputConect()
+        inputer.profession = params.get("profession", '')
+        inputer.count_vacancies(dataset.vacancies_objects)
+        inputer.normalize_statistic()
+        reporter = statistic.Report()
+        reporter.prepare_data(inputer.years, inputer.vacancies, inputer.cities, inputer.profession)
+        result = {"years_salary": reporter.years_salary,
+                  "years_count": reporter.years_count,
+                  "years_salary_vac": reporter.years_salary_vac,
+                  "years_count_vac": reporter.years_count_vac,
+                  "area_salary": reporter.area_salary,
+                  "area_count": reporter.area_count}
+        self.cache.put(key, result, len(json.dumps(result, ensure_ascii=False).encode("utf-8")))
+        return result
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Обработчик http запросов /table и /statistic
+    """
+    service = None
+
+    def do_GET(self):
+        """
+        Обработка GET запроса
+        """
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        try:
+            if url.path == "/table":
+                self.send_answer(200, "text/plain", self.service.table_query(params))
+            elif url.path == "/statistic":
+                self.send_answer(200, "application/json",
+                                 json.dumps(self.service.statistic_query(params), ensure_ascii=False))
+            elif url.path == "/cache":
+                self.send_answer(200, "application/json", json.dumps(self.service.cache.stats()))
+            else:
+                self.send_answer(404, "text/plain", "Неизвестный запрос")
+        except (ValueError, KeyError, IndexError) as error:
+            self.send_answer(400, "text/plain", f"Параметры запроса некорректны: {error}")
+
+    def send_answer(self, code: int, content_type: str, body: str):
+        """
+        Отправка ответа
+        :param code: int
+            код ответа
+        :param content_type: str
+            тип содержимого
+        :param body: str
+            тело ответа
+        """
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(file_name: str, host: str = "127.0.0.1", port: int = 8000):
+    """
+    Запускает локальный сервер запросов к набору вакансий
+    :param file_name: str
+        имя файла с вакансиями
+    :param host: str
+        адрес сервера
+    :param port: int
+        порт сервера
+    """
+    QueryHandler.service = VacancyService(file_name)
+    with ThreadingHTTPServer((host, port), QueryHandler) as server:
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
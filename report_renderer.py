@@ -0,0 +1,160 @@
+import os
+import concurrent.futures as con_fut
+from instrumentation import Instrumentation
+
+
+def render_excel(reporter, file_name: str, instrumented: bool = False):
+    """
+    Генерация эксель таблицы в процессе-обработчике
+    :param reporter: statistic.Report
+        подготовленный отчет
+    :param file_name: str
+        имя файла
+    :param instrumented: bool
+        замерять ли этап
+    :return: list
+        замеры этапа
+    """
+    instrumentation = Instrumentation(instrumented)
+    with instrumentation.stage("generate_excel"):
+        reporter.generate_excel(file_name)
+    return instrumentation.stages
+
+
+def render_image(reporter, file_name: str, instrumented: bool = False):
+    """
+    Генерация картинки в процессе-обработчике
+    :param reporter: statistic.Report
+        подготовленный отчет
+    :param file_name: str
+        имя файла
+    :param instrumented: bool
+        замерять ли этап
+    :return: list
+        замеры этапа
+    """
+    instrumentation = Instrumentation(instrumented)
+    with instrumentation.stage("generate_image"):
+        reporter.generate_image(file_name)
+    return instrumentation.stages
+
+
+def render_pdf(reporter, file_name: str, image_name: str, instrumented: bool = False):
+    """
+    Генерация pdf файла в процессе-обработчике; сам pdf строит отдельный процесс wkhtmltopdf, запускаемый
+    pdfkit для каждого файла
+    :param reporter: statistic.Report
+        подготовленный отчет
+    :param file_name: str
+        имя файла
+    :param image_name: str
+        имя файла с картинкой
+    :param instrumented: bool
+        замерять ли этап
+    :return: list
+        замеры этапа
+    """
+    instrumentation = Instrumentation(instrumented)
+    with instrumentation.stage("generate_pdf"):
+        reporter.generate_pdf(file_name, image_name)
+    return instrumentation.stages
+
+
+class ReportRenderer:
+    """
+    Параллельная генерация файлов отчетов
+
+    Процессы-обработчики создаются один раз и используются для всех отчетов, поэтому matplotlib, openpyxl
+    и jinja2 загружаются в каждом процессе только один раз. Эксель таблица и картинка строятся одновременно,
+    pdf строится сразу после готовности картинки. Повторно используются только процессы python: pdfkit
+    не умеет держать wkhtmltopdf запущенным, поэтому для каждого pdf запускается новый процесс wkhtmltopdf,
+    и это остается самой долгой частью отчета; пропустить его можно только через кэш готовых файлов
+
+    Attributes
+    ----------
+    executor: ProcessPoolExecutor
+        процессы-обработчики
+    coordinator: ThreadPoolExecutor
+        потоки, отслеживающие готовность файлов каждого отчета
+    cache: ArtifactCache
+        кэш готовых файлов отчетов или None
+    """
+    def __init__(self, max_workers: int = 3, cache=None):
+        """
+        Инициализация объекта
+        :param max_workers: int
+            количество процессов-обработчиков
+        :param cache: ArtifactCache
+            кэш готовых файлов отчетов
+        """
+        self.cache = cache
+        self.executor = con_fut.ProcessPoolExecutor(max_workers=max_workers)
+        self.coordinator = con_fut.ThreadPoolExecutor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def render(self, reporter, output_dir: str = '.', instrumentation: Instrumentation = None):
+        """
+        Запускает генерацию файлов отчета
+        :param reporter: statistic.Report
+            подготовленный отчет
+        :param output_dir: str
+            папка для файлов отчета
+        :param instrumentation: Instrumentation
+            замеры этапов, в него добавляются замеры из процессов-обработчиков
+        :return: Future
+            результат - словарь имен созданных файлов (excel, image, pdf)
+        """
+        return self.coordinator.submit(self.render_files, reporter, output_dir,
+                                       instrumentation or Instrumentation(enabled=False))
+
+    def render_files(self, reporter, output_dir: str, instrumentation: Instrumentation):
+        """
+        Генерация файлов одного отчета
+        :param reporter: statistic.Report
+            подготовленный отчет
+        :param output_dir: str
+            папка для файлов отчета
+        :param instrumentation: Instrumentation
+            замеры этапов
+        :return: dict
+            имена созданных файлов
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        files = {"excel": os.path.join(output_dir, "report.xlsx"),
+                 "image": os.path.join(output_dir, "graph.png"),
+                 "pdf": os.path.join(output_dir, "report.pdf")}
+        key = self.cache.get_key(reporter) if self.cache is not None else None
+        if key is not None and self.cache.restore(key, files):
+            return files
+        instrumented = instrumentation.enabled
+        excel = self.executor.submit(render_excel, reporter, files["excel"], instrumented)
+        instrumentation.extend(self.executor.submit(render_image, reporter, files["image"], instrumented).result())
+        pdf = self.executor.submit(render_pdf, reporter, files["pdf"], files["image"], instrumented)
+        instrumentation.extend(excel.result())
+        instrumentation.extend(pdf.result())
+        if key is not None:
+            self.cache.store(key, files)
+        return files
+
+    def render_many(self, reports: list):
+        """
+        Генерация файлов для нескольких отчетов
+        :param reports: list
+            пары (подготовленный отчет, папка для файлов)
+        :return: list
+            имена созданных файлов для каждого отчета
+        """
+        futures = [self.render(reporter, output_dir) for reporter, output_dir in reports]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """
+        Остановка процессов-обработчиков
+        """
+        self.coordinator.shutdown()
+        self.executor.shutdown()
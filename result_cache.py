@@ -0,0 +1,120 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU кэш результатов фильтрации и сортировки вакансий, ограниченный по объему памяти
+
+    Хранит перестановки номеров строк набора вакансий по ключу
+    (отпечаток набора, параметр фильтрации, параметр сортировки, обратный порядок),
+    а также другие результаты запросов с заданным объемом. Кэш живет в одном процессе: его используют
+    долгоживущий query_server и родительский процесс table_batch; интерактивный table.get_table выполняет
+    один запрос и кэш не использует
+
+    Attributes
+    ----------
+    max_bytes: int
+        максимальный объем хранимых перестановок в байтах
+    size: int
+        текущий объем хранимых перестановок в байтах
+    hits: int
+        количество попаданий в кэш
+    misses: int
+        количество промахов
+    items: OrderedDict
+        (результат, объем в байтах) в порядке последнего использования
+    lock: threading.Lock
+        блокировка для использования из нескольких потоков
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Инициализация объекта
+        :param max_bytes: int
+            максимальный объем кэша в байтах
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """
+        Получение перестановки по ключу
+        :param key: tuple
+            ключ запроса
+        :return: array | None
+            номера строк (или другой результат) или None, если ключа нет в кэше
+        """
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.items.move_to_end(key)
+            return item[0]
+
+    def put(self, key: tuple, ids, size: int = None):
+        """
+        Сохранение результата с вытеснением давно не использованных
+        :param key: tuple
+            ключ запроса
+        :param ids: array
+            номера строк или другой результат
+        :param size: int
+            объем результата в байтах, для номеров строк считается по массиву
+        """
+        size = ids.itemsize * len(ids) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.items:
+                self.size -= self.items.pop(key)[1]
+            self.items[key] = (ids, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self.items.popitem(last=False)
+                self.size -= evicted_size
+
+    @staticmethod
+    def get_key(dataset, inputer):
+        """
+        Ключ перестановки запроса
+        :param dataset: table.DataSet
+            набор вакансий
+        :param inputer: table.InputConect
+            параметры запроса
+        :return: tuple
+            (отпечаток набора, параметр фильтрации, параметр сортировки, обратный порядок)
+        """
+        return dataset.fingerprint, inputer.filter_by, inputer.sort_by, inputer.is_reversed_sort in (True, "Да")
+
+    def get_vacancies(self, dataset, inputer):
+        """
+        Отфильтрованные и отсортированные вакансии с использованием кэша
+        :param dataset: table.DataSet
+            набор вакансий
+        :param inputer: table.InputConect
+            параметры запроса
+        :return: list
+            отфильтрованные и отсортированные вакансии
+        """
+        key = self.get_key(dataset, inputer)
+        ids = self.get(key)
+        if ids is not None:
+            return [dataset.vacancies_objects[i] for i in ids]
+        sorted_vacs = inputer.sort_vacancies(inputer.filter_vacancies(dataset.vacancies_objects, dataset))
+        self.put(key, array('l', (vacancy.row_id for vacancy in sorted_vacs)))
+        return sorted_vacs
+
+    def stats(self):
+        """
+        Счетчики кэша
+        :return: dict
+            попадания, промахи, количество записей и объем
+        """
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.items), "bytes": self.size}
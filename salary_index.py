@@ -0,0 +1,174 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class IntervalNode:
+    """
+    Узел дерева интервалов
+
+    Attributes
+    ----------
+    center: float
+        центр узла
+    by_low: list
+        интервалы, содержащие центр, по возрастанию нижней границы: (нижняя граница, номер строки)
+    by_high: list
+        интервалы, содержащие центр, по убыванию верхней границы: (верхняя граница, номер строки)
+    left: IntervalNode
+        интервалы левее центра
+    right: IntervalNode
+        интервалы правее центра
+    """
+    def __init__(self, center: float, by_low: list, by_high: list, left, right):
+        """
+        Инициализация объекта
+        :param center: float
+            центр узла
+        :param by_low: list
+            интервалы узла по возрастанию нижней границы
+        :param by_high: list
+            интервалы узла по убыванию верхней границы
+        :param left: IntervalNode
+            левое поддерево
+        :param right: IntervalNode
+            правое поддерево
+        """
+        self.center = center
+        self.by_low = by_low
+        self.by_high = by_high
+        self.left = left
+        self.right = right
+
+
+class SalaryIndex:
+    """
+    Индекс вилок зарплат в рублях
+
+    Подсчет вилок, пересекающих диапазон, - двоичный поиск по отсортированным границам (O(log n)),
+    перечисление - дерево интервалов (O(log n + k))
+
+    Attributes
+    ----------
+    lows: list
+        нижние границы по номеру строки
+    highs: list
+        верхние границы по номеру строки
+    sorted_lows: array
+        нижние границы по возрастанию
+    sorted_highs: array
+        верхние границы по возрастанию
+    root: IntervalNode
+        корень дерева интервалов, строится при первом перечислении
+    """
+    def __init__(self, lows: list, highs: list):
+        """
+        Инициализация объекта
+        :param lows: list
+            нижняя граница вилки для каждой строки набора
+        :param highs: list
+            верхняя граница вилки для каждой строки набора
+        """
+        self.lows = lows
+        self.highs = highs
+        self.sorted_lows = array('d', sorted(lows))
+        self.sorted_highs = array('d', sorted(highs))
+        self.root = None
+
+    def build(self, ids: list):
+        """
+        Построение поддерева интервалов
+        :param ids: list
+            номера строк поддерева
+        :return: IntervalNode | None
+            корень поддерева
+        """
+        if len(ids) == 0:
+            return None
+        points = sorted(self.lows[i] for i in ids)
+        center = points[len(points) // 2]
+        left, right, middle = [], [], []
+        for i in ids:
+            if self.highs[i] < center:
+                left.append(i)
+            elif self.lows[i] > center:
+                right.append(i)
+            else:
+                middle.append(i)
+        by_low = sorted((self.lows[i], i) for i in middle)
+        by_high = sorted(((self.highs[i], i) for i in middle), reverse=True)
+        return IntervalNode(center, by_low, by_high, self.build(left), self.build(right))
+
+    def count_overlapping(self, first: float, last: float):
+        """
+        Количество вилок, пересекающих диапазон [first, last]
+        :param first: float
+            начало диапазона
+        :param last: float
+            конец диапазона
+        :return: int
+            количество вилок
+        """
+        above = len(self.sorted_lows) - bisect_right(self.sorted_lows, last)
+        below = bisect_left(self.sorted_highs, first)
+        return len(self.sorted_lows) - above - below
+
+    def find_overlapping(self, first: float, last: float):
+        """
+        Номера строк с вилками, пересекающими диапазон [first, last]
+        :param first: float
+            начало диапазона
+        :param last: float
+            конец диапазона
+        :return: list
+            номера строк в порядке возрастания
+        """
+        if self.root is None:
+            self.root = self.build(list(range(len(self.lows))))
+        result = []
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            if last < node.center:
+                for low, i in node.by_low:
+                    if low > last:
+                        break
+                    result.append(i)
+                nodes.append(node.left)
+            elif first > node.center:
+                for high, i in node.by_high:
+                    if high < first:
+                        break
+                    result.append(i)
+                nodes.append(node.right)
+            else:
+                result += [i for _, i in node.by_low]
+                nodes.append(node.left)
+                nodes.append(node.right)
+        return sorted(result)
+
+    def find_containing(self, salary: float):
+        """
+        Номера строк с вилками, содержащими зарплату
+        :param salary: float
+            зарплата
+        :return: list
+            номера строк в порядке возрастания
+        """
+        return self.find_overlapping(salary, salary)
+
+
+def count_salary_bands(index: SalaryIndex, edges: list):
+    """
+    Количество зарплат по диапазонам
+    :param index: SalaryIndex
+        индекс зарплат (вилки из одного значения)
+    :param edges: list
+        границы диапазонов по возрастанию, последняя может быть float("inf")
+    :return: dict
+        количество зарплат в каждом диапазоне [edges[i], edges[i + 1])
+    """
+    return {(f"{edges[i]} - {edges[i + 1]}" if edges[i + 1] != float("inf") else f"от {edges[i]}"):
+            index.count_overlapping(edges[i], edges[i + 1]) - index.count_overlapping(edges[i + 1], edges[i + 1])
+            for i in range(len(edges) - 1)}
@@ -0,0 +1,296 @@
+import io
+import re
+import csv
+import math
+import random
+from compressed_input import is_compressed, open_input
+
+# квантили 0.975 распределения Стьюдента для 1-30 степеней свободы (95% доверительный интервал),
+# при большем числе степеней используется квантиль нормального распределения
+t_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+        2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+z_95 = 1.96
+
+# количество блоков, на которое делится небольшой файл
+min_blocks = 1024
+
+# начало значения published_at, по которому проверяется, что найдено начало записи
+date_pattern = re.compile(r"\d{4}-\d{2}-\d{2}T")
+
+
+class ClusterEstimate:
+    """
+    Оценки сумм, средних и долей по выборке кластеров (блоков файла или отдельных строк) без возвращения
+
+    Средние и доли считаются отношением сумм по выборке, их дисперсия - линеаризацией отношения;
+    все дисперсии учитывают поправку на конечность совокупности (1 - k / K)
+
+    Attributes
+    ----------
+    total_clusters: int
+        количество кластеров во всем файле (K)
+    clusters: int
+        количество кластеров в выборке (k)
+    groups: dict
+        ключ группы -> кластер -> [сумма зарплат, количество вакансий]
+    """
+    def __init__(self, total_clusters: int):
+        """
+        Инициализация объекта
+        :param total_clusters: int
+            количество кластеров во всем файле
+        """
+        self.total_clusters = total_clusters
+        self.clusters = 0
+        self.groups = {}
+
+    def new_cluster(self):
+        """
+        Добавляет очередной кластер выборки, в том числе пустой
+        :return: int
+            номер кластера
+        """
+        self.clusters += 1
+        return self.clusters - 1
+
+    def add(self, cluster: int, key, salary: float):
+        """
+        Учитывает вакансию кластера в группе
+        :param cluster: int
+            номер кластера
+        :param key: tuple
+            ключ группы
+        :param salary: float
+            зарплата
+        """
+        values = self.groups.setdefault(key, {}).setdefault(cluster, [0.0, 0])
+        values[0] += salary
+        values[1] += 1
+
+    def get_scale(self, variance_sum: float, support: int):
+        """
+        Полуширина 95% интервала по сумме квадратов отклонений по кластерам
+        :param variance_sum: float
+            сумма квадратов отклонений
+        :param support: int
+            количество кластеров, в которых есть группа; по нему выбирается число степеней свободы
+        :return: float
+            полуширина интервала; 0 для сплошного наблюдения, inf для выборки из одного кластера
+        """
+        k, total = self.clusters, self.total_clusters
+        if k >= total:
+            return 0.0
+        if k < 2:
+            return math.inf
+        degrees = max(1, min(k, support) - 1)
+        quantile = t_95[degrees - 1] if degrees <= len(t_95) else z_95
+        return quantile * math.sqrt((1 - k / total) * variance_sum / (k * (k - 1)))
+
+    def get_total(self, key):
+        """
+        Оценка количества вакансий группы во всем файле
+        :param key: tuple
+            ключ группы
+        :return: (float, float)
+            оценка и полуширина 95% интервала
+        """
+        counts = [count for _, count in self.groups.get(key, {}).values()]
+        mean = sum(counts) / self.clusters
+        variance_sum = sum((count - mean) ** 2 for count in counts) + (self.clusters - len(counts)) * mean ** 2
+        return self.total_clusters * mean, self.total_clusters * self.get_scale(variance_sum, len(counts))
+
+    def get_ratio(self, numerators: dict, denominators: dict):
+        """
+        Оценка отношения сумм по кластерам
+        :param numerators: dict
+            кластер -> значение числителя
+        :param denominators: dict
+            кластер -> значение знаменателя; кластеры числителя должны в нем быть
+        :return: (float, float)
+            оценка и полуширина 95% интервала
+        """
+        total = sum(denominators.values())
+        if total == 0:
+            return 0.0, 0.0
+        ratio = sum(numerators.values()) / total
+        variance_sum = sum((numerators.get(cluster, 0) - ratio * value) ** 2
+                           for cluster, value in denominators.items())
+        return ratio, self.get_scale(variance_sum, len(denominators)) / (total / self.clusters)
+
+    def get_mean(self, key):
+        """
+        Оценка средней зарплаты группы
+        :param key: tuple
+            ключ группы
+        :return: (float, float)
+            оценка и полуширина 95% интервала
+        """
+        values = self.groups.get(key, {})
+        return self.get_ratio({cluster: value[0] for cluster, value in values.items()},
+                              {cluster: value[1] for cluster, value in values.items()})
+
+    def get_share(self, key, total_key):
+        """
+        Оценка доли вакансий группы среди вакансий другой группы
+        :param key: tuple
+            ключ группы
+        :param total_key: tuple
+            ключ группы, в которую входит key
+        :return: (float, float)
+            оценка и полуширина 95% интервала
+        """
+        return self.get_ratio({cluster: value[1] for cluster, value in self.groups.get(key, {}).items()},
+                              {cluster: value[1] for cluster, value in self.groups.get(total_key, {}).items()})
+
+
+def is_record_start(data: bytes, list_naming: list, column: int):
+    """
+    Проверяет, начинается ли с data запись csv: первая запись должна разбираться на все столбцы
+    и содержать дату публикации
+    :param data: bytes
+        строки от предполагаемого начала записи до четного количества кавычек
+    :param list_naming: list
+        заглавия столбцов
+    :param column: int
+        номер столбца published_at
+    :return: bool
+        True, если data - целая запись
+    """
+    try:
+        row = next(csv.reader([data.decode("utf-8")]))
+    except (UnicodeDecodeError, csv.Error, StopIteration):
+        return False
+    return len(row) == len(list_naming) and date_pattern.match(row[column]) is not None
+
+
+def read_records(file, position: int, end: int, max_size: int):
+    """
+    Чтение записей, начинающихся до end
+    :param file: io.BufferedReader
+        файл
+    :param position: int
+        начало первой записи
+    :param end: int
+        конец блока
+    :param max_size: int
+        наибольшая длина записи, более длинная считается ошибкой поиска начала записи
+    :return: generator
+        (начало записи, байты записи)
+    """
+    file.seek(position)
+    while position < end:
+        lines, quotes, size = [], 0, 0
+        for line in file:
+            lines.append(line)
+            quotes += line.count(b'"')
+            size += len(line)
+            if quotes % 2 == 0 or size > max_size:
+                break
+        if size == 0 or quotes % 2 != 0:
+            return
+        yield position, b"".join(lines)
+        position += size
+
+
+def sample_blocks(file_name: str, fraction: float, seed: int = None, block_size: int = None):
+    """
+    Выборка случайных блоков несжатого csv файла: в выборку попадают все записи, начинающиеся в выбранных
+    блоках, поэтому каждая запись попадает в нее с одинаковой вероятностью; читаются только выбранные блоки
+    :param file_name: str
+        несжатый csv файл
+    :param fraction: float
+        доля блоков
+    :param seed: int
+        начальное значение генератора случайных чисел
+    :param block_size: int
+        размер блока в байтах, по умолчанию 64 КБ, для небольших файлов меньше (не менее 4 КБ), чтобы блоков
+        было не меньше min_blocks
+    :return: (list, list, int, int)
+        заглавия столбцов, строки вакансий по выбранным блокам, количество блоков в файле, количество
+        выбранных блоков, в которых не найдено начало записи (блок внутри длинной записи или запись длиннее
+        16 блоков); такие блоки входят в выборку пустыми и могут занижать оценки
+    """
+    generator = random.Random(seed)
+    unparsed = 0
+    with open(file_name, "rb") as file:
+        header = file.readline()
+        list_naming = next(csv.reader([header.decode("utf-8-sig")]))
+        column = list_naming.index("published_at")
+        data_start = file.tell()
+        file.seek(0, io.SEEK_END)
+        size = file.tell()
+        if block_size is None:
+            block_size = max(1 << 12, min(1 << 16, (size - data_start) // min_blocks))
+        total_blocks = max(1, math.ceil((size - data_start) / block_size))
+        count = min(total_blocks, max(2, round(total_blocks * fraction)))
+        clusters = []
+        for block in sorted(generator.sample(range(total_blocks), count)):
+            start = data_start + block * block_size
+            end = min(start + block_size, size)
+            position, found = start, True
+            if block != 0:
+                # начало первой целой записи блока: начало строки, с которого разбирается запись с датой
+                file.seek(start - 1)
+                position = start - 1 + len(file.readline())
+                found = False
+                while position < end:
+                    record = next(read_records(file, position, end, 16 * block_size), None)
+                    if record is None:
+                        break
+                    if is_record_start(record[1], list_naming, column):
+                        found = True
+                        break
+                    file.seek(position)
+                    position += len(file.readline())
+            if not found:
+                unparsed += 1
+            rows = []
+            if found and position < end:
+                text = b"".join(data for _, data in read_records(file, position, end, 16 * block_size))
+                rows = list(csv.reader(io.StringIO(text.decode("utf-8"), newline=None)))
+            clusters.append(rows)
+    return list_naming, clusters, total_blocks, unparsed
+
+
+def sample_rows(file_name: str, fraction: float, seed: int = None):
+    """
+    Выборка строк потоком для файлов без произвольного доступа (сжатых): каждая строка попадает в выборку
+    с вероятностью fraction, каждая строка - отдельный кластер
+    :param file_name: str
+        csv файл
+    :param fraction: float
+        доля строк
+    :param seed: int
+        начальное значение генератора случайных чисел
+    :return: (list, list, int, int)
+        заглавия столбцов, выбранные строки (по одной в кластере), количество строк в файле, 0 (все кластеры
+        разобраны)
+    """
+    generator = random.Random(seed)
+    clusters, total_rows = [], 0
+    with open_input(file_name) as file:
+        reader = csv.reader(file)
+        list_naming = next(reader, [])
+        for row in reader:
+            total_rows += 1
+            if generator.random() < fraction:
+                clusters.append([row])
+    return list_naming, clusters, total_rows, 0
+
+
+def read_sample(file_name: str, fraction: float, seed: int = None):
+    """
+    Случайная выборка вакансий из csv файла: блоки для несжатого файла, строки для сжатого
+    :param file_name: str
+        csv файл
+    :param fraction: float
+        доля файла
+    :param seed: int
+        начальное значение генератора случайных чисел
+    :return: (list, list, int, int)
+        заглавия столбцов, строки вакансий по кластерам выборки, количество кластеров в файле, количество
+        кластеров, в которых не найдено начало записи
+    """
+    if is_compressed(file_name):
+        return sample_rows(file_name, fraction, seed)
+    return sample_blocks(file_name, fraction, seed)
@@ -0,0 +1,183 @@
+import math
+import numpy as np
+from multiprocessing import shared_memory
+
+# уровни квантилей, как у sketches.QuantileSketch
+percentiles = (0.1, 0.5, 0.9)
+
+# столбцы строки результатов года: суммы всех вакансий, суммы вакансий профессии, квантили тех и других
+year_result_columns = ("salary_sum", "salary_count", "count", "salary_sum_vac", "salary_count_vac", "count_vac",
+                       "p10", "p50", "p90", "p10_vac", "p50_vac", "p90_vac")
+
+
+class SharedArrays:
+    """
+    Numpy массивы в сегментах multiprocessing.shared_memory: создаются в основном процессе,
+    обработчики подключаются к ним по описаниям без копирования данных
+
+    Attributes
+    ----------
+    segments: dict
+        имя массива -> сегмент shared_memory
+    arrays: dict
+        имя массива -> numpy массив поверх сегмента
+    specs: dict
+        имя массива -> (имя сегмента, форма, тип), передаются обработчикам
+    owner: bool
+        создан ли объект в этом процессе (тогда сегменты удаляются unlink)
+    """
+    def __init__(self, specs: dict = None, owner: bool = False):
+        """
+        Инициализация объекта
+        :param specs: dict
+            описания уже созданных массивов для подключения к ним или None
+        :param owner: bool
+            удаляет ли unlink сегменты
+        """
+        self.segments = {}
+        self.arrays = {}
+        self.specs = {}
+        self.owner = owner
+        for name, (segment_name, shape, dtype) in (specs or {}).items():
+            segment = attach_segment(segment_name)
+            self.add(name, segment, shape, dtype)
+
+    def add(self, name: str, segment: shared_memory.SharedMemory, shape: tuple, dtype: str):
+        """
+        Добавляет массив поверх сегмента
+        :param name: str
+            имя массива
+        :param segment: shared_memory.SharedMemory
+            сегмент
+        :param shape: tuple
+            форма массива
+        :param dtype: str
+            тип элементов
+        """
+        self.segments[name] = segment
+        self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        self.specs[name] = (segment.name, shape, dtype)
+
+    @staticmethod
+    def create(arrays: dict):
+        """
+        Копирует массивы в новые сегменты, нулевые массивы создаются без копирования
+        :param arrays: dict
+            имя массива -> numpy массив или (форма, тип) для массива из нулей
+        :return: SharedArrays
+            владелец сегментов
+        """
+        shared = SharedArrays(owner=True)
+        try:
+            for name, array in arrays.items():
+                shape, dtype = (array.shape, array.dtype.str) if isinstance(array, np.ndarray) else \
+                    (array[0], np.dtype(array[1]).str)
+                size = max(1, math.prod(shape) * np.dtype(dtype).itemsize)
+                shared.add(name, shared_memory.SharedMemory(create=True, size=size), shape, dtype)
+                if isinstance(array, np.ndarray):
+                    shared.arrays[name][...] = array
+                else:
+                    shared.arrays[name].fill(0)
+        except Exception:
+            shared.close()
+            shared.unlink()
+            raise
+        return shared
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.close()
+        finally:
+            self.unlink()
+
+    def close(self):
+        """
+        Отключается от сегментов
+        """
+        self.arrays = {}
+        for segment in self.segments.values():
+            segment.close()
+
+    def unlink(self):
+        """
+        Удаляет сегменты, если объект - их владелец; вызывается после завершения всех обработчиков
+        """
+        if self.owner:
+            for segment in self.segments.values():
+                segment.unlink()
+        self.segments = {}
+
+
+def attach_segment(name: str):
+    """
+    Подключение к существующему сегменту без регистрации в resource_tracker; в версиях без track обработчик,
+    запущенный multiprocessing, использует resource_tracker основного процесса, где сегмент уже учтен
+    :param name: str
+        имя сегмента
+    :return: shared_memory.SharedMemory
+        сегмент
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def exact_quantiles(values: np.ndarray):
+    """
+    Точные квантили зарплат в том же виде, что QuantileSketch.get_quantiles
+    :param values: numpy.ndarray
+        зарплаты, NaN пропускаются
+    :return: list
+        значения квантилей percentiles (0 для пустого массива)
+    """
+    values = np.sort(values[~np.isnan(values)])
+    if len(values) == 0:
+        return [0 for _ in percentiles]
+    return [int(values[max(math.ceil(quantile * len(values)) - 1, 0)]) for quantile in percentiles]
+
+
+def aggregate_slice(task: int, start: int, stop: int, specs: dict, first_day: int):
+    """
+    Обработчик: считает суммы по строкам [start, stop) общих столбцов и записывает их в строку task
+    общих массивов результатов; в основной процесс ничего не возвращается
+    :param task: int
+        номер задачи (строка массивов результатов)
+    :param start: int
+        первая строка
+    :param stop: int
+        строка после последней
+    :param specs: dict
+        описания общих массивов: name, area_name, salary, published_day, profession_match,
+        year_results, city_results, day_results
+    :param first_day: int
+        день, соответствующий первому столбцу day_results
+    """
+    with SharedArrays(specs) as shared:
+        arrays = shared.arrays
+        salary = arrays["salary"][start:stop]
+        is_vac = arrays["profession_match"][arrays["name"][start:stop]]
+        has_salary = ~np.isnan(salary)
+        salary_or_zero = np.where(has_salary, salary, 0)
+
+        result = arrays["year_results"][task]
+        result[0:3] = salary_or_zero.sum(), has_salary.sum(), len(salary)
+        result[3:6] = salary_or_zero[is_vac].sum(), has_salary[is_vac].sum(), is_vac.sum()
+        result[6:9] = exact_quantiles(salary)
+        result[9:12] = exact_quantiles(salary[is_vac])
+
+        areas = arrays["area_name"][start:stop]
+        cities = arrays["city_results"][task]
+        cities[:, 0] = np.bincount(areas, weights=salary_or_zero, minlength=len(cities))
+        cities[:, 1] = np.bincount(areas, weights=has_salary, minlength=len(cities))
+        cities[:, 2] = np.bincount(areas, minlength=len(cities))
+
+        days = arrays["published_day"][start:stop].astype(np.int64) - first_day
+        for i, selected in enumerate((slice(None), is_vac)):
+            day_sums = arrays["day_results"][task, i]
+            day_sums[:, 0] = np.bincount(days[selected], weights=salary_or_zero[selected], minlength=len(day_sums))
+            day_sums[:, 1] = np.bincount(days[selected], weights=has_salary[selected], minlength=len(day_sums))
+            day_sums[:, 2] = np.bincount(days[selected], minlength=len(day_sums))
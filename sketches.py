@@ -0,0 +1,302 @@
+import math
+import heapq
+import hashlib
+import random
+
+percentiles = (0.1, 0.5, 0.9)
+
+
+class QuantileSketch:
+    """
+    Потоковый скетч квантилей (KLL) с ограниченным объемом памяти, который можно объединять
+
+    Хранит не больше примерно 3 * k значений; ошибка ранга порядка 1 / k (около 1% при k = 200)
+
+    Attributes
+    ----------
+    k: int
+        размер верхнего уровня, задает точность
+    compactors: list
+        уровни значений, значение уровня h имеет вес 2 ** h
+    count: int
+        количество добавленных значений
+    size: int
+        количество хранимых значений
+    max_size: int
+        допустимое количество хранимых значений
+    random: random.Random
+        генератор для выбора половины значений при сжатии уровня
+    """
+    def __init__(self, k: int = 200, seed: int = None):
+        """
+        Инициализация объекта
+        :param k: int
+            размер верхнего уровня
+        :param seed: int
+            начальное значение генератора
+        """
+        self.k = k
+        self.compactors = []
+        self.count = 0
+        self.size = 0
+        self.max_size = 0
+        self.random = random.Random(seed)
+        self.grow()
+
+    def grow(self):
+        """
+        Добавление уровня
+        """
+        self.compactors.append([])
+        self.max_size = sum(self.capacity(h) for h in range(len(self.compactors)))
+
+    def capacity(self, level: int):
+        """
+        Вместимость уровня
+        :param level: int
+            номер уровня
+        :return: int
+            вместимость
+        """
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * (2 / 3) ** depth)) + 1
+
+    def update(self, value: float):
+        """
+        Добавление значения
+        :param value: float
+            значение
+        """
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self.compress()
+
+    def compress(self):
+        """
+        Сжатие переполненных уровней: половина отсортированных значений уровня переходит на следующий
+        """
+        for level in range(len(self.compactors)):
+            items = self.compactors[level]
+            if len(items) >= self.capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self.grow()
+                items.sort()
+                last = items.pop() if len(items) % 2 else None
+                self.compactors[level + 1] += items[self.random.randint(0, 1)::2]
+                items.clear()
+                if last is not None:
+                    items.append(last)
+                self.size = sum(len(c) for c in self.compactors)
+                if self.size < self.max_size:
+                    break
+
+    def merge(self, other):
+        """
+        Объединение со скетчем, построенным по другой части данных (например, в другом процессе)
+        :param other: QuantileSketch
+            другой скетч
+        """
+        while len(self.compactors) < len(other.compactors):
+            self.grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] += items
+        self.count += other.count
+        self.size = sum(len(c) for c in self.compactors)
+        while self.size >= self.max_size:
+            self.compress()
+
+    def get_quantiles(self, quantiles: tuple = percentiles):
+        """
+        Приближенные квантили
+        :param quantiles: tuple
+            уровни квантилей от 0 до 1
+        :return: list
+            значения квантилей (0 для пустого скетча)
+        """
+        items = sorted((value, 2 ** level) for level, values in enumerate(self.compactors) for value in values)
+        if len(items) == 0:
+            return [0 for _ in quantiles]
+        total = sum(weight for _, weight in items)
+        result = []
+        for quantile in quantiles:
+            rank = quantile * total
+            cumulative = 0
+            for value, weight in items:
+                cumulative += weight
+                if cumulative >= rank:
+                    break
+            result.append(int(value))
+        return result
+
+
+class HeavyHitters:
+    """
+    Потоковый подсчет самых частых значений (Space-Saving) с ограниченным объемом памяти, который можно объединять
+
+    Хранит не больше capacity счетчиков; счетчик завышает частоту не больше, чем на свою ошибку error,
+    а любое значение с частотой больше N / capacity гарантированно присутствует. Вытесняемый счетчик
+    с наименьшим количеством ищется по куче за O(log capacity)
+
+    Attributes
+    ----------
+    capacity: int
+        количество счетчиков
+    counters: dict
+        значение -> [количество, ошибка]
+    heap: list
+        куча (количество, порядковый номер, значение) по одной записи на счетчик; количество в записи может
+        отставать от счетчика, тогда запись обновляется при вытеснении
+    """
+    def __init__(self, capacity: int = 100):
+        """
+        Инициализация объекта
+        :param capacity: int
+            количество счетчиков
+        """
+        self.capacity = capacity
+        self.counters = {}
+        self.heap = []
+        self.sequence = 0
+
+    def push(self, item, count: int):
+        """
+        Добавление записи счетчика в кучу
+        :param item: object
+            значение
+        :param count: int
+            количество
+        """
+        self.sequence += 1
+        heapq.heappush(self.heap, (count, self.sequence, item))
+
+    def rebuild_heap(self):
+        """
+        Построение кучи заново по счетчикам
+        """
+        self.heap = []
+        for item, counter in self.counters.items():
+            self.push(item, counter[0])
+
+    def pop_min(self):
+        """
+        Удаление счетчика с наименьшим количеством
+        :return: int
+            количество удаленного счетчика
+        """
+        while True:
+            count, _, item = heapq.heappop(self.heap)
+            actual = self.counters[item][0]
+            if actual == count:
+                return self.counters.pop(item)[0]
+            self.push(item, actual)
+
+    def update(self, item, weight: int = 1):
+        """
+        Учет значения
+        :param item: object
+            значение
+        :param weight: int
+            количество появлений
+        """
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+            self.push(item, weight)
+        else:
+            count = self.pop_min()
+            self.counters[item] = [count + weight, count]
+            self.push(item, count + weight)
+
+    def merge(self, other):
+        """
+        Объединение со счетчиками, построенными по другой части данных (например, в другом процессе)
+        :param other: HeavyHitters
+            другие счетчики
+        """
+        own_min = min((c[0] for c in self.counters.values()), default=0) \
+            if len(self.counters) >= self.capacity else 0
+        other_min = min((c[0] for c in other.counters.values()), default=0) \
+            if len(other.counters) >= other.capacity else 0
+        merged = {}
+        for item in set(self.counters) | set(other.counters):
+            own = self.counters.get(item, [own_min, own_min])
+            foreign = other.counters.get(item, [other_min, other_min])
+            merged[item] = [own[0] + foreign[0], own[1] + foreign[1]]
+        top = sorted(merged, key=lambda x: merged[x][0], reverse=True)[:self.capacity]
+        self.counters = {item: merged[item] for item in top}
+        self.rebuild_heap()
+
+    def top(self, count: int = 10):
+        """
+        Самые частые значения
+        :param count: int
+            количество значений
+        :return: dict
+            значение -> оценка количества, по убыванию
+        """
+        items = sorted(self.counters, key=lambda x: self.counters[x][0], reverse=True)[:count]
+        return {item: self.counters[item][0] for item in items}
+
+
+class DistinctCounter:
+    """
+    Приближенный подсчет количества различных значений (HyperLogLog) с ограниченным объемом памяти,
+    который можно объединять
+
+    Хранит 2 ** precision однобайтовых регистров; стандартная ошибка оценки 1.04 / sqrt(2 ** precision)
+    (около 1.6% при precision = 12), для небольших количеств используется точный линейный подсчет по регистрам
+
+    Attributes
+    ----------
+    precision: int
+        количество бит хэша для выбора регистра
+    registers: bytearray
+        максимальный номер первого единичного бита для каждого регистра
+    """
+    def __init__(self, precision: int = 12):
+        """
+        Инициализация объекта
+        :param precision: int
+            количество бит хэша для выбора регистра (от 4 до 16)
+        """
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def update(self, item: str):
+        """
+        Учет значения
+        :param item: str
+            значение
+        """
+        value = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+        index = value >> (64 - self.precision)
+        rest = value & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """
+        Объединение со счетчиком, построенным по другой части данных (например, в другом процессе)
+        :param other: DistinctCounter
+            другой счетчик с той же точностью
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """
+        Оценка количества различных значений
+        :return: int
+            количество
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros != 0:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
@@ -1,12 +1,14 @@
-from openpyxl import Workbook
-from openpyxl.styles import Font, Border, Side
-from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+import os
 import csv
-import matplotlib.pyplot as pyplot
-import numpy as np
+import shutil
 import datetime
-from jinja2 import Environment, FileSystemLoader
-import pdfkit
+from functools import cached_property
+from instrumentation import Instrumentation
+from sketches import QuantileSketch, HeavyHitters, DistinctCounter
+from date_index import parse_input_day
+from time_buckets import TimeBuckets, granularities
+from compressed_input import open_input
+from salary_index import SalaryIndex, count_salary_bands
 
 
 class Vacancy:
@@ -23,6 +25,16 @@ class Vacancy:
         название региона
     published_at : str
         дата публикации
+    year : int
+        год публикации
+    published_day : int
+        день публикации (количество дней с 01.01.1970), вычисляется при первом обращении
+    skills_text : str
+        навыки через перевод строки (пустая строка, если в файле нет столбца key_skills)
+    key_skills : list
+        навыки списком, разбиваются при обращении
+    employer_name : str
+        название работодателя (пустая строка, если в файле нет столбца employer_name)
     currency_to_rub : dict
         словарь перевода валюты в рубли
     """
@@ -43,15 +55,38 @@ class Vacancy:
         """
         Инициализация объекта
         :param vac: dict
-            вакансия
+            вакансия; вместо salary_from, salary_to и salary_currency может быть зарплата в рублях salary
         """
         self.name = vac['name']
-        salary_from = int(float("".join(vac['salary_from'].split())))
-        salary_to = int(float("".join(vac['salary_to'].split())))
-        self.salary = (salary_from + salary_to) * self.currency_to_rub[vac['salary_currency']] // 2
+        if "salary" in vac:
+            self.salary = float(vac['salary'])
+        else:
+            salary_from = int(float("".join(vac['salary_from'].split())))
+            salary_to = int(float("".join(vac['salary_to'].split())))
+            self.salary = (salary_from + salary_to) * self.currency_to_rub[vac['salary_currency']] // 2
         self.area_name = vac['area_name']
         self.published_at = ".".join(reversed(vac["published_at"][:10].split("-")))
-            #datetime.datetime.strptime(vac['published_at'], '%Y-%m-%dT%H:%M:%S%z')
+        self.year = int(vac["published_at"][0:4])
+        self.skills_text = vac.get("key_skills", "")
+        self.employer_name = vac.get("employer_name", "")
+
+    @cached_property
+    def published_day(self):
+        """
+        День публикации, вычисляется только для статистики по периодам и запоминается
+        :return: int
+            количество дней с 01.01.1970
+        """
+        return parse_input_day(self.published_at)
+
+    @property
+    def key_skills(self):
+        """
+        Навыки, разбиваются только для статистики навыков
+        :return: list
+            навыки
+        """
+        return self.skills_text.split("\n") if self.skills_text != "" else []
 
 
 class DataSet:
@@ -64,6 +99,8 @@ class DataSet:
         имя файла
     vacancies_objects: list
         список вакансий
+    salary_index: SalaryIndex
+        индекс зарплат в рублях, строится при первом запросе
     """
     def __init__(self, file_name: str, vacancies_objects: list):
         """
@@ -75,13 +112,32 @@ class DataSet:
         """
         self.file_name = file_name
         self.vacancies_objects = vacancies_objects
+        self.salary_index = None
 
-    def fill_vacancies(self):
+    def fill_vacancies(self, instrumentation: Instrumentation = None):
         """
         Читает вакансии и фильтрует их
+        :param instrumentation: Instrumentation
+            замеры этапов
+        """
+        instrumentation = instrumentation or Instrumentation(enabled=False)
+        with instrumentation.stage("read_csv") as record:
+            vacancies, list_naming = self.read_csv()
+            record["rows"] = len(vacancies)
+        with instrumentation.stage("csv_filer", len(vacancies)):
+            self.vacancies_objects = self.csv_filer(vacancies, list_naming)
+        self.salary_index = None
+
+    def get_salary_index(self):
+        """
+        Индекс зарплат вакансий в рублях
+        :return: SalaryIndex
+            индекс зарплат
         """
-        vacancies, list_naming = self.read_csv()
-        self.vacancies_objects = self.csv_filer(vacancies, list_naming)
+        if self.salary_index is None:
+            salaries = [vacancy.salary for vacancy in self.vacancies_objects]
+            self.salary_index = SalaryIndex(salaries, salaries)
+        return self.salary_index
 
     def read_csv(self):
         """
@@ -91,7 +147,7 @@ class DataSet:
         """
         list_naming = []
         vacancies = []
-        with open(self.file_name, encoding='utf-8-sig') as file:
+        with open_input(self.file_name) as file:
             file_reader = csv.reader(file, delimiter=",")
             flag = True
             for row in file_reader:
@@ -168,6 +224,39 @@ class InputConect:
         название профессии
     city_count: int
         количество городов
+    years_quantiles: dict
+        скетчи квантилей зарплат по годам
+    cities_quantiles: dict
+        скетчи квантилей зарплат по городам
+    vacancies_quantiles: dict
+        скетчи квантилей зарплат выбранной профессии по годам
+    skills: HeavyHitters
+        самые частые навыки
+    skills_years: dict
+        самые частые навыки по годам
+    skills_vacancies: HeavyHitters
+        самые частые навыки выбранной профессии
+    skills_capacity: int
+        количество счетчиков навыков в каждом срезе (ограничивает объем памяти)
+    employers: dict
+        счетчики различных работодателей по (городу, году)
+    store_columns: tuple
+        столбцы хранилища вакансий, которые читаются для скетчей
+    time_buckets: TimeBuckets
+        зарплаты и количество вакансий по годам, кварталам, месяцам и неделям
+    time_buckets_vac: TimeBuckets
+        то же для выбранной профессии
+    intervals: dict
+        для оценки по выборке - полуширины 95% доверительных интервалов: years_salary, years_count,
+        vacancies_salary, vacancies_count, cities_salary, cities_share -> ключ -> полуширина; иначе пустой
+    sample_size: int
+        количество вакансий в выборке
+    unparsed_clusters: int
+        количество блоков выборки, в которых не найдено начало записи (учтены пустыми)
+    salary_bands: dict
+        количество вакансий по диапазонам зарплат salary_band_edges
+    extras: frozenset
+        дополнительная статистика из extras_names, которая считается по строкам (по умолчанию никакая)
     """
     years = {
     }
@@ -181,6 +270,32 @@ class InputConect:
     file_name = ""
     profession = ""
     city_count = 0
+    skills_capacity = 100
+    extras_names = ("quantiles", "skills", "employers", "bands", "periods")
+    salary_band_edges = (0, 30000, 60000, 100000, 150000, 250000, float("inf"))
+    store_columns = ("name", "salary", "area_name", "published_at", "key_skills", "employer_name")
+
+    def __init__(self):
+        """
+        Инициализация объекта
+        """
+        self.years = {}
+        self.cities = {}
+        self.vacancies = {}
+        self.years_quantiles = {}
+        self.cities_quantiles = {}
+        self.vacancies_quantiles = {}
+        self.skills = HeavyHitters(self.skills_capacity)
+        self.skills_years = {}
+        self.skills_vacancies = HeavyHitters(self.skills_capacity)
+        self.employers = {}
+        self.time_buckets = TimeBuckets()
+        self.time_buckets_vac = TimeBuckets()
+        self.intervals = {}
+        self.sample_size = 0
+        self.unparsed_clusters = 0
+        self.salary_bands = {}
+        self.extras = frozenset()
 
     def start_input(self):
         """
@@ -196,9 +311,10 @@ class InputConect:
         :param vacancies: list
             вакансии
         """
+        count_extras = len(self.extras) != 0
         for vacancy in vacancies:
             self.city_count += 1
-            year = int(vacancy.published_at.split(".")[2])
+            year = vacancy.year
             if year not in self.years.keys():
                 self.years[year] = MyTuple(vacancy.salary, 1)
                 self.vacancies[year] = MyTuple(0, 0)
@@ -215,6 +331,283 @@ class InputConect:
             if self.profession in vacancy.name:
                 self.vacancies[year].totalSalary += vacancy.salary
                 self.vacancies[year].count += 1
+            if count_extras:
+                self.count_sketches(vacancy)
+
+    def merge(self, other):
+        """
+        Объединение с частичной статистикой, посчитанной по другому файлу или пачке строк; словари по годам
+        после объединения упорядочиваются по году, так как порядок частей не совпадает с хронологическим
+        :param other: InputConect
+            частичная статистика
+        """
+        for field in ("years", "cities", "vacancies"):
+            own, foreign = getattr(self, field), getattr(other, field)
+            for key, value in foreign.items():
+                if key in own:
+                    own[key].totalSalary += value.totalSalary
+                    own[key].count += value.count
+                else:
+                    own[key] = value
+        self.years = dict(sorted(self.years.items()))
+        self.vacancies = {year: self.vacancies[year] for year in self.years}
+        self.city_count += other.city_count
+        for field in ("years_quantiles", "cities_quantiles", "vacancies_quantiles", "skills_years", "employers"):
+            own, foreign = getattr(self, field), getattr(other, field)
+            for key, value in foreign.items():
+                if key in own:
+                    own[key].merge(value)
+                else:
+                    own[key] = value
+        self.skills.merge(other.skills)
+        self.skills_vacancies.merge(other.skills_vacancies)
+        self.time_buckets.merge(other.time_buckets)
+        self.time_buckets_vac.merge(other.time_buckets_vac)
+        self.add_salary_bands(other.salary_bands)
+
+    def count_files(self, files: list, max_workers: int = None):
+        """
+        Считает частичную статистику каждого файла в отдельном процессе и объединяет результаты
+        :param files: list
+            имена файлов
+        :param max_workers: int
+            количество процессов, по умолчанию по числу ядер
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for partial in executor.map(count_file, files, repeat(self.profession), repeat(self.extras)):
+                self.merge(partial)
+
+    def count_sample(self, list_naming: list, clusters: list, total_clusters: int, unparsed_clusters: int = 0):
+        """
+        Оценка статистики по случайной выборке sampling.read_sample: словари years, cities и vacancies
+        заполняются оценками так, чтобы normalize_statistic дал средние зарплаты и доли, а в intervals
+        записываются полуширины доверительных интервалов. Навыки, работодатели, диапазоны зарплат и периоды
+        не оцениваются, квантили (если запрошены) считаются по выборке
+        :param list_naming: list
+            заглавия столбцов
+        :param clusters: list
+            строки вакансий по кластерам выборки
+        :param total_clusters: int
+            количество кластеров в файле
+        :param unparsed_clusters: int
+            количество кластеров, в которых не найдено начало записи
+        """
+        from sampling import ClusterEstimate
+
+        self.unparsed_clusters = unparsed_clusters
+        estimate = ClusterEstimate(total_clusters)
+        dataset = DataSet(self.file_name, list())
+        count_quantiles = "quantiles" in self.extras
+        for rows in clusters:
+            cluster = estimate.new_cluster()
+            # те же строки, что пропускает DataSet.read_csv
+            rows = [row for row in rows if "" not in row and len(row) == len(list_naming)]
+            for vacancy in dataset.csv_filer(rows, list_naming):
+                self.sample_size += 1
+                estimate.add(cluster, ("all",), vacancy.salary)
+                estimate.add(cluster, ("year", vacancy.year), vacancy.salary)
+                estimate.add(cluster, ("city", vacancy.area_name), vacancy.salary)
+                if count_quantiles:
+                    self.add_to_sketch(self.years_quantiles, vacancy.year, vacancy.salary)
+                    self.add_to_sketch(self.cities_quantiles, vacancy.area_name, vacancy.salary)
+                if self.profession in vacancy.name:
+                    estimate.add(cluster, ("vacancy", vacancy.year), vacancy.salary)
+                    if count_quantiles:
+                        self.add_to_sketch(self.vacancies_quantiles, vacancy.year, vacancy.salary)
+
+        self.intervals = {name: {} for name in ("years_salary", "years_count", "vacancies_salary", "vacancies_count",
+                                                "cities_salary", "cities_share")}
+        self.city_count = round(estimate.get_total(("all",))[0])
+        for (kind, key) in sorted((key for key in estimate.groups if key[0] != "all"), key=str):
+            salary, salary_interval = estimate.get_mean((kind, key))
+            count, count_interval = estimate.get_total((kind, key))
+            count = max(1, round(count))
+            if kind == "year":
+                self.years[key] = MyTuple(int(salary) * count, count)
+                self.vacancies.setdefault(key, MyTuple(0, 0))
+                self.intervals["years_salary"][key] = int(salary_interval)
+                self.intervals["years_count"][key] = int(count_interval)
+            elif kind == "vacancy":
+                self.vacancies[key] = MyTuple(int(salary) * count, count)
+                self.intervals["vacancies_salary"][key] = int(salary_interval)
+                self.intervals["vacancies_count"][key] = int(count_interval)
+            else:
+                self.cities[key] = MyTuple(int(salary) * count, count)
+                self.intervals["cities_salary"][key] = int(salary_interval)
+                self.intervals["cities_share"][key] = round(estimate.get_share((kind, key), ("all",))[1], 4)
+        self.years = dict(sorted(self.years.items()))
+        self.vacancies = {year: self.vacancies[year] for year in self.years}
+
+    def count_from_store(self, store):
+        """
+        Заполняет словари для вакансий из хранилища: суммы и количества считаются в SQL,
+        для дополнительной статистики читаются только нужные столбцы без сохранения вакансий в памяти
+        :param store: vacancy_store.VacancyStore
+            хранилище вакансий
+        """
+        for year, total, count in store.aggregate_salary("year"):
+            self.years[year] = MyTuple(total, count)
+            self.vacancies[year] = MyTuple(0, 0)
+        for year, total, count in store.aggregate_salary("year", self.profession):
+            self.vacancies[year] = MyTuple(total, count)
+        for city, total, count in store.aggregate_salary("area_name"):
+            self.cities[city] = MyTuple(total, count)
+            self.city_count += count
+        if len(self.extras) == 0:
+            return
+        salaries = []
+        for row in store.iter_rows(self.store_columns):
+            vacancy = Vacancy(row)
+            self.count_sketches(vacancy)
+            if "bands" in self.extras:
+                salaries.append(vacancy.salary)
+        if "bands" in self.extras:
+            self.count_salary_bands(SalaryIndex(salaries, salaries))
+
+    def count_sketches(self, vacancy: Vacancy):
+        """
+        Учитывает вакансию в запрошенной дополнительной статистике: скетчах квантилей, периодах,
+        навыках и работодателях
+        :param vacancy: Vacancy
+            вакансия
+        """
+        is_profession = self.profession in vacancy.name
+        if "quantiles" in self.extras:
+            if is_profession:
+                self.add_to_sketch(self.vacancies_quantiles, vacancy.year, vacancy.salary)
+            self.add_to_sketch(self.years_quantiles, vacancy.year, vacancy.salary)
+            self.add_to_sketch(self.cities_quantiles, vacancy.area_name, vacancy.salary)
+        if "periods" in self.extras:
+            published_day = vacancy.published_day
+            if is_profession:
+                self.time_buckets_vac.update(published_day, vacancy.salary)
+            self.time_buckets.update(published_day, vacancy.salary)
+        if "skills" in self.extras:
+            self.count_skills(vacancy)
+        if "employers" in self.extras:
+            self.count_employers(vacancy)
+
+    def count_employers(self, vacancy: Vacancy):
+        """
+        Учитывает работодателя вакансии в счетчике различных работодателей города за год
+        :param vacancy: Vacancy
+            вакансия
+        """
+        if vacancy.employer_name == "":
+            return
+        key = (vacancy.area_name, vacancy.year)
+        if key not in self.employers:
+            self.employers[key] = DistinctCounter()
+        self.employers[key].update(vacancy.employer_name)
+
+    def get_city_employers(self, city: str):
+        """
+        Счетчик различных работодателей города за все годы
+        :param city: str
+            город
+        :return: DistinctCounter
+            объединенный счетчик
+        """
+        result = DistinctCounter()
+        for (area_name, year), counter in self.employers.items():
+            if area_name == city:
+                result.merge(counter)
+        return result
+
+    def count_skills(self, vacancy: Vacancy):
+        """
+        Учитывает навыки вакансии в общем срезе, срезе по году и срезе выбранной профессии
+        :param vacancy: Vacancy
+            вакансия
+        """
+        if len(vacancy.key_skills) == 0:
+            return
+        if vacancy.year not in self.skills_years:
+            self.skills_years[vacancy.year] = HeavyHitters(self.skills_capacity)
+        skills_year = self.skills_years[vacancy.year]
+        is_profession = self.profession in vacancy.name
+        for skill in vacancy.key_skills:
+            self.skills.update(skill)
+            skills_year.update(skill)
+            if is_profession:
+                self.skills_vacancies.update(skill)
+
+    def add_to_sketch(self, sketches: dict, key, salary: float):
+        """
+        Добавляет зарплату в скетч квантилей по ключу
+        :param sketches: dict
+            скетчи по ключам
+        :param key: object
+            ключ (год или город)
+        :param salary: float
+            зарплата
+        """
+        if key not in sketches:
+            sketches[key] = QuantileSketch()
+        sketches[key].update(salary)
+
+    def print_quantiles(self):
+        """
+        Печать перцентилей зарплат (p10, p50, p90) в консоль
+        """
+        if "quantiles" not in self.extras:
+            return
+        years = {year: self.years_quantiles[year].get_quantiles() for year in self.years_quantiles}
+        print(f"Перцентили зарплат (p10, p50, p90) по годам: {years}")
+        years = {year: self.vacancies_quantiles[year].get_quantiles() if year in self.vacancies_quantiles else
+                 [0, 0, 0] for year in self.years_quantiles}
+        print(f"Перцентили зарплат (p10, p50, p90) по годам для выбранной профессии: {years}")
+        cities_sorted = sorted(self.cities, key=lambda x: self.cities[x].count, reverse=True)[:10]
+        cities = {city: self.cities_quantiles[city].get_quantiles() for city in cities_sorted}
+        print(f"Перцентили зарплат (p10, p50, p90) по городам: {cities}")
+
+    def print_skills(self):
+        """
+        Печать самых частых навыков в консоль
+        """
+        if len(self.skills.counters) == 0:
+            return
+        print(f"Самые частые навыки: {self.skills.top()}")
+        print(f"Самые частые навыки для выбранной профессии: {self.skills_vacancies.top()}")
+        years = {year: list(self.skills_years[year].top(5)) for year in sorted(self.skills_years)}
+        print(f"Самые частые навыки по годам: {years}")
+
+    def print_employers(self):
+        """
+        Печать оценки количества различных работодателей по городам в консоль
+        """
+        if len(self.employers) == 0:
+            return
+        cities_sorted = sorted(self.cities, key=lambda x: self.cities[x].count, reverse=True)[:10]
+        cities = {city: self.get_city_employers(city).count() for city in cities_sorted}
+        print(f"Количество работодателей по городам (оценка): {cities}")
+
+    def count_salary_bands(self, index: SalaryIndex):
+        """
+        Учитывает количество вакансий по диапазонам зарплат salary_band_edges
+        :param index: SalaryIndex
+            индекс зарплат вакансий (DataSet.get_salary_index)
+        """
+        self.add_salary_bands(count_salary_bands(index, self.salary_band_edges))
+
+    def add_salary_bands(self, salary_bands: dict):
+        """
+        Прибавляет количества вакансий по диапазонам зарплат
+        :param salary_bands: dict
+            диапазон -> количество вакансий
+        """
+        for band, count in salary_bands.items():
+            self.salary_bands[band] = self.salary_bands.get(band, 0) + count
+
+    def print_salary_bands(self):
+        """
+        Печать количества вакансий по диапазонам зарплат в консоль
+        """
+        if len(self.salary_bands) != 0:
+            print(f"Количество вакансий по диапазонам зарплат: {self.salary_bands}")
 
     def normalize_statistic(self):
         """
@@ -242,20 +635,42 @@ class InputConect:
         """
         Печать ответа в консоль
         """
-        self.print_one("Динамика уровня зарплат по годам:", self.years, "totalSalary")
-        self.print_one("Динамика количества вакансий по годам:", self.years, "count")
+        mark = " (оценка)" if len(self.intervals) != 0 else ""
+        self.print_one(f"Динамика уровня зарплат по годам{mark}:", self.years, "totalSalary")
+        self.print_one(f"Динамика количества вакансий по годам{mark}:", self.years, "count")
 
-        self.print_one("Динамика уровня зарплат по годам для выбранной профессии:", self.vacancies, "totalSalary")
-        self.print_one("Динамика количества вакансий по годам для выбранной профессии:", self.vacancies, "count")
+        self.print_one(f"Динамика уровня зарплат по годам для выбранной профессии{mark}:", self.vacancies,
+                       "totalSalary")
+        self.print_one(f"Динамика количества вакансий по годам для выбранной профессии{mark}:", self.vacancies,
+                       "count")
 
         cities_sorted = sorted(self.cities, key=lambda x: self.cities[x].totalSalary, reverse=True)
         del cities_sorted[10:]
-        self.print_for_cities("Уровень зарплат по городам (в порядке убывания):", self.cities,
+        self.print_for_cities(f"Уровень зарплат по городам (в порядке убывания){mark}:", self.cities,
                               cities_sorted, "totalSalary")
         cities_sorted = sorted(self.cities, key=lambda x: self.cities[x].count, reverse=True)
         del cities_sorted[10:]
-        self.print_for_cities("Доля вакансий по городам (в порядке убывания):", self.cities,
+        self.print_for_cities(f"Доля вакансий по городам (в порядке убывания){mark}:", self.cities,
                               cities_sorted, "count")
+        self.print_intervals()
+
+    def print_intervals(self):
+        """
+        Печать полуширин 95% доверительных интервалов оценки по выборке
+        """
+        if len(self.intervals) == 0:
+            return
+        print(f"Оценка по случайной выборке из {self.sample_size} вакансий, 95% доверительные интервалы (±):")
+        if self.unparsed_clusters != 0:
+            print(f"  блоков без распознанного начала записи (учтены пустыми): {self.unparsed_clusters}")
+        print(f"  зарплаты по годам: {self.intervals['years_salary']}")
+        print(f"  количество вакансий по годам: {self.intervals['years_count']}")
+        print(f"  зарплаты по годам для выбранной профессии: {self.intervals['vacancies_salary']}")
+        print(f"  количество вакансий по годам для выбранной профессии: {self.intervals['vacancies_count']}")
+        cities = {city: self.intervals['cities_salary'][city] for city in self.cities}
+        print(f"  зарплаты по городам: {cities}")
+        cities = {city: self.intervals['cities_share'][city] for city in self.cities}
+        print(f"  доли вакансий по городам: {cities}")
 
     def print_for_cities(self, output: str, field: dict, names: list, value_name: str):
         """
@@ -330,6 +745,26 @@ class Report:
         доля вакансий по городам
     prof: dict
         название професии
+    skills: dict
+        самые частые навыки и их количество
+    skills_vac: dict
+        самые частые навыки выбранной професии и их количество
+    skills_years: dict
+        самые частые навыки по годам
+    area_employers: dict
+        оценка количества различных работодателей по городам из area_count
+    salary_bands: dict
+        количество вакансий по диапазонам зарплат
+    granularity: str
+        размер периода графиков динамики (year, quarter, month, week)
+    periods: dict
+        динамика по периодам, если granularity не year: период -> [средняя зп, количество вакансий,
+        средняя зп для профессии, количество для профессии, скользящая средняя зп, скользящая средняя зп для профессии]
+    estimate: dict
+        для оценки по выборке - полуширины 95% интервалов значений years_salary, years_count, years_salary_vac,
+        years_count_vac, area_salary, area_count; иначе пустой
+    sample_note: str
+        пометка об оценке по выборке для отчета
     """
     years_salary = {}
     years_count = {}
@@ -339,6 +774,26 @@ class Report:
     area_count = {}
     prof = ''
 
+    def __init__(self):
+        """
+        Инициализация объекта
+        """
+        self.years_salary = {}
+        self.years_count = {}
+        self.years_salary_vac = {}
+        self.years_count_vac = {}
+        self.area_salary = {}
+        self.area_count = {}
+        self.skills = {}
+        self.skills_vac = {}
+        self.skills_years = {}
+        self.area_employers = {}
+        self.salary_bands = {}
+        self.granularity = "year"
+        self.periods = {}
+        self.estimate = {}
+        self.sample_note = ""
+
     def years_preparer(self, field: dict, value_name: str, dest: dict):
         """
         подготовка словаря лет
@@ -357,6 +812,7 @@ class Report:
         """
         Подготовка словарей для статистики
         """
+        self.prof = prof
         self.years_preparer(years, "totalSalary", self.years_salary)
         self.years_preparer(years, "count", self.years_count)
         self.years_preparer(vacancies, "totalSalary", self.years_salary_vac)
@@ -370,99 +826,238 @@ class Report:
         del cities_sorted[10:]
         self.citites_preparer(cities, cities_sorted, "count", self.area_count)
 
-    def as_text(self, value: str):
-        if value is None:
-            return ""
-        return str(value)
+    def prepare_estimate(self, inputer: InputConect):
+        """
+        Подготовка доверительных интервалов оценки по выборке для значений отчета
+        :param inputer: InputConect
+            посчитанная статистика
+        """
+        if len(inputer.intervals) == 0:
+            return
+        intervals = inputer.intervals
+        self.estimate = {
+            "years_salary": {year: intervals["years_salary"][year] for year in self.years_salary},
+            "years_count": {year: intervals["years_count"][year] for year in self.years_count},
+            "years_salary_vac": {year: intervals["vacancies_salary"].get(year, 0) for year in self.years_salary_vac},
+            "years_count_vac": {year: intervals["vacancies_count"].get(year, 0) for year in self.years_count_vac},
+            "area_salary": {city: intervals["cities_salary"][city] for city in self.area_salary},
+            "area_count": {city: intervals["cities_share"][city] for city in self.area_count},
+        }
+        self.sample_note = f"Оценка по случайной выборке из {inputer.sample_size} вакансий, " \
+                           f"± - 95% доверительный интервал"
+        if inputer.unparsed_clusters != 0:
+            self.sample_note += f"; блоков без распознанного начала записи (учтены пустыми, " \
+                                f"оценки могут быть занижены): {inputer.unparsed_clusters}"
+
+    def with_intervals(self, name: str, values: dict):
+        """
+        Значения для pdf вместе с доверительными интервалами оценки
+        :param name: str
+            поле отчета
+        :param values: dict
+            значения поля
+        :return: dict
+            значения в виде "значение ± полуширина" или исходные значения, если отчет не по выборке
+        """
+        if len(self.estimate) == 0:
+            return values
+        return {key: f"{value} ± {self.estimate[name].get(key, 0)}"
+                for key, value in values.items()}
 
-    def generate_excel(self):
+    def generate_excel(self, file_name: str = 'report.xlsx'):
         """
         Генерация эксель таблицы
+        :param file_name: str
+            имя файла
+        """
+        from itertools import zip_longest
+        from openpyxl import Workbook
+        from openpyxl.styles.numbers import FORMAT_PERCENTAGE_00
+        from excel_export import SheetWriter
+
+        wb = Workbook(write_only=True)
+        writer = SheetWriter(wb, 'Статистика по годам',
+                             ["Год", "Средняя зарплата", "Средняя зарплата - Программист", "Количество вакансий",
+                              "Количество вакансий - Программист"])
+        for year, value in self.years_salary.items():
+            writer.append([year, value, self.years_salary_vac[year], self.years_count[year],
+                           self.years_count_vac[year]])
+        writer.close()
+
+        header = ["Город", "Уровень зарплат", None, "Город", "Доля вакансий"]
+        if len(self.area_employers) != 0:
+            header.append("Работодатели (оценка)")
+        writer = SheetWriter(wb, 'Статистика по городам', header, number_formats={4: FORMAT_PERCENTAGE_00})
+        for salary, count in zip_longest(self.area_salary.items(), self.area_count.items(), fillvalue=(None, None)):
+            row = [salary[0], salary[1], None, count[0], count[1]]
+            if len(self.area_employers) != 0:
+                row.append(self.area_employers.get(count[0]))
+            writer.append(row)
+        writer.close()
+
+        if len(self.periods) != 0:
+            writer = SheetWriter(wb, 'Статистика по периодам',
+                                 ["Период", "Средняя зарплата", "Количество вакансий", f"Средняя зарплата - {self.prof}",
+                                  f"Количество вакансий - {self.prof}", "Скользящая средняя зарплата",
+                                  f"Скользящая средняя зарплата - {self.prof}"])
+            for period, values in self.periods.items():
+                writer.append([period, values[0], values[1], values[2], values[3], values[4], values[5]])
+            writer.close()
+
+        if len(self.skills) != 0:
+            writer = SheetWriter(wb, 'Навыки', ["Навык", "Количество", None, f"Навык - {self.prof}", "Количество",
+                                               None, "Год", "Самые частые навыки"])
+            for skill, skill_vac, year in zip_longest(self.skills.items(), self.skills_vac.items(),
+                                                      self.skills_years.items(), fillvalue=(None, None)):
+                writer.append([skill[0], skill[1], None, skill_vac[0], skill_vac[1], None, year[0], year[1]])
+            writer.close()
+
+        if len(self.salary_bands) != 0:
+            writer = SheetWriter(wb, 'Диапазоны зарплат', ["Диапазон зарплат", "Количество вакансий"])
+            for band, count in self.salary_bands.items():
+                writer.append([band, count])
+            writer.close()
+
+        if len(self.estimate) != 0:
+            names = {"years_salary": "Средняя зарплата", "years_count": "Количество вакансий",
+                     "years_salary_vac": f"Средняя зарплата - {self.prof}",
+                     "years_count_vac": f"Количество вакансий - {self.prof}", "area_salary": "Уровень зарплат",
+                     "area_count": "Доля вакансий"}
+            writer = SheetWriter(wb, 'Оценка', ["Показатель", "Год / город", "Оценка", "± (95%)"])
+            writer.append([self.sample_note])
+            for name, title in names.items():
+                values = getattr(self, name)
+                for key, interval in self.estimate[name].items():
+                    writer.append([title, key, values[key], interval])
+            writer.close()
+
+        wb.save(file_name)
+
+    def prepare_skills(self, skills: HeavyHitters, skills_vacancies: HeavyHitters, skills_years: dict):
+        """
+        Подготовка самых частых навыков для отчета
+        :param skills: HeavyHitters
+            навыки всех вакансий
+        :param skills_vacancies: HeavyHitters
+            навыки выбранной профессии
+        :param skills_years: dict
+            навыки по годам
+        """
+        self.skills = skills.top()
+        self.skills_vac = skills_vacancies.top()
+        self.skills_years = {year: ", ".join(skills_years[year].top(5)) for year in sorted(skills_years)}
+
+    def prepare_employers(self, inputer: InputConect):
         """
-        wb = Workbook()
-        del wb['Sheet']
-        sheet = wb.create_sheet('Статистика по годам')
-        thin = Side(border_style="thin", color="000000")
-
-        sheet["A1"] = "Год"
-        sheet["A1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["A1"].font = Font(bold=True)
-
-        sheet["B1"] = "Средняя зарплата"
-        sheet["B1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["B1"].font = Font(bold=True)
-
-        sheet["C1"] = "Средняя зарплата - Программист"
-        sheet["C1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["C1"].font = Font(bold=True)
-
-        sheet["D1"] = "Количество вакансий"
-        sheet["D1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["D1"].font = Font(bold=True)
-
-        sheet["E1"] = "Количество вакансий - Программист"
-        sheet["E1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["E1"].font = Font(bold=True)
-
-        for row, (year, value) in enumerate(self.years_salary.items(), start=2):
-            sheet[f"A{row}"] = year
-            sheet[f"A{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"B{row}"] = value
-            sheet[f"B{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"C{row}"] = self.years_salary_vac[year]
-            sheet[f"C{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"D{row}"] = self.years_count[year]
-            sheet[f"D{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"E{row}"] = self.years_count_vac[year]
-            sheet[f"E{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for column_cells in sheet.columns:
-            length = max(len(self.as_text(cell.value)) for cell in column_cells)
-            sheet.column_dimensions[column_cells[0].column_letter].width = length + 2
-
-        sheet = wb.create_sheet('Статистика по городам')
-        sheet["A1"] = "Город"
-        sheet["A1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["A1"].font = Font(bold=True)
-
-        sheet["B1"] = "Уровень зарплат"
-        sheet["B1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["B1"].font = Font(bold=True)
-
-        sheet["C1"].font = Font(bold=True)
-
-        sheet["D1"] = "Город"
-        sheet["D1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["D1"].font = Font(bold=True)
-
-        sheet["E1"] = "Доля вакансий"
-        sheet["E1"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-        sheet["E1"].font = Font(bold=True)
-
-        for row, (year, value) in enumerate(self.area_salary.items(), start=2):
-            sheet[f"A{row}"] = year
-            sheet[f"A{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"B{row}"] = value
-            sheet[f"B{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for row, (year, value) in enumerate(self.area_count.items(), start=2):
-            sheet[f"D{row}"] = year
-            sheet[f"D{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-            sheet[f"E{row}"] = value
-            sheet[f"E{row}"].number_format = FORMAT_PERCENTAGE_00
-            sheet[f"E{row}"].border = Border(top=thin, left=thin, right=thin, bottom=thin)
-
-        for column_cells in sheet.columns:
-            length = max(len(self.as_text(cell.value)) for cell in column_cells)
-            sheet.column_dimensions[column_cells[0].column_letter].width = length + 2
-
-        wb.save('report.xlsx')
-
-    def generate_image(self):
-        """
-        Генерация картинки
-        """
-        figure, axes = pyplot.subplots(2, 2)
+        Подготовка оценки количества различных работодателей для городов из доли вакансий
+        :param inputer: InputConect
+            посчитанная статистика
+        """
+        if len(inputer.employers) != 0:
+            self.area_employers = {city: inputer.get_city_employers(city).count() for city in self.area_count}
+
+    def prepare_periods(self, time_buckets: TimeBuckets, time_buckets_vac: TimeBuckets, granularity: str):
+        """
+        Подготовка динамики по периодам для графиков и таблицы
+        :param time_buckets: TimeBuckets
+            периоды всех вакансий
+        :param time_buckets_vac: TimeBuckets
+            периоды выбранной профессии
+        :param granularity: str
+            размер периода, для year используются словари по годам
+        """
+        self.granularity = granularity
+        if granularity == "year":
+            return
+        series_vac = time_buckets_vac.series(granularity)
+        for period, values in time_buckets.series(granularity).items():
+            values_vac = series_vac.get(period, [0, 0, 0, 0])
+            self.periods[period] = [values[0], values[1], values_vac[0], values_vac[1], values[2], values_vac[2]]
+
+    def get_area_count_with_other(self):
+        """
+        Доли вакансий по городам вместе с долей остальных городов
+        :return: dict
+            доли вакансий, первым идет ключ 'Другие'
+        """
+        area_count = {'Другие': 1 - sum((list(self.area_count.values())))}
+        area_count.update(self.area_count)
+        return area_count
+
+    def generate_image(self, file_name: str = 'graph.png'):
+        """
+        Генерация картинки без интерактивного окна (можно вызывать из нескольких потоков и процессов)
+        :param file_name: str
+            имя файла
+        """
+        from matplotlib.figure import Figure
+
+        figure = Figure()
+        axes = figure.subplots(2, 2)
+        if len(self.periods) != 0:
+            self.plot_periods(axes)
+        else:
+            self.plot_years(axes)
+
+        axes[1, 0].set_title("Уровень зарплат по городам")
+        axes[1, 0].invert_yaxis()
+        salary = self.area_salary
+        salaries = list(salary.keys())
+        salaries = [label.replace(' ', '\n').replace('-', '-\n') for label in salaries]
+        salary_values = list(salary.values())
+        axes[1, 0].set_yticklabels(salaries, fontsize=6, va='center', ha='right')
+        axes[1, 0].barh(salaries, salary_values)
+        axes[1, 0].grid(True, axis='x')
+        axes[1, 0].tick_params(axis='both', labelsize=8)
+
+        axes[1, 1].set_title("Доля вакансий по городам")
+        area_count = self.get_area_count_with_other()
+        labels = list(area_count.keys())
+        sizes = list(area_count.values())
+        axes[1, 1].pie(sizes, labels=labels, textprops={'fontsize': 6})
+        axes[1, 1].axis('scaled')
+
+        if self.sample_note != "":
+            figure.suptitle(self.sample_note, fontsize=8)
+        figure.tight_layout()
+        figure.savefig(file_name, dpi=300)
+
+    def plot_periods(self, axes):
+        """
+        Графики динамики по периодам (линии, подписи не чаще 12 на графике)
+        :param axes: numpy.ndarray
+            оси рисунка 2x2
+        """
+        period_name = {"quarter": "кварталам", "month": "месяцам", "week": "неделям"}[self.granularity]
+        labels = list(self.periods.keys())
+        values = list(zip(*self.periods.values()))
+        X_axis = range(len(labels))
+        ticks = X_axis[::max(1, len(labels) // 12)]
+
+        axes[0, 0].set_title(f'Уровень зарплат по {period_name}')
+        axes[0, 0].plot(X_axis, values[0], linewidth=0.8, label='средняя з/п')
+        axes[0, 0].plot(X_axis, values[2], linewidth=0.8, label=f'з/п {self.prof.lower()}')
+        axes[0, 0].plot(X_axis, values[4], linewidth=1.2, label='скользящая средняя з/п')
+        axes[0, 0].plot(X_axis, values[5], linewidth=1.2, label=f'скользящая з/п {self.prof.lower()}')
+
+        axes[0, 1].set_title(f'Количество вакансий по {period_name}')
+        axes[0, 1].plot(X_axis, values[1], linewidth=0.8, label='Количество вакансий')
+        axes[0, 1].plot(X_axis, values[3], linewidth=0.8, label=f'Количество вакансий\n{self.prof.lower()}')
+
+        for ax in (axes[0, 0], axes[0, 1]):
+            ax.set_xticks(ticks, [labels[i] for i in ticks], rotation='vertical', va='top', ha='center')
+            ax.grid(True, axis='y')
+            ax.tick_params(axis='both', labelsize=8)
+            ax.legend(fontsize=6)
+
+    def plot_years(self, axes):
+        """
+        Графики динамики по годам
+        :param axes: numpy.ndarray
+            оси рисунка 2x2
+        """
+        import numpy as np
+
         w = 0.4
         X_axis = np.arange(len(self.years_salary.keys()))
 
@@ -484,68 +1079,216 @@ class Report:
         axes[0, 1].tick_params(axis='both', labelsize=8)
         axes[0, 1].legend(fontsize=8)
 
-        axes[1, 0].set_title("Уровень зарплат по городам")
-        axes[1, 0].invert_yaxis()
-        salary = self.area_salary
-        salaries = list(salary.keys())
-        salaries = [label.replace(' ', '\n').replace('-', '-\n') for label in salaries]
-        salary_values = list(salary.values())
-        axes[1, 0].set_yticklabels(salaries, fontsize=6, va='center', ha='right')
-        axes[1, 0].barh(salaries, salary_values)
-        axes[1, 0].grid(True, axis='x')
-        axes[1, 0].tick_params(axis='both', labelsize=8)
-
-        axes[1, 1].set_title("Доля вакансий по городам")
-        other = {'Другие': 1 - sum((list(self.area_count.values())))}
-        other.update(self.area_count)
-        self.area_count = other
-        labels = list(self.area_count.keys())
-        sizes = list(self.area_count.values())
-        axes[1, 1].pie(sizes, labels=labels, textprops={'fontsize': 6})
-        axes[1, 1].axis('scaled')
-
-        pyplot.tight_layout()
-        pyplot.savefig('graph.png', dpi=300)
-        pyplot.show()
-
-    def generate_pdf(self):
+    def generate_pdf(self, file_name: str = 'report.pdf', image_name: str = 'graph.png'):
         """
-        Генерация файла pdf
+        Генерация файла pdf: html шаблона через jinja2, pdf - новым процессом wkhtmltopdf
+        :param file_name: str
+            имя файла
+        :param image_name: str
+            имя файла с картинкой, созданного generate_image
         """
-        area_count_dic = self.area_count.items()
+        from jinja2 import Environment, FileSystemLoader
+        import pdfkit
+
+        area_count_dic = self.get_area_count_with_other().items()
         area_count_dic = {x[0]: str(f'{x[1] * 100:,.2f}%').replace('.', ',') for x in area_count_dic}
-        env = Environment(loader=FileSystemLoader('.'))
+        if len(self.estimate) != 0:
+            area_count_dic = {city: value + str(f' ± {self.estimate["area_count"][city] * 100:,.2f}%').replace('.', ',')
+                              if city in self.estimate["area_count"] else value
+                              for city, value in area_count_dic.items()}
+        env = Environment(loader=FileSystemLoader(os.path.dirname(os.path.abspath(__file__))))
         template = env.get_template("pdf_template.html")
         header_year = ["Год", "Средняя зарплата", "Средняя зарплата - Программист", "Количество вакансий",
                        "Количество вакансий - Программист"]
-        header_city = ["Город", "Уровень зарплат", "Город", "Доля вакансий"]
+        header_city = ["Город", "Уровень зарплат", "Город", "Доля вакансий", "Работодатели (оценка)"]
         pdf_template = template.render({'prof': self.prof,
-                                        'years_salary_dic': self.years_salary,
-                                        'years_count_dic': self.years_count,
-                                        'years_salary_vac_dic': self.years_salary_vac,
-                                        'years_count_vac_dic': self.years_count_vac,
-                                        'area_salary_dic': self.area_salary,
+                                        'years_salary_dic': self.with_intervals("years_salary", self.years_salary),
+                                        'years_count_dic': self.with_intervals("years_count", self.years_count),
+                                        'years_salary_vac_dic': self.with_intervals("years_salary_vac",
+                                                                                    self.years_salary_vac),
+                                        'years_count_vac_dic': self.with_intervals("years_count_vac",
+                                                                                   self.years_count_vac),
+                                        'area_salary_dic': self.with_intervals("area_salary", self.area_salary),
+                                        'sample_note': self.sample_note,
                                         'area_count_dic': area_count_dic,
+                                        'area_employers_dic': self.area_employers,
                                         'header_year': header_year,
                                         'header_city': header_city,
-                                        'path': './graph.png'})
-        config = pdfkit.configuration(wkhtmltopdf=r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe')
-        pdfkit.from_string(pdf_template, 'report.pdf', configuration=config, options={"enable-local-file-access": None})
+                                        'skills_dic': self.skills,
+                                        'skills_vac_dic': self.skills_vac,
+                                        'skills_years_dic': self.skills_years,
+                                        'salary_bands_dic': self.salary_bands,
+                                        'path': os.path.abspath(image_name)})
+        pdfkit.from_string(pdf_template, file_name, configuration=get_pdfkit_configuration(),
+                           options={"enable-local-file-access": None})
 
 
-def get_statistic():
+def count_batch(rows: list, list_naming: list, profession: str, extras: frozenset = frozenset()):
     """
-    Получение статистики, генерация excel таблицы, картинки и pdf файла
+    Частичная статистика пачки строк конвейера pipeline, выполняется в процессе-обработчике
+    :param rows: list
+        строки csv
+    :param list_naming: list
+        заглавия столбцов
+    :param profession: str
+        название профессии
+    :param extras: frozenset
+        дополнительная статистика (InputConect.extras)
+    :return: InputConect
+        статистика пачки до normalize_statistic
     """
     inputer = InputConect()
-    inputer.start_input()
-    dataset = DataSet(inputer.file_name, list())
+    inputer.profession, inputer.extras = profession, extras
+    dataset = DataSet("", list())
+    dataset.vacancies_objects = dataset.csv_filer(rows, list_naming)
+    inputer.count_vacancies(dataset.vacancies_objects)
+    if "bands" in extras:
+        inputer.count_salary_bands(dataset.get_salary_index())
+    return inputer
+
+
+def count_file(file_name: str, profession: str, extras: frozenset = frozenset()):
+    """
+    Частичная статистика одного файла, выполняется в процессе-обработчике
+    :param file_name: str
+        имя файла
+    :param profession: str
+        название профессии
+    :param extras: frozenset
+        дополнительная статистика (InputConect.extras)
+    :return: InputConect
+        статистика файла до normalize_statistic
+    """
+    inputer = InputConect()
+    inputer.file_name, inputer.profession, inputer.extras = file_name, profession, extras
+    dataset = DataSet(file_name, list())
     dataset.fill_vacancies()
     inputer.count_vacancies(dataset.vacancies_objects)
-    inputer.normalize_statistic()
+    if "bands" in extras:
+        inputer.count_salary_bands(dataset.get_salary_index())
+    return inputer
+
+
+pdfkit_configuration = None
+
+
+def get_pdfkit_configuration():
+    """
+    Настройка pdfkit, создается один раз на процесс
+
+    Путь к wkhtmltopdf берется из переменной окружения WKHTMLTOPDF_PATH, затем ищется в PATH
+    :return: pdfkit.configuration
+        настройка pdfkit
+    """
+    global pdfkit_configuration
+    if pdfkit_configuration is None:
+        import pdfkit
+
+        path = os.environ.get("WKHTMLTOPDF_PATH") or shutil.which("wkhtmltopdf") or \
+            r'C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe'
+        pdfkit_configuration = pdfkit.configuration(wkhtmltopdf=path)
+    return pdfkit_configuration
+
+
+def get_statistic(instrumentation: Instrumentation = None, granularity: str = None, sample: float = None,
+                  pipeline_workers: int = None, extras: str = None):
+    """
+    Получение статистики, генерация excel таблицы, картинки и pdf файла; параметры ниже не задаются
+    вопросами ввода, переменные окружения для них перечислены в README
+    :param instrumentation: Instrumentation
+        замеры этапов, по умолчанию включаются переменной окружения HH_INSTRUMENTATION
+    :param granularity: str
+        размер периода графиков динамики (year, quarter, month, week), по умолчанию
+        берется из переменной окружения HH_GRANULARITY или year
+    :param sample: float
+        доля файла для оценки статистики по случайной выборке (0 < sample <= 1), по умолчанию берется
+        из переменной окружения HH_SAMPLE; если не задана, статистика считается по всему файлу
+    :param pipeline_workers: int
+        количество процессов конвейера чтения и подсчета (pipeline) для одного csv файла, по умолчанию
+        берется из переменной окружения HH_PIPELINE; 0 или не задано - чтение и подсчет по очереди
+    :param extras: str
+        дополнительная статистика через запятую (quantiles, skills, employers, bands), по умолчанию берется
+        из переменной окружения HH_EXTRAS; периоды считаются, если granularity не year
+    """
+    instrumentation = instrumentation or Instrumentation.from_env()
+    granularity = granularity or os.environ.get("HH_GRANULARITY", "year")
+    if granularity not in granularities:
+        print("Неизвестный размер периода")
+        exit()
+    sample = sample or os.environ.get("HH_SAMPLE")
+    if sample is not None:
+        try:
+            sample = float(sample)
+        except ValueError:
+            sample = 0
+        if not 0 < sample <= 1:
+            print("Неверная доля выборки")
+            exit()
+    pipeline_workers = pipeline_workers or os.environ.get("HH_PIPELINE", "0")
+    if not str(pipeline_workers).isdigit():
+        print("Неверное количество процессов конвейера")
+        exit()
+    pipeline_workers = int(pipeline_workers)
+    extras = {name.strip() for name in (extras or os.environ.get("HH_EXTRAS", "")).split(",") if name.strip() != ""}
+    if not extras <= set(InputConect.extras_names):
+        print("Неизвестная дополнительная статистика")
+        exit()
+    if granularity != "year":
+        extras.add("periods")
+    inputer = InputConect()
+    inputer.extras = frozenset(extras)
+    inputer.start_input()
+    from vacancy_store import is_store
+    from input_files import resolve_files
+    files = resolve_files(inputer.file_name)
+    if sample is not None:
+        if len(files) != 1 or is_store(files[0]):
+            print("Выборка поддерживается только для одного csv файла")
+            exit()
+        from sampling import read_sample
+        with instrumentation.stage("sample") as record:
+            inputer.count_sample(*read_sample(files[0], sample))
+            record["rows"] = inputer.sample_size
+    elif len(files) > 1:
+        with instrumentation.stage("count_files") as record:
+            inputer.count_files(files)
+            record["rows"] = inputer.city_count
+    elif is_store(inputer.file_name):
+        from vacancy_store import VacancyStore
+        store = VacancyStore(inputer.file_name)
+        with instrumentation.stage("count") as record:
+            inputer.count_from_store(store)
+            record["rows"] = inputer.city_count
+        store.close()
+    elif pipeline_workers != 0:
+        from pipeline import run_pipeline
+        with instrumentation.stage("pipeline") as record:
+            record["rows"] = run_pipeline(files[0], count_batch, inputer.merge, (inputer.profession, inputer.extras),
+                                          pipeline_workers)
+    else:
+        dataset = DataSet(files[0] if len(files) != 0 else inputer.file_name, list())
+        dataset.fill_vacancies(instrumentation)
+        with instrumentation.stage("count", len(dataset.vacancies_objects)):
+            inputer.count_vacancies(dataset.vacancies_objects)
+        if "bands" in inputer.extras:
+            with instrumentation.stage("salary_bands", len(dataset.vacancies_objects)):
+                inputer.count_salary_bands(dataset.get_salary_index())
+    with instrumentation.stage("normalize"):
+        inputer.normalize_statistic()
     inputer.print_answer()
+    inputer.print_quantiles()
+    inputer.print_skills()
+    inputer.print_employers()
+    inputer.print_salary_bands()
     reporter = Report()
     reporter.prepare_data(inputer.years, inputer.vacancies, inputer.cities, inputer.profession)
-    reporter.generate_excel()
-    reporter.generate_image()
-    reporter.generate_pdf()
+    reporter.prepare_skills(inputer.skills, inputer.skills_vacancies, inputer.skills_years)
+    reporter.prepare_employers(inputer)
+    reporter.salary_bands = inputer.salary_bands
+    reporter.prepare_estimate(inputer)
+    reporter.prepare_periods(inputer.time_buckets, inputer.time_buckets_vac, granularity)
+    from report_renderer import ReportRenderer
+    from artifact_cache import ArtifactCache
+    with ReportRenderer(cache=ArtifactCache()) as renderer:
+        renderer.render(reporter, instrumentation=instrumentation).result()
+    instrumentation.save()
@@ -1,7 +1,14 @@
+import os
 import csv
 import re
 import datetime
+import heapq
+from itertools import chain
 from prettytable import PrettyTable, ALL
+from instrumentation import Instrumentation
+from date_index import DateIndex, parse_days, parse_timestamps, parse_input_day
+from salary_index import SalaryIndex
+from compressed_input import open_input
 
 
 class Salary:
@@ -99,6 +106,15 @@ class Salary:
         return ((int(float("".join(self.salary_from.split()))) + int(float("".join(self.salary_to.split())))) // 2) * \
             self.currency_to_rub[self.salary_currency]
 
+    def to_rub_range(self):
+        """
+        Вилка оклада в рублях
+        :return: (float, float)
+            нижняя и верхняя граница оклада в рублях
+        """
+        rate = self.currency_to_rub[self.salary_currency]
+        return float("".join(self.salary_from.split())) * rate, float("".join(self.salary_to.split())) * rate
+
 
 class Vacancy:
     """
@@ -124,6 +140,12 @@ class Vacancy:
         название региона
     published_at : str
         дата публикации
+    published_day : int
+        день публикации (количество дней с 01.01.1970)
+    published_ts : int
+        время публикации (секунды unix)
+    row_id : int
+        номер строки в наборе вакансий
     experience_translated : dict
         словарь языкового перевода опыта работы
     experience_values : dict
@@ -144,13 +166,19 @@ class Vacancy:
         "Более 6 лет": 3
     }
 
-    def __init__(self, object_vacancy):
+    def __init__(self, object_vacancy, row_id: int = None, published_day: int = None, published_ts: int = None):
         """
         Инициализация объекта
         :param object_vacancy: dict
             словарь вакансии
-        """
-
+        :param row_id: int
+            номер строки в наборе вакансий
+        :param published_day: int
+            день публикации, разобранный для всего столбца (DataSet.csv_filer)
+        :param published_ts: int
+            время публикации, разобранное для всего столбца
+        """
+        self.row_id = row_id
         self.name = object_vacancy['name'][0]
         self.description = object_vacancy['description'][0]
         self.key_skills = object_vacancy['key_skills']
@@ -161,7 +189,8 @@ class Vacancy:
                              object_vacancy['salary_gross'][0], object_vacancy['salary_currency'][0])
         self.area_name = object_vacancy['area_name'][0]
         self.published_at = ".".join(reversed(object_vacancy['published_at'][0][:10].split("-")))
-            #datetime.datetime.strptime(object_vacancy['published_at'][0], '%Y-%m-%dT%H:%M:%S%z')
+        self.published_day = published_day
+        self.published_ts = published_ts
 
     def to_compare(self):
         """
@@ -182,6 +211,12 @@ class DataSet:
         имя/полный путь файла
     vacancies_object : Vacancy[]
         список вакансий
+    fingerprint : tuple
+        отпечаток загруженной версии файла (путь, время изменения, размер)
+    date_index : DateIndex
+        индекс вакансий по дню публикации, строится при первом запросе
+    salary_index : SalaryIndex
+        индекс вакансий по вилке оклада в рублях, строится при первом запросе
     """
     def __init__(self, file_name: str, vacancies_objects: list):
         """
@@ -193,14 +228,48 @@ class DataSet:
         """
         self.file_name = file_name
         self.vacancies_objects = vacancies_objects
+        self.fingerprint = None
+        self.date_index = None
+        self.salary_index = None
 
-    def fill_vacancies(self):
+    def fill_vacancies(self, instrumentation: Instrumentation = None):
         """
         читает csv файл и фильтрует его от html тегов,
         записывает итоговый результат в vacancies_objects
+        :param instrumentation: Instrumentation
+            замеры этапов
         """
-        vacancies, list_naming = self.read_csv()
-        self.vacancies_objects = self.csv_filer(vacancies, list_naming)
+        instrumentation = instrumentation or Instrumentation(enabled=False)
+        stat = os.stat(self.file_name)
+        self.fingerprint = (os.path.abspath(self.file_name), stat.st_mtime_ns, stat.st_size)
+        with instrumentation.stage("read_csv") as record:
+            vacancies, list_naming = self.read_csv()
+            record["rows"] = len(vacancies)
+        with instrumentation.stage("csv_filer", len(vacancies)):
+            self.vacancies_objects = self.csv_filer(vacancies, list_naming)
+        self.date_index = None
+        self.salary_index = None
+
+    def get_date_index(self):
+        """
+        Индекс вакансий по дню публикации
+        :return: DateIndex
+            индекс дней
+        """
+        if self.date_index is None:
+            self.date_index = DateIndex([vacancy.published_day for vacancy in self.vacancies_objects])
+        return self.date_index
+
+    def get_salary_index(self):
+        """
+        Индекс вакансий по вилке оклада в рублях
+        :return: SalaryIndex
+            индекс вилок
+        """
+        if self.salary_index is None:
+            ranges = [vacancy.salary.to_rub_range() for vacancy in self.vacancies_objects]
+            self.salary_index = SalaryIndex([low for low, _ in ranges], [high for _, high in ranges])
+        return self.salary_index
 
     def read_csv(self):
         """
@@ -210,7 +279,7 @@ class DataSet:
         """
         list_naming = []
         vacancies = []
-        with open(self.file_name, encoding='utf-8-sig') as file:
+        with open_input(self.file_name) as file:
             file_reader = csv.reader(file, delimiter=",")
             flag = True
             for row in file_reader:
@@ -231,7 +300,7 @@ class DataSet:
 
     def csv_filer(self, vacs, list_naming):
         """
-        Удаляет html теги и лишние пробелы из вакансий
+        Удаляет html теги и лишние пробелы из вакансий; даты публикации разбираются сразу для всего столбца
         :param vacs: str
             вакансии
         :param list_naming: bool
@@ -240,6 +309,8 @@ class DataSet:
             преобразованные вакансии
         """
         vacancies = list()
+        published_at = [row[list_naming.index('published_at')] for row in vacs]
+        days, timestamps = parse_days(published_at), parse_timestamps(published_at)
         for row in vacs:
             current = {}
             for i in range(len(row)):
@@ -247,7 +318,8 @@ class DataSet:
                 for j in range(len(current[list_naming[i]])):
                     current[list_naming[i]][j] = " ".join(
                         re.sub(re.compile('<.*?>'), '', current[list_naming[i]][j]).split())
-            vacancies.append(Vacancy(current))
+            row_id = len(vacancies)
+            vacancies.append(Vacancy(current, row_id, days[row_id], timestamps[row_id]))
         return vacancies
 
 
@@ -273,6 +345,8 @@ class InputConect:
         требуемый параметр фильтрации
     f_name: str
         имя файла
+    table_offset: int
+        номер первой вакансии, добавленной в таблицу
     """
     translated_fields = {
         "№": "№",
@@ -299,6 +373,7 @@ class InputConect:
         self.sort_by = None
         self.filter_by = None
         self.f_name = None
+        self.table_offset = 0
 
     def start_input(self):
         """
@@ -310,54 +385,100 @@ class InputConect:
         self.is_reversed_sort = input('Обратный порядок сортировки (Да / Нет): ')
         self.rows_count = input('Введите диапазон вывода: ')
         self.columns = input('Введите требуемые столбцы: ')
+        self.check_input()
+
+    def check_input(self):
+        """
+        Проверка введённых параметров и подготовка таблицы, при ошибке выводит сообщение и завершает программу
+        """
+        error = self.get_input_error()
+        if error is not None:
+            print(error)
+            exit()
+
+    def get_input_error(self):
+        """
+        Проверка введённых параметров и подготовка таблицы без завершения программы (для пакетного режима
+        и сервера запросов)
+        :return: str
+            сообщение об ошибке или None, если параметры корректны
+        """
         self.table = PrettyTable()
         self.table.field_names = (list(self.translated_fields.values())[0:10])
 
         if self.filter_by != '':
             if ": " not in self.filter_by:
-                print('Формат ввода некорректен')
-                exit()
+                return 'Формат ввода некорректен'
             field_name = self.filter_by.split(': ')[0]
             if field_name not in self.translated_fields.values():
-                print('Параметр поиска некорректен')
-                exit()
+                return 'Параметр поиска некорректен'
         if self.sort_by != '' and \
                 self.sort_by not in self.translated_fields.values():
-            print('Параметр сортировки некорректен')
-            exit()
+            return 'Параметр сортировки некорректен'
         if self.is_reversed_sort != '' and \
                 self.is_reversed_sort != 'Нет' and \
                 self.is_reversed_sort != 'Да':
-            print('Порядок сортировки задан некорректно')
-            exit()
+            return 'Порядок сортировки задан некорректно'
+        return None
 
-    def filter_vacancies(self, vacancies: list):
+    def get_date_range(self, value: str):
+        """
+        Диапазон дней для фильтра по дате: одна дата (dd.mm.yyyy) или диапазон (dd.mm.yyyy - dd.mm.yyyy)
+        :param value: str
+            значение фильтра
+        :return: (int, int)
+            первый и последний день диапазона
+        """
+        dates = value.split(' - ')
+        return parse_input_day(dates[0]), parse_input_day(dates[-1])
+
+    def get_salary_range(self, value: str):
+        """
+        Диапазон для фильтра по окладу в рублях: одно значение (N) или диапазон (A - B)
+        :param value: str
+            значение фильтра
+        :return: (float, float)
+            начало и конец диапазона
+        """
+        values = value.split(' - ')
+        return float(values[0]), float(values[-1])
+
+    def filter_vacancies(self, vacancies: list, dataset: DataSet = None):
         """
         Фильтрация вакансий по параметру фильтрации
         :param vacancies: list
             список вакансий
+        :param dataset: DataSet
+            набор вакансий; если vacancies - все его вакансии, фильтры по дате и окладу используют его индексы
         :return: list
             отфильтрованный список вакансий
         """
         result = list()
         if self.filter_by != '':
+            field_name = self.filter_by.split(': ')[0]
+            if field_name == "Дата публикации вакансии":
+                first_day, last_day = self.get_date_range(self.filter_by.split(': ')[1])
+                if dataset is not None and vacancies is dataset.vacancies_objects:
+                    return [vacancies[i] for i in dataset.get_date_index().find(first_day, last_day)]
+            elif field_name == 'Оклад':
+                first_salary, last_salary = self.get_salary_range(self.filter_by.split(': ')[1])
+                if dataset is not None and vacancies is dataset.vacancies_objects:
+                    ids = dataset.get_salary_index().find_overlapping(first_salary, last_salary)
+                    return [vacancies[i] for i in ids]
             for vacancy in vacancies:
-                field_name = self.filter_by.split(': ')[0]
                 value = self.filter_by.split(': ')[1]
                 if field_name == "Название":
                     if value != vacancy.name:
                         continue
                 elif field_name == 'Оклад':
-                    value = int(value)
-                    salary_from = int("".join(vacancy.salary.salary_from.split()))
-                    salary_to = int("".join(vacancy.salary.salary_to.split()))
-                    if value < salary_from or value > salary_to:
+                    salary_from, salary_to = vacancy.salary.to_rub_range()
+                    if last_salary < salary_from or first_salary > salary_to:
                         continue
                 elif field_name == 'Идентификатор валюты оклада':
                     if vacancy.salary.salary_currency != value:
                         continue
                 elif field_name == "Дата публикации вакансии":
-                    if value != (".".join(reversed(str(vacancy.published_at.date()).split('-')))):
+                    if not first_day <= vacancy.published_day <= last_day:
                         continue
                 else:
                     flag = False
@@ -376,6 +497,83 @@ class InputConect:
 
         return result
 
+    def get_store_query(self):
+        """
+        Перевод параметров фильтрации и сортировки в SQL для хранилища вакансий
+        :return: (list, list, list, bool, bool)
+            условия, их параметры, выражения ORDER BY, выполнен ли фильтр в SQL, выполнена ли сортировка в SQL
+        """
+        conditions, params, order = [], [], []
+        filter_pushed, sort_pushed = True, True
+        if self.filter_by != '':
+            field_name, value = self.filter_by.split(': ')[0], self.filter_by.split(': ')[1]
+            values = value.strip().split(', ')
+            if field_name == "Название":
+                conditions.append("name = ?")
+                params.append(value)
+            elif field_name == 'Оклад':
+                first_salary, last_salary = self.get_salary_range(value)
+                conditions.append("salary_low <= ? AND salary_high >= ?")
+                params += [last_salary, first_salary]
+            elif field_name == 'Идентификатор валюты оклада':
+                currencies = {translated: currency for currency, translated in Salary.currency_translation.items()}
+                conditions.append("salary_currency = ?")
+                params.append(currencies.get(value, value))
+            elif field_name == "Дата публикации вакансии":
+                conditions.append("published_day BETWEEN ? AND ?")
+                params += list(self.get_date_range(value))
+            elif field_name in ("Название региона", "Компания"):
+                column = "area_name" if field_name == "Название региона" else "employer_name"
+                conditions += [f"instr({column}, ?) > 0"] * len(values)
+                params += values
+            elif field_name == "Навыки":
+                conditions += ["instr(char(10) || key_skills || char(10), char(10) || ? || char(10)) > 0"] * len(values)
+                params += values
+            else:
+                filter_pushed = False
+
+        direction = "DESC" if self.is_reversed_sort == "Да" or self.is_reversed_sort is True else "ASC"
+        sort_columns = {
+            "Название": "name",
+            "Компания": "employer_name",
+            "Название региона": "area_name",
+            "Оклад": "salary",
+            "Дата публикации вакансии": "published_ts",
+            "Навыки": "length(key_skills) - length(replace(key_skills, char(10), ''))",
+            "Опыт работы": "CASE experience_id WHEN 'noExperience' THEN 0 WHEN 'between1And3' THEN 1 "
+                           "WHEN 'between3And6' THEN 2 ELSE 3 END"
+        }
+        if self.sort_by in sort_columns:
+            order.append(f"{sort_columns[self.sort_by]} {direction}")
+        elif self.sort_by != '':
+            sort_pushed = False
+        return conditions, params, order, filter_pushed, sort_pushed
+
+    def query_store(self, store):
+        """
+        Выборка вакансий из хранилища: фильтр, сортировка и диапазон вывода выполняются в SQL,
+        то, что нельзя перевести в SQL, выполняется над выбранными строками
+        :param store: vacancy_store.VacancyStore
+            хранилище вакансий
+        :return: (list, int)
+            вакансии и номер первой из них в полном списке
+        """
+        from vacancy_store import text_columns
+
+        conditions, params, order, filter_pushed, sort_pushed = self.get_store_query()
+        limit, offset = -1, 0
+        if filter_pushed and sort_pushed:
+            start_index, end_index = self.get_range(None)
+            offset = start_index
+            limit = end_index - start_index if end_index is not None else -1
+        rows = store.select_table_rows(conditions, params, order, limit, offset)
+        vacancies = DataSet(store.file_name, list()).csv_filer(rows, text_columns)
+        if not filter_pushed:
+            vacancies = self.filter_vacancies(vacancies)
+        if not sort_pushed:
+            vacancies = self.sort_vacancies(vacancies)
+        return vacancies, offset
+
     def sort_vacancies(self, vacancies: list):
         """
         Сортировка вакансий по требуемому параметру сортировки
@@ -384,76 +582,200 @@ class InputConect:
         :return: list
             отсортированный список вакансий
         """
-        self.is_reversed_sort = True if self.is_reversed_sort == "Да" else False
-        if self.sort_by == '':
+        key = self.get_sort_key()
+        if key is None:
             return vacancies
+        return sorted(vacancies, key=key, reverse=self.is_reversed_sort)
+
+    def get_sort_key(self):
+        """
+        Ключ сортировки по требуемому параметру сортировки, приводит is_reversed_sort к bool
+        :return: function
+            ключ сортировки или None, если сортировка не нужна
+        """
+        self.is_reversed_sort = self.is_reversed_sort in ("Да", True)
+        if self.sort_by == '':
+            return None
         if self.sort_by == 'Навыки':
-            return sorted(vacancies, key=lambda x: len(x.key_skills), reverse=self.is_reversed_sort)
+            return lambda x: len(x.key_skills)
         elif self.sort_by == 'Оклад':
-            return sorted(vacancies, key=lambda x: x.salary.to_compare(), reverse=self.is_reversed_sort)
+            return lambda x: x.salary.to_compare()
         elif self.sort_by == 'Дата публикации вакансии':
-            return sorted(vacancies, key=lambda x: x.published_at, reverse=self.is_reversed_sort)
+            return lambda x: x.published_ts
         elif self.sort_by == 'Опыт работы':
-            return sorted(vacancies, key=lambda x: x.to_compare(), reverse=self.is_reversed_sort)
+            return lambda x: x.to_compare()
         else:
             key = list(self.translated_fields.keys())[list(self.translated_fields.values()).index(self.sort_by)]
-            return sorted(vacancies, key=lambda x: getattr(x, key), reverse=self.is_reversed_sort)
+            return lambda x: getattr(x, key)
 
-    def add_vacancies_to_table(self, vacancies: list):
+    def merge_files(self, files: list, instrumentation: Instrumentation = None):
+        """
+        Отбор и сортировка вакансий каждого файла отдельно и слияние отсортированных списков
+        :param files: list
+            имена файлов
+        :param instrumentation: Instrumentation
+            замеры этапов
+        :return: list
+            отфильтрованные и отсортированные вакансии всех файлов; при равных ключах раньше идут вакансии
+            из файла, указанного раньше
+        """
+        instrumentation = instrumentation or Instrumentation(enabled=False)
+        parts = []
+        for file_name in files:
+            dataset = DataSet(file_name, list())
+            dataset.fill_vacancies(instrumentation)
+            with instrumentation.stage("filter", len(dataset.vacancies_objects)):
+                filtered_vacs = self.filter_vacancies(dataset.vacancies_objects, dataset)
+            with instrumentation.stage("sort", len(filtered_vacs)):
+                parts.append(self.sort_vacancies(filtered_vacs))
+        with instrumentation.stage("merge", sum(len(part) for part in parts)):
+            key = self.get_sort_key()
+            if key is None:
+                return list(chain.from_iterable(parts))
+            return list(heapq.merge(*parts, key=key, reverse=self.is_reversed_sort))
+
+    def add_vacancies_to_table(self, vacancies: list, offset: int = 0):
         """
         Добавление вакансий в таблицу
         :param vacancies: list
             список ваканский
+        :param offset: int
+            номер первой добавляемой вакансии в полном списке
         """
-        index = 1
+        self.table_offset = offset
+        index = offset + 1
         for vacancy in vacancies:
-            current = []
-            for key in list(self.translated_fields.keys())[1:10]:
-                value = getattr(vacancy, key)
-                adding = value
-                if type(value) == datetime.datetime:
-                    adding = (".".join(reversed(str(value.date()).split('-'))))
-                elif type(value) == list:
-                    adding = ("\n".join(value))
-                elif type(value) == Salary:
-                    adding = value.print()
-                if type(value) != Salary and len(adding) > 100:
-                    adding = adding[0:100] + "..."
-                current.append(adding)
-            self.table.add_row([index] + current)
+            self.table.add_row([index] + self.get_row(vacancy))
             index += 1
 
+    def get_row(self, vacancy: Vacancy):
+        """
+        Приведение вакансии к строке таблицы
+        :param vacancy: Vacancy
+            вакансия
+        :return: list
+            значения столбцов таблицы
+        """
+        current = []
+        for key in list(self.translated_fields.keys())[1:10]:
+            value = getattr(vacancy, key)
+            adding = value
+            if type(value) == datetime.datetime:
+                adding = (".".join(reversed(str(value.date()).split('-'))))
+            elif type(value) == list:
+                adding = ("\n".join(value))
+            elif type(value) == Salary:
+                adding = value.print()
+            if type(value) != Salary and len(adding) > 100:
+                adding = adding[0:100] + "..."
+            current.append(adding)
+        return current
+
+    def export_excel(self, vacancies: list, file_name: str):
+        """
+        Потоковая выгрузка вакансий из диапазона вывода и требуемых столбцов в файл excel
+        :param vacancies: list
+            список вакансий
+        :param file_name: str
+            имя файла
+        """
+        from excel_export import export_rows
+
+        inputed_columns = [line for line in self.columns.split(", ") if line.strip() != '']
+        columns = ["№"] + inputed_columns if len(inputed_columns) > 0 else self.table.field_names
+        indexes = [self.table.field_names.index(column) for column in columns]
+        start_index, end_index = self.get_range(len(vacancies))
+
+        def rows():
+            for index in range(start_index, min(end_index, len(vacancies))):
+                row = [index + 1] + self.get_row(vacancies[index])
+                yield [row[i] for i in indexes]
+
+        export_rows(file_name, 'Вакансии', columns, rows())
+
+    def add_page_to_table(self, vacancies: list):
+        """
+        Добавление в таблицу только вакансий из требуемого диапазона вывода
+        :param vacancies: list
+            полный список вакансий
+        """
+        if len(vacancies) == 0:
+            return
+        start_index, end_index = self.get_range(len(vacancies))
+        self.add_vacancies_to_table(vacancies[start_index:end_index], start_index)
+
+    def get_range(self, count: int):
+        """
+        Диапазон вывода
+        :param count: int
+            количество вакансий или None, если оно неизвестно
+        :return: (int, int)
+            индекс начала и конца диапазона (конец равен count, если он не задан)
+        """
+        table_range = self.rows_count.split()
+        start_index = int(table_range[0]) - 1 if len(table_range) >= 1 else 0
+        end_index = int(table_range[1]) - 1 if len(table_range) > 1 else count
+        return start_index, end_index
+
     def print_table(self):
         """
         Печать таблицы
         """
+        print(self.get_table_string())
+
+    def get_table_string(self):
+        """
+        Формирует строку таблицы для вывода
+        :return: str
+            таблица в заданном диапазоне и столбцах
+        """
         self.table.max_width = 20
         self.table.hrules = ALL
         self.table.align = 'l'
 
-        table_range = self.rows_count.split()
         inputed_columns = [line for line in self.columns.split(", ") if line.strip() != '']
         columns = ["№"] + inputed_columns
 
-        start_index = int(table_range[0]) - 1 if len(table_range) >= 1 else 0
-        end_index = int(table_range[1]) - 1 if len(table_range) > 1 else len(self.table.rows)
+        start_index, end_index = self.get_range(self.table_offset + len(self.table.rows))
+        start_index, end_index = max(start_index - self.table_offset, 0), max(end_index - self.table_offset, 0)
         columns = self.table.field_names if len(columns) == 1 else columns
 
-        if len(self.table.get_string().split('\n')) > 3:
-            print(self.table.get_string(start=start_index, end=end_index, fields=columns))
-        else:
-            print('Ничего не найдено')
+        if len(self.table.rows) > 0 or self.table_offset > 0:
+            return self.table.get_string(start=start_index, end=end_index, fields=columns)
+        return 'Ничего не найдено'
 
 
-def get_table():
+def get_table(instrumentation: Instrumentation = None):
     """
     Собирает данные из csv файла, фильтрует и сортирует по заданным параметрам и печатает итоговую таблицу
+    :param instrumentation: Instrumentation
+        замеры этапов, по умолчанию включаются переменной окружения HH_INSTRUMENTATION
     """
+    instrumentation = instrumentation or Instrumentation.from_env()
     inputer = InputConect()
     inputer.start_input()
-    dataset = DataSet(inputer.f_name, list())
-    dataset.fill_vacancies()
-    filtered_vacs = inputer.filter_vacancies(dataset.vacancies_objects)
-    sorted_vacs = inputer.sort_vacancies(filtered_vacs)
-    inputer.add_vacancies_to_table(sorted_vacs)
-    inputer.print_table()
+    from vacancy_store import is_store
+    from input_files import resolve_files
+    files = resolve_files(inputer.f_name)
+    if len(files) > 1:
+        sorted_vacs, offset = inputer.merge_files(files, instrumentation), 0
+    elif is_store(inputer.f_name):
+        from vacancy_store import VacancyStore
+        store = VacancyStore(inputer.f_name)
+        with instrumentation.stage("query") as record:
+            sorted_vacs, offset = inputer.query_store(store)
+            record["rows"] = len(sorted_vacs)
+        store.close()
+    else:
+        dataset = DataSet(files[0] if len(files) != 0 else inputer.f_name, list())
+        dataset.fill_vacancies(instrumentation)
+        with instrumentation.stage("filter", len(dataset.vacancies_objects)):
+            filtered_vacs = inputer.filter_vacancies(dataset.vacancies_objects, dataset)
+        with instrumentation.stage("sort", len(filtered_vacs)):
+            sorted_vacs = inputer.sort_vacancies(filtered_vacs)
+        offset = 0
+    with instrumentation.stage("print_table", len(sorted_vacs)):
+        if len(sorted_vacs) != 0:
+            inputer.add_vacancies_to_table(sorted_vacs, offset)
+        inputer.print_table()
+    instrumentation.save()
@@ -0,0 +1,147 @@
+import sys
+import json
+import concurrent.futures as con_fut
+from array import array
+import table
+from result_cache import ResultCache
+
+dataset = None
+# кэш родительского процесса: обработчики только вычисляют перестановки и пишут таблицы
+cache = ResultCache()
+
+
+def read_queries(file_name: str):
+    """
+    Читает файл с параметрами запросов
+
+    Файл содержит json-список объектов с полями filter_by, sort_by, is_reversed_sort, rows_count, columns
+    (в том же формате, что и ответы на вопросы get_table) и output - имя файла для результата;
+    результат с расширением .xlsx выгружается в excel
+    :param file_name: str
+        имя файла с запросами
+    :return: list
+        список запросов
+    """
+    with open(file_name, encoding='utf-8-sig') as file:
+        queries = json.load(file)
+    for index, query in enumerate(queries, start=1):
+        for key in ("filter_by", "sort_by", "is_reversed_sort", "rows_count", "columns"):
+            query[key] = query.get(key, '')
+        query["output"] = query.get("output", f"table_{index}.txt")
+    return queries
+
+
+def make_inputer(query: dict):
+    """
+    Создает объект ввода по параметрам запроса; некорректные параметры вызывают ValueError с сообщением
+    table.InputConect.get_input_error
+    :param query: dict
+        параметры запроса
+    :return: table.InputConect
+        проверенный объект ввода
+    """
+    inputer = table.InputConect()
+    inputer.filter_by = query["filter_by"]
+    inputer.sort_by = query["sort_by"]
+    inputer.is_reversed_sort = query["is_reversed_sort"]
+    inputer.rows_count = query["rows_count"]
+    inputer.columns = query["columns"]
+    error = inputer.get_input_error()
+    if error is not None:
+        raise ValueError(error)
+    return inputer
+
+
+def init_worker(loaded_dataset: table.DataSet):
+    """
+    Сохраняет загруженный набор вакансий в процессе-обработчике
+    :param loaded_dataset: table.DataSet
+        набор вакансий
+    """
+    global dataset
+    dataset = loaded_dataset
+
+
+def get_ids(query: dict):
+    """
+    Фильтрует и сортирует загруженный набор вакансий по параметрам запроса
+    :param query: dict
+        параметры запроса
+    :return: array
+        номера строк отфильтрованных и отсортированных вакансий
+    """
+    inputer = make_inputer(query)
+    sorted_vacs = inputer.sort_vacancies(inputer.filter_vacancies(dataset.vacancies_objects, dataset))
+    return array('l', (vacancy.row_id for vacancy in sorted_vacs))
+
+
+def run_query(query: dict, ids: array):
+    """
+    Записывает таблицу одного запроса в файл
+    :param query: dict
+        параметры запроса
+    :param ids: array
+        номера строк результата, полученные get_ids или из кэша
+    :return: str
+        имя файла с результатом
+    """
+    inputer = make_inputer(query)
+    sorted_vacs = [dataset.vacancies_objects[i] for i in ids]
+    if query["output"].endswith(".xlsx"):
+        inputer.export_excel(sorted_vacs, query["output"])
+        return query["output"]
+    inputer.add_page_to_table(sorted_vacs)
+    with open(query["output"], "w", encoding="utf-8") as file:
+        file.write(inputer.get_table_string())
+    return query["output"]
+
+
+def get_tables_batch(file_name: str, queries_file: str, max_workers: int = 4, result_cache: ResultCache = None):
+    """
+    Загружает файл с вакансиями один раз и выполняет над ним все запросы из файла запросов параллельно
+
+    Кэш перестановок находится в этом процессе: фильтрация и сортировка выполняются обработчиками один раз
+    для каждого ключа, которого нет в кэше, запросы с тем же ключом (и следующие вызовы с тем же кэшем)
+    получают номера строк из кэша
+    :param file_name: str
+        имя файла с вакансиями
+    :param queries_file: str
+        имя файла с запросами
+    :param max_workers: int
+        количество процессов-обработчиков
+    :param result_cache: ResultCache
+        кэш перестановок, по умолчанию общий для модуля
+    :return: list
+        имена файлов с результатами
+    """
+    result_cache = cache if result_cache is None else result_cache
+    queries = read_queries(queries_file)
+    inputers = [make_inputer(query) for query in queries]
+    loaded_dataset = table.DataSet(file_name, list())
+    loaded_dataset.fill_vacancies()
+    keys = [result_cache.get_key(loaded_dataset, inputer) for inputer in inputers]
+    with con_fut.ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                     initargs=(loaded_dataset,)) as executor:
+        # повторяющийся в пакете ключ вычисляется один раз
+        results = {}
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key not in results:
+                results[key] = result_cache.get(key)
+                if results[key] is None:
+                    missing[key] = query
+        for key, ids in zip(missing, executor.map(get_ids, missing.values())):
+            result_cache.put(key, ids)
+            results[key] = ids
+        return list(executor.map(run_query, queries, [results[key] for key in keys]))
+
+
+if __name__ == '__main__':
+    try:
+        outputs = get_tables_batch(sys.argv[1], sys.argv[2])
+    except ValueError as error:
+        print(error)
+        exit()
+    for output in outputs:
+        print(output)
+    print("Кэш: попаданий {hits}, промахов {misses}, записей {entries}, байт {bytes}".format(**cache.stats()))
@@ -0,0 +1,27 @@
+import unittest
+from date_index import DateIndex, parse_day, parse_days, parse_timestamp, parse_timestamps
+
+values = ["2022-06-21T10:30:57+0300", "2021-12-31T23:59:59-0130", "2003-01-01T00:00:00+0000",
+          "2010-05-05T05:05:05"]
+
+
+class ParseColumnTest(unittest.TestCase):
+    def test_days_match_row_parser(self):
+        self.assertEqual(parse_days(values), [parse_day(value) for value in values])
+
+    def test_timestamps_match_row_parser(self):
+        self.assertEqual(parse_timestamps(values), [parse_timestamp(value) for value in values])
+
+    def test_empty_column(self):
+        self.assertEqual(parse_days([]), [])
+        self.assertEqual(parse_timestamps([]), [])
+
+
+class DateIndexTest(unittest.TestCase):
+    def test_find_range(self):
+        index = DateIndex(parse_days(values))
+        self.assertEqual(index.find(parse_day("2010-01-01"), parse_day("2021-12-31")), [1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import csv
+import socket
+import tempfile
+import unittest
+import subprocess
+from multiproс import Statistic
+
+columns = ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+cities = ["Москва", "Москва", "Санкт-Петербург", "Казань"]
+
+
+def get_free_port():
+    """
+    Свободный порт локального адреса
+    :return: int
+        номер порта
+    """
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+class DistributedTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "vacancies.csv")
+        with open(self.file_name, "w", encoding="utf-8", newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for index in range(200):
+                name = "Аналитик данных" if index % 4 == 0 else "Программист"
+                writer.writerow([name, 10000 + index * 100, 20000 + index * 100, "RUR", cities[index % 4],
+                                 f"{2010 + index // 50}-03-{1 + index % 28:02}T10:00:00+0300"])
+        self.worker = None
+
+    def tearDown(self):
+        if self.worker is not None:
+            self.worker.terminate()
+            self.worker.wait()
+        self.directory.cleanup()
+
+    def test_worker_in_separate_interpreter(self):
+        authkey = b"test-key"
+        port = get_free_port()
+        # обработчик запускается так же, как на другой машине: python distributed.py host:port
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "distributed.py")
+        self.worker = subprocess.Popen([sys.executable, script, f"localhost:{port}"],
+                                       env=dict(os.environ, HH_AUTHKEY=authkey.decode("ascii")),
+                                       stdout=subprocess.DEVNULL)
+
+        stat = Statistic(self.file_name, "Аналитик", source="csv")
+        stat.get_stat_distributed(("localhost", port), authkey, task_timeout=60, max_retries=0)
+        expected = Statistic(self.file_name, "Аналитик", source="csv")
+        expected.get_stat_by_year_multi_off()
+        expected.get_stat_by_city()
+
+        self.assertEqual(stat.years_salary, expected.years_salary)
+        self.assertEqual(stat.years_count, expected.years_count)
+        self.assertEqual(stat.years_salary_vac, expected.years_salary_vac)
+        self.assertEqual(stat.years_count_vac, expected.years_count_vac)
+        self.assertEqual(stat.area_salary, expected.area_salary)
+        self.assertEqual(stat.area_count, expected.area_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
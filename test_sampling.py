@@ -0,0 +1,107 @@
+import os
+import csv
+import math
+import tempfile
+import unittest
+from sampling import ClusterEstimate, sample_blocks, t_95
+
+columns = ["name", "description", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+
+
+def write_csv(file_name: str, rows: list):
+    """
+    Записывает синтетический csv файл вакансий
+    :param file_name: str
+        имя файла
+    :param rows: list
+        строки без заглавий
+    """
+    with open(file_name, "w", encoding="utf-8", newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def make_row(index: int, description: str = "описание"):
+    """
+    Строка вакансии
+    :param index: int
+        номер вакансии
+    :param description: str
+        описание
+    :return: list
+        значения столбцов
+    """
+    return [f"Программист {index}", description, "10000", "20000", "RUR", "Москва",
+            f"{2010 + index % 5}-01-{1 + index % 28:02}T10:00:00+0300"]
+
+
+class ClusterEstimateTest(unittest.TestCase):
+    def test_census_has_zero_width(self):
+        estimate = ClusterEstimate(3)
+        for salaries in ([100, 200], [300], [400, 500, 600]):
+            cluster = estimate.new_cluster()
+            for salary in salaries:
+                estimate.add(cluster, ("all",), salary)
+        self.assertEqual(estimate.get_total(("all",)), (6.0, 0.0))
+        self.assertEqual(estimate.get_mean(("all",)), (350.0, 0.0))
+
+    def test_total_interval(self):
+        # 4 кластера из 10, в группе 2, 4, 0, 2 вакансии
+        estimate = ClusterEstimate(10)
+        for count in (2, 4, 0, 2):
+            cluster = estimate.new_cluster()
+            for _ in range(count):
+                estimate.add(cluster, ("year", 2010), 1)
+        total, interval = estimate.get_total(("year", 2010))
+        self.assertAlmostEqual(total, 20.0)
+        # группа есть в 3 кластерах -> 2 степени свободы
+        self.assertAlmostEqual(interval, 10 * t_95[1] * math.sqrt((1 - 4 / 10) * 8 / (4 * 3)))
+
+    def test_ratio_interval(self):
+        # 2 кластера из 4: зарплаты [100, 200] и [300]
+        estimate = ClusterEstimate(4)
+        for salaries in ([100, 200], [300]):
+            cluster = estimate.new_cluster()
+            for salary in salaries:
+                estimate.add(cluster, ("all",), salary)
+        mean, interval = estimate.get_mean(("all",))
+        self.assertAlmostEqual(mean, 200.0)
+        variance_sum = (300 - 200 * 2) ** 2 + (300 - 200 * 1) ** 2
+        self.assertAlmostEqual(interval, t_95[0] * math.sqrt((1 - 2 / 4) * variance_sum / 2) / 1.5)
+
+    def test_single_cluster_is_unbounded(self):
+        estimate = ClusterEstimate(5)
+        estimate.add(estimate.new_cluster(), ("all",), 100)
+        self.assertEqual(estimate.get_total(("all",))[1], math.inf)
+
+
+class SampleBlocksTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "vacancies.csv")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_full_sample_reads_every_record_once(self):
+        rows = [make_row(i, "строка 1\nстрока 2" if i % 3 == 0 else "описание") for i in range(300)]
+        write_csv(self.file_name, rows)
+        list_naming, clusters, total_blocks, unparsed = sample_blocks(self.file_name, 1.0, seed=0, block_size=256)
+        self.assertEqual(list_naming, columns)
+        self.assertEqual(len(clusters), total_blocks)
+        self.assertEqual(unparsed, 0)
+        self.assertEqual(sorted(row[0] for cluster in clusters for row in cluster), sorted(row[0] for row in rows))
+
+    def test_blocks_inside_long_record_are_counted(self):
+        rows = [make_row(i) for i in range(20)]
+        rows.insert(10, make_row(20, "длинное описание\n" * 300))
+        write_csv(self.file_name, rows)
+        _, clusters, total_blocks, unparsed = sample_blocks(self.file_name, 1.0, seed=0, block_size=256)
+        self.assertEqual(len(clusters), total_blocks)
+        self.assertGreater(unparsed, 0)
+        self.assertEqual(unparsed, sum(1 for cluster in clusters if len(cluster) == 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+from datetime import date
+from date_index import epoch_ordinal
+
+granularities = ("year", "quarter", "month", "week")
+
+
+def bucket_codes(day: int):
+    """
+    Целочисленные коды периодов для дня публикации
+    :param day: int
+        количество дней с 01.01.1970
+    :return: tuple
+        коды (год, квартал, месяц, неделя), отсчитанные от 01.01.1970; недели начинаются с понедельника
+    """
+    published = date.fromordinal(day + epoch_ordinal)
+    month = (published.year - 1970) * 12 + published.month - 1
+    return month // 12, month // 3, month, (day + 3) // 7
+
+
+def bucket_label(granularity: str, code: int):
+    """
+    Подпись периода
+    :param granularity: str
+        размер периода
+    :param code: int
+        код периода
+    :return: str
+        2022, 2022-Q1, 2022-03 или дата понедельника недели 2022-03-07
+    """
+    if granularity == "year":
+        return str(code + 1970)
+    if granularity == "quarter":
+        return f"{code // 4 + 1970}-Q{code % 4 + 1}"
+    if granularity == "month":
+        return f"{code // 12 + 1970}-{code % 12 + 1:02}"
+    return date.fromordinal(code * 7 - 3 + epoch_ordinal).isoformat()
+
+
+class TimeBuckets:
+    """
+    Зарплаты и количество вакансий сразу по всем размерам периодов (год, квартал, месяц, неделя) за один проход
+
+    Attributes
+    ----------
+    window: int
+        количество периодов скользящего среднего
+    buckets: dict
+        размер периода -> код периода -> [сумма зарплат, количество зарплат, количество вакансий]
+    """
+    def __init__(self, window: int = 3):
+        """
+        Инициализация объекта
+        :param window: int
+            количество периодов скользящего среднего
+        """
+        self.window = window
+        self.buckets = {granularity: {} for granularity in granularities}
+
+    def update(self, day: int, salary: float = None):
+        """
+        Учет одной вакансии
+        :param day: int
+            день публикации (количество дней с 01.01.1970)
+        :param salary: float
+            зарплата или None
+        """
+        for granularity, code in zip(granularities, bucket_codes(day)):
+            bucket = self.buckets[granularity].get(code)
+            if bucket is None:
+                bucket = self.buckets[granularity][code] = [0, 0, 0]
+            if salary is not None:
+                bucket[0] += salary
+                bucket[1] += 1
+            bucket[2] += 1
+
+    def add_arrays(self, days, salaries):
+        """
+        Учет столбцов вакансий векторными операциями numpy
+        :param days: numpy.ndarray
+            дни публикации (количество дней с 01.01.1970)
+        :param salaries: numpy.ndarray
+            зарплаты, NaN для вакансий без зарплаты
+        """
+        import numpy as np
+
+        salaries = np.asarray(salaries, dtype=np.float64)
+        has_salary = ~np.isnan(salaries)
+        self.add_sums(days, np.where(has_salary, salaries, 0), has_salary, np.ones(len(salaries), dtype=np.int64))
+
+    def add_sums(self, days, salary_sums, salary_counts, counts):
+        """
+        Учет сумм, уже посчитанных по дням (или по отдельным вакансиям)
+        :param days: numpy.ndarray
+            дни публикации (количество дней с 01.01.1970)
+        :param salary_sums: numpy.ndarray
+            суммы зарплат
+        :param salary_counts: numpy.ndarray
+            количество зарплат
+        :param counts: numpy.ndarray
+            количество вакансий, дни без вакансий пропускаются
+        """
+        import numpy as np
+
+        counts = np.asarray(counts)
+        selected = counts != 0
+        days = np.asarray(days, dtype=np.int64)[selected]
+        salary_sums = np.asarray(salary_sums, dtype=np.float64)[selected]
+        salary_counts = np.asarray(salary_counts)[selected]
+        counts = counts[selected]
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        codes = {"year": months // 12, "quarter": months // 3, "month": months, "week": (days + 3) // 7}
+        for granularity in granularities:
+            unique, inverse = np.unique(codes[granularity], return_inverse=True)
+            salary_sum = np.bincount(inverse, weights=salary_sums, minlength=len(unique))
+            salary_count = np.bincount(inverse, weights=salary_counts, minlength=len(unique))
+            count = np.bincount(inverse, weights=counts, minlength=len(unique)).round().astype(np.int64)
+            for code, values in zip(unique.tolist(), zip(salary_sum.tolist(), salary_count.tolist(), count.tolist())):
+                bucket = self.buckets[granularity].setdefault(code, [0, 0, 0])
+                for i in range(3):
+                    bucket[i] += values[i]
+
+    def merge(self, other):
+        """
+        Объединение с периодами, посчитанными по другой части данных (например, в другом процессе)
+        :param other: TimeBuckets
+            другие периоды
+        """
+        for granularity in granularities:
+            for code, values in other.buckets[granularity].items():
+                bucket = self.buckets[granularity].setdefault(code, [0, 0, 0])
+                for i in range(3):
+                    bucket[i] += values[i]
+
+    def series(self, granularity: str = "year"):
+        """
+        Ряды по непрерывной последовательности периодов, пустые периоды заполняются нулями
+        :param granularity: str
+            размер периода
+        :return: dict
+            подпись периода -> [средняя зп, количество вакансий, скользящая средняя зп,
+            скользящее среднее количества вакансий]
+        """
+        buckets = self.buckets[granularity]
+        if len(buckets) == 0:
+            return {}
+        codes = range(min(buckets), max(buckets) + 1)
+        empty = [0, 0, 0]
+        result = {}
+        for i, code in enumerate(codes):
+            salary_sum, salary_count, count = buckets.get(code, empty)
+            window = [buckets.get(c, empty) for c in codes[max(0, i - self.window + 1):i + 1]]
+            window_salary_count = sum(values[1] for values in window)
+            result[bucket_label(granularity, code)] = [
+                int(salary_sum // salary_count) if salary_count != 0 else 0,
+                int(count),
+                int(sum(values[0] for values in window) // window_salary_count) if window_salary_count != 0 else 0,
+                round(sum(values[2] for values in window) / len(window), 2)]
+        return result
@@ -0,0 +1,108 @@
+import sys
+import csv
+import random
+
+table_columns = ["name", "description", "key_skills", "experience_id", "premium", "employer_name", "salary_from",
+                 "salary_to", "salary_gross", "salary_currency", "area_name", "published_at"]
+short_columns = ["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]
+
+professions = ["Программист", "Аналитик", "Системный администратор", "Менеджер по продажам", "Тестировщик",
+               "Дизайнер", "Бухгалтер", "Инженер", "Специалист технической поддержки", "Руководитель проекта"]
+levels = ["", "Младший ", "Старший ", "Ведущий ", "Главный "]
+specializations = ["", " Python", " Java", " 1С", " данных", " C++", " баз данных", " JavaScript"]
+areas = {"Москва": 40, "Санкт-Петербург": 15, "Екатеринбург": 5, "Новосибирск": 5, "Казань": 4, "Нижний Новгород": 4,
+         "Краснодар": 3, "Самара": 3, "Ростов-на-Дону": 3, "Минск": 3, "Алматы": 2, "Киев": 2, "Пермь": 2,
+         "Воронеж": 2, "Уфа": 2, "Томск": 1, "Ярославль": 1, "Владивосток": 1, "Омск": 1, "Тюмень": 1}
+currencies = {"RUR": 85, "USD": 4, "EUR": 3, "KZT": 3, "UAH": 2, "BYR": 2, "AZN": 0.3, "GEL": 0.2, "KGS": 0.3,
+              "UZS": 0.2}
+currency_scale = {"RUR": 1, "USD": 1 / 60, "EUR": 1 / 65, "KZT": 5, "UAH": 1 / 2, "BYR": 1 / 25, "AZN": 1 / 35,
+                  "GEL": 1 / 22, "KGS": 1.3, "UZS": 180}
+skills = ["Python", "SQL", "Git", "Linux", "Java", "JavaScript", "Docker", "1С", "Excel", "Английский язык",
+          "Деловое общение", "Управление проектами", "PostgreSQL", "C++", "Kubernetes", "Django", "Photoshop",
+          "Продажи", "Бухгалтерский учет", "Работа в команде"]
+experience = ["noExperience", "between1And3", "between3And6", "moreThan6"]
+
+
+def generate_row(rnd: random.Random, index: int, first_year: int, last_year: int):
+    """
+    Создает одну вакансию в полном формате
+    :param rnd: random.Random
+        генератор случайных чисел
+    :param index: int
+        номер вакансии
+    :param first_year: int
+        первый год публикации
+    :param last_year: int
+        последний год публикации
+    :return: list
+        значения столбцов table_columns
+    """
+    year = rnd.randint(first_year, last_year)
+    currency = rnd.choices(list(currencies), weights=list(currencies.values()))[0]
+    base = rnd.lognormvariate(10.8, 0.5) * (1 + (year - first_year) * 0.04) * currency_scale[currency]
+    salary_from = str(round(base, -2)) if rnd.random() > 0.15 else ""
+    salary_to = str(round(base * rnd.uniform(1, 1.6), -2)) if rnd.random() > 0.25 else ""
+    return [f"{rnd.choice(levels)}{rnd.choice(professions)}{rnd.choice(specializations)}",
+            f"<p>Вакансия №{index}. <strong>Обязанности:</strong> работа в команде</p>",
+            "\n".join(rnd.sample(skills, rnd.randint(1, 6))),
+            rnd.choice(experience),
+            rnd.choice(["True", "False", "False", "False"]),
+            f"Компания {int(rnd.paretovariate(1.2)) % 50000}",
+            salary_from,
+            salary_to,
+            rnd.choice(["True", "False"]),
+            currency,
+            rnd.choices(list(areas), weights=list(areas.values()))[0],
+            f"{year}-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}T{rnd.randint(0, 23):02}:{rnd.randint(0, 59):02}:"
+            f"{rnd.randint(0, 59):02}+0300"]
+
+
+def generate_csv(file_name: str, rows_count: int, short: bool = False, seed: int = 0, first_year: int = 2003,
+                 last_year: int = 2022):
+    """
+    Записывает детерминированный набор вакансий в csv файл построчно (объем памяти не зависит от числа строк)
+    :param file_name: str
+        имя файла
+    :param rows_count: int
+        количество вакансий
+    :param short: bool
+        сокращенный формат (как в hh_vacancies.csv) вместо полного формата table.DataSet
+    :param seed: int
+        начальное значение генератора
+    :param first_year: int
+        первый год публикации
+    :param last_year: int
+        последний год публикации
+    """
+    rnd = random.Random(seed)
+    indexes = [table_columns.index(column) for column in short_columns]
+    with open(file_name, "w", encoding="utf-8", newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(short_columns if short else table_columns)
+        for index in range(rows_count):
+            row = generate_row(rnd, index, first_year, last_year)
+            writer.writerow([row[i] for i in indexes] if short else row)
+
+
+def generate_currencies(file_name: str = "currencies.csv", first_year: int = 2003, last_year: int = 2022):
+    """
+    Записывает курсы валют по месяцам в формате currency_rates.get_currencies_diff
+    :param file_name: str
+        имя файла
+    :param first_year: int
+        первый год
+    :param last_year: int
+        последний год
+    """
+    rates = {"BYR": 0.03, "USD": 30.0, "EUR": 35.0, "KZT": 0.2, "UAH": 4.0}
+    with open(file_name, "w", encoding="utf-8", newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Date"] + list(rates))
+        for year in range(first_year, last_year + 1):
+            for month in range(1, 13):
+                growth = 1 + ((year - first_year) * 12 + month) * 0.004
+                writer.writerow([f"{year}-{month:02}"] + [round(rate * growth, 4) for rate in rates.values()])
+
+
+if __name__ == '__main__':
+    generate_csv(sys.argv[1], int(sys.argv[2]), short=len(sys.argv) > 3 and sys.argv[3] == "short")
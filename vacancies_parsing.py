@@ -1,4 +1,7 @@
+import os
 import pandas as pd
+import columnar_dataset
+from compressed_input import open_binary
 
 pd.set_option("display.max_columns", False)
 pd.set_option("expand_frame_repr", False)
@@ -8,10 +11,30 @@ def parse_csv_by_year(file="Data\\vacancies_by_year.csv"):
     """
     Группирует данные во входном файле по годам(разделяет на более мелкие)
     :param file: str
+        csv файл, сжатый или нет
     """
-    df = pd.read_csv(file)
+    with open_binary(file) as data:
+        df = pd.read_csv(data)
     df["year"] = df["published_at"].apply(lambda s: s[:4])
     df = df.groupby("year")
+    os.makedirs("Csvs", exist_ok=True)
     for year, data in df:
         data[["name", "salary_from", "salary_to", "salary_currency", "area_name", "published_at"]].to_csv(
-            rf"Csvs\year_{year}.csv", index=False)
\ No newline at end of file
+            os.path.join("Csvs", f"year_{year}.csv"), index=False)
+
+
+def parse_csv_to_columns(file=os.path.join("Data", "vacancies_by_year.csv"), root="Columns", by_month=False):
+    """
+    Записывает входной файл в колоночный формат columnar_dataset, разбитый на части по годам или месяцам
+    :param file: str
+        csv файл, сжатый или нет
+    :param root: str
+        папка набора
+    :param by_month: bool
+        разбивать ли части по месяцам
+    :return: list
+        описания записанных частей
+    """
+    with open_binary(file) as data:
+        df = pd.read_csv(data)
+    return columnar_dataset.write_dataset(df, root, by_month)
\ No newline at end of file
@@ -0,0 +1,268 @@
+import os
+import re
+import csv
+import sys
+import sqlite3
+from date_index import parse_day, parse_timestamp
+from statistic import Vacancy
+from compressed_input import open_input
+
+store_extensions = (".sqlite", ".sqlite3", ".db")
+
+# текстовые столбцы вакансии в том виде, в котором они были в исходном csv
+text_columns = ("name", "description", "key_skills", "experience_id", "premium", "employer_name", "salary_from",
+                "salary_to", "salary_gross", "salary_currency", "area_name", "published_at")
+
+# столбцы, которые нужны таблице (table.DataSet) помимо столбцов сокращенного формата
+detail_columns = ("description", "key_skills", "experience_id", "premium", "employer_name", "salary_gross")
+
+schema = """
+CREATE TABLE IF NOT EXISTS vacancies (
+    id INTEGER PRIMARY KEY,
+    source TEXT,
+    name TEXT,
+    description TEXT,
+    key_skills TEXT,
+    experience_id TEXT,
+    premium TEXT,
+    employer_name TEXT,
+    salary_from TEXT,
+    salary_to TEXT,
+    salary_gross TEXT,
+    salary_currency TEXT,
+    area_name TEXT,
+    published_at TEXT,
+    salary REAL,
+    salary_low REAL,
+    salary_high REAL,
+    published_day INTEGER,
+    published_ts INTEGER,
+    year INTEGER,
+    complete INTEGER,
+    has_details INTEGER
+);
+CREATE INDEX IF NOT EXISTS vacancies_published_day ON vacancies (published_day);
+CREATE INDEX IF NOT EXISTS vacancies_published_ts ON vacancies (published_ts);
+CREATE INDEX IF NOT EXISTS vacancies_area_name ON vacancies (area_name);
+CREATE INDEX IF NOT EXISTS vacancies_salary ON vacancies (salary);
+CREATE INDEX IF NOT EXISTS vacancies_salary_range ON vacancies (salary_low, salary_high);
+CREATE INDEX IF NOT EXISTS vacancies_currency ON vacancies (salary_currency);
+"""
+
+
+def is_store(file_name: str):
+    """
+    Проверяет, является ли файл хранилищем вакансий
+    :param file_name: str
+        имя файла
+    :return: bool
+        True для файлов .sqlite, .sqlite3 и .db
+    """
+    return os.path.splitext(file_name)[1].lower() in store_extensions
+
+
+html_tag = re.compile('<.*?>')
+
+
+def is_empty(value):
+    """
+    Проверяет, пустое ли значение столбца
+    :param value: object
+        значение из csv или из DataFrame
+    :return: bool
+        True для None, NaN, пустой строки и строки None, которую записывал hh_parser
+    """
+    return value is None or value != value or value in ("", "None")
+
+
+def clean_text(value: str):
+    """
+    Удаляет html теги и лишние пробелы в каждой строке значения, как table.DataSet.csv_filer,
+    чтобы фильтры в SQL сравнивали тот же текст, что и фильтры в памяти
+    :param value: str
+        значение столбца
+    :return: str
+        очищенное значение
+    """
+    return "\n".join(" ".join(re.sub(html_tag, '', line).split()) for line in value.split("\n"))
+
+
+def get_rub_salary(row: dict):
+    """
+    Зарплата в рублях: среднее (как в statistic.Vacancy) и вилка (как в table.Salary.to_rub_range)
+    :param row: dict
+        вакансия из csv
+    :return: (float, float, float)
+        средняя зарплата, нижняя и верхняя граница вилки или None, если зарплату не удалось перевести в рубли
+    """
+    if "salary" in row:
+        salary = float(row["salary"]) if row["salary"] else None
+        return salary, salary, salary
+    try:
+        salary_from = float("".join(row["salary_from"].split()))
+        salary_to = float("".join(row["salary_to"].split()))
+        rate = Vacancy.currency_to_rub[row["salary_currency"]]
+    except (ValueError, KeyError, AttributeError):
+        return None, None, None
+    return (int(salary_from) + int(salary_to)) * rate // 2, salary_from * rate, salary_to * rate
+
+
+def make_record(row: dict, source: str):
+    """
+    Приводит вакансию из csv к строке хранилища
+    :param row: dict
+        вакансия: столбцы полного, сокращенного или обработанного (name, salary, area_name, published_at) формата
+    :param source: str
+        откуда получена вакансия
+    :return: list
+        значения столбцов хранилища без id
+    """
+    row = {column: None if is_empty(value) else clean_text(str(value)) for column, value in row.items()}
+    complete = all(value is not None for value in row.values())
+    has_details = complete and all(row.get(column) is not None for column in detail_columns)
+    salary, salary_low, salary_high = get_rub_salary(row)
+    published_at = row.get("published_at")
+    if published_at:
+        day, ts, year = parse_day(published_at), parse_timestamp(published_at), int(published_at[:4])
+    else:
+        day, ts, year = None, None, None
+    return [source] + [row.get(column) for column in text_columns] + \
+        [salary, salary_low, salary_high, day, ts, year, int(complete), int(has_details)]
+
+
+class VacancyStore:
+    """
+    Локальное хранилище вакансий в SQLite с индексами по дате публикации, региону, зарплате и валюте
+
+    Запись идет пачками, каждая пачка - одна транзакция; фильтры, сортировка и агрегаты выполняются в SQL,
+    поэтому запрос читает только нужные строки
+
+    Attributes
+    ----------
+    file_name: str
+        имя файла базы
+    connection: sqlite3.Connection
+        соединение с базой
+    batch_size: int
+        количество строк в одной транзакции записи
+    """
+    def __init__(self, file_name: str = "vacancies.sqlite", batch_size: int = 10000):
+        """
+        Инициализация объекта, создает таблицу и индексы, если их нет
+        :param file_name: str
+            имя файла базы
+        :param batch_size: int
+            количество строк в одной транзакции записи
+        """
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(file_name)
+        self.connection.executescript(schema)
+
+    def insert_rows(self, rows, source: str):
+        """
+        Запись вакансий пачками по batch_size строк в одной транзакции
+        :param rows: iterable
+            вакансии (словари со столбцами csv)
+        :param source: str
+            откуда получены вакансии
+        :return: int
+            количество записанных строк
+        """
+        sql = f"INSERT INTO vacancies (source, {', '.join(text_columns)}, salary, salary_low, salary_high, " \
+              f"published_day, published_ts, year, complete, has_details) VALUES ({', '.join(['?'] * 21)})"
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(make_record(row, source))
+            if len(batch) >= self.batch_size:
+                with self.connection:
+                    self.connection.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if len(batch) != 0:
+            with self.connection:
+                self.connection.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def import_csv(self, file_name: str, source: str = None):
+        """
+        Запись вакансий из csv файла
+        :param file_name: str
+            имя csv файла, сжатого или нет
+        :param source: str
+            откуда получены вакансии, по умолчанию имя файла
+        :return: int
+            количество записанных строк
+        """
+        with open_input(file_name, newline="") as file:
+            return self.insert_rows(csv.DictReader(file), source or os.path.basename(file_name))
+
+    def select_table_rows(self, conditions: list, params: list, order: list, limit: int = -1, offset: int = 0):
+        """
+        Вакансии полного формата для таблицы
+        :param conditions: list
+            условия SQL, объединяются через AND
+        :param params: list
+            параметры условий
+        :param order: list
+            выражения ORDER BY, в конце всегда добавляется порядок записи
+        :param limit: int
+            количество строк, -1 - без ограничения
+        :param offset: int
+            количество пропускаемых строк
+        :return: list
+            строки со значениями text_columns
+        """
+        where = " AND ".join(["complete = 1", "has_details = 1"] + conditions)
+        sql = f"SELECT {', '.join(text_columns)} FROM vacancies WHERE {where} " \
+              f"ORDER BY {', '.join(order + ['id'])} LIMIT ? OFFSET ?"
+        return self.connection.execute(sql, params + [limit, offset]).fetchall()
+
+    def aggregate_salary(self, column: str, profession: str = None):
+        """
+        Сумма и количество зарплат в рублях по значениям столбца
+        :param column: str
+            year или area_name
+        :param profession: str
+            если задана, учитываются только вакансии, в названии которых она есть
+        :return: list
+            (значение столбца, сумма зарплат, количество вакансий) в порядке возрастания значения
+        """
+        if column not in ("year", "area_name"):
+            raise ValueError(column)
+        where, params = "complete = 1 AND salary IS NOT NULL", []
+        if profession is not None:
+            where, params = where + " AND instr(name, ?) > 0", [profession]
+        sql = f"SELECT {column}, SUM(salary), COUNT(*) FROM vacancies WHERE {where} GROUP BY {column} ORDER BY {column}"
+        return self.connection.execute(sql, params).fetchall()
+
+    def iter_rows(self, columns: tuple):
+        """
+        Потоковое чтение выбранных столбцов вакансий, по которым можно посчитать зарплату
+        :param columns: tuple
+            столбцы из text_columns или salary
+        :return: generator
+            словари столбец -> значение, пустые значения пропускаются
+        """
+        for column in columns:
+            if column not in text_columns + ("salary",):
+                raise ValueError(column)
+        cursor = self.connection.execute(f"SELECT {', '.join(columns)} FROM vacancies "
+                                         f"WHERE complete = 1 AND salary IS NOT NULL ORDER BY id")
+        for row in cursor:
+            yield {column: value for column, value in zip(columns, row) if value is not None}
+
+    def close(self):
+        """
+        Закрывает соединение
+        """
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    store = VacancyStore(sys.argv[1])
+    for csv_file in sys.argv[2:]:
+        print(f"{csv_file}: {store.import_csv(csv_file)}")
+    store.close()